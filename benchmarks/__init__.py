@@ -0,0 +1,4 @@
+"""Benchmarks for the openwbmqtt integration.
+
+Run from the repository root, for example python -m benchmarks.bench_router.
+"""
@@ -0,0 +1,97 @@
+"""Memory use and setup time of the entity catalog.
+
+Runs the setup of all platforms for several config entries with 1, 8 and 32
+charge points, once with the shared entity descriptions and once with an
+additional deep copy of the catalog per charge point, as the platforms did
+before the descriptions were shared.
+"""
+from __future__ import annotations
+
+import asyncio
+import copy
+import time
+import tracemalloc
+
+from custom_components.openwbmqtt.const import (
+    BINARY_SENSORS_GLOBAL,
+    BINARY_SENSORS_PER_LP,
+    NUMBERS_GLOBAL,
+    NUMBERS_PER_LP,
+    SELECTS_GLOBAL,
+    SELECTS_PER_LP,
+    SENSORS_GLOBAL,
+    SENSORS_PER_LP,
+    SWITCHES_PER_LP,
+)
+
+from .common import FakeConfigEntry, FakeHass, async_setup_platforms, report
+
+CONFIG_ENTRIES = 3
+
+
+def deep_copies(n_charge_points: int) -> list:
+    """Return the per charge point copies the platforms used to make."""
+    copies = [
+        copy.deepcopy(catalog)
+        for catalog in (
+            SENSORS_GLOBAL,
+            BINARY_SENSORS_GLOBAL,
+            NUMBERS_GLOBAL,
+            SELECTS_GLOBAL,
+        )
+    ]
+    for _ in range(n_charge_points):
+        copies += [
+            copy.deepcopy(catalog)
+            for catalog in (
+                SENSORS_PER_LP,
+                BINARY_SENSORS_PER_LP,
+                NUMBERS_PER_LP,
+                SELECTS_PER_LP,
+                SWITCHES_PER_LP,
+            )
+        ]
+    return copies
+
+
+async def async_setup(n_charge_points: int, with_copies: bool) -> list:
+    """Set up the platforms of all config entries."""
+    hass = FakeHass()
+    keep = []
+    for index in range(CONFIG_ENTRIES):
+        entry = FakeConfigEntry(f"openWB{index}", n_charge_points)
+        if with_copies:
+            keep.append(deep_copies(n_charge_points))
+        keep.append(await async_setup_platforms(hass, entry))
+    return keep
+
+
+def main() -> None:
+    """Run the benchmark."""
+    results = []
+    for n_charge_points in (1, 8, 32):
+        for mode, with_copies in (("deepcopy", True), ("shared", False)):
+            tracemalloc.start()
+            start = time.perf_counter()
+            keep = asyncio.run(async_setup(n_charge_points, with_copies))
+            setup_s = time.perf_counter() - start
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            results.append(
+                {
+                    "mode": mode,
+                    "charge_points": n_charge_points,
+                    "config_entries": CONFIG_ENTRIES,
+                    "entities": sum(len(entities) for entities in keep[-1:])
+                    * CONFIG_ENTRIES,
+                    "setup_ms": round(setup_s * 1e3, 2),
+                    "retained_kib": round(current / 1024, 1),
+                    "peak_kib": round(peak / 1024, 1),
+                }
+            )
+            del keep
+    report("catalog", results)
+
+
+if __name__ == "__main__":
+    main()
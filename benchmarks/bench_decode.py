@@ -0,0 +1,80 @@
+"""Cost of the numeric sensor payloads from the raw bytes of the message.
+
+Every numeric sensor of a charge point and the global numeric sensors
+receive one message. Compared are the payloads decoded to text by the MQTT
+client and passed through the value_fn lambdas of the descriptions, the
+path before, and the raw bytes parsed by the compiled numeric parsers.
+Numeric payloads without a value_fn were passed on as text before, HA
+converts them to a number when the state is written; that conversion is
+part of the legacy path here.
+
+Reported per mode: ns per message.
+"""
+from __future__ import annotations
+
+from custom_components.openwbmqtt.const import SENSORS_GLOBAL, SENSORS_PER_LP
+from custom_components.openwbmqtt.parsers import compile_sensor_parser
+
+from .common import report, timeit
+
+PAYLOADS = [b"3680", b"1234.5678", b"-2150", b"16", b"0", b"230.41", b"98"]
+
+
+def legacy_value_fn(description):
+    """Return the value_fn the description had before the numeric parsers."""
+    scale = description.scale
+    digits = description.digits
+    if digits is None:
+        return float
+    if scale is None:
+        return lambda x: round(float(x), digits or None)
+    if scale == -1:
+        return lambda x: round(float(x) * (-1.0))
+    return lambda x: round(float(x) / 1000.0, digits)
+
+
+def main() -> None:
+    """Run the benchmark."""
+    descriptions = [d for d in SENSORS_GLOBAL + SENSORS_PER_LP if d.numeric]
+    loops = 2000
+    messages = [
+        (description, PAYLOADS[index % len(PAYLOADS)])
+        for index, description in enumerate(descriptions)
+    ]
+    legacy = [
+        (legacy_value_fn(description), payload) for description, payload in messages
+    ]
+    compiled = [
+        (compile_sensor_parser(description), payload)
+        for description, payload in messages
+    ]
+    legacy_s = timeit(
+        lambda: [
+            value_fn(payload.decode("utf-8"))
+            for _ in range(loops)
+            for value_fn, payload in legacy
+        ]
+    )
+    compiled_s = timeit(
+        lambda: [parser(payload) for _ in range(loops) for parser, payload in compiled]
+    )
+    count = loops * len(messages)
+    report(
+        "decode",
+        [
+            {
+                "mode": "decode_value_fn",
+                "sensors": len(messages),
+                "ns_per_message": round(legacy_s / count * 1e9),
+            },
+            {
+                "mode": "bytes_parser",
+                "sensors": len(messages),
+                "ns_per_message": round(compiled_s / count * 1e9),
+            },
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
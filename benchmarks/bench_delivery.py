@@ -0,0 +1,145 @@
+"""Packets and acks per delivery policy, measured at a local mosquitto broker.
+
+A simulated openWB with two charge points publishes its retained topics,
+then a client subscribes and the openWB publishes CYCLES control cycles.
+Telemetry, counters and diagnostics are published in every cycle, the
+config echoes below config/get only once, as openWB does if no setting
+changes. The simulated openWB publishes at QoS 1, as a bridge with QoS 1
+does; the broker delivers at the lower QoS of publisher and subscription.
+
+Compared are one wildcard subscription of the MQTT root at QoS 1 and the
+subscriptions of the delivery policy. Reported per policy: PUBLISH packets received by the
+subscriber, PUBACK packets it sent, retained messages and the retained
+messages that the topic router passes on as no live samples.
+
+Needs an MQTT broker without authentication on BROKER_HOST:BROKER_PORT,
+for example `mosquitto -p 1883` or amqtt.
+"""
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+
+import paho.mqtt.client as paho
+
+from custom_components.openwbmqtt.const import DELIVERY_CONFIG_ECHO
+from custom_components.openwbmqtt.delivery import delivery_class, retained_is_live
+from custom_components.openwbmqtt.hub import subscription_filters
+
+from .common import catalog_topics, report
+
+BROKER_HOST = "localhost"
+BROKER_PORT = 1883
+CHARGE_POINTS = 2
+CYCLES = 30
+PUBLISH_QOS = 1
+# Time without messages after which the subscriber has received everything.
+QUIET = 1.0
+
+
+class PacketCounter:
+    """Subscriber that counts the MQTT packets of its subscriptions."""
+
+    def __init__(self, root: str) -> None:
+        """Initialize the counters."""
+        self.root = root
+        self.publishes = 0
+        self.pubacks = 0
+        self.retained = 0
+        self.retainedReplayed = 0
+        self.lastPacket = time.monotonic()
+        self.subscribed = threading.Event()
+        self.client = paho.Client(client_id=f"bench-{uuid.uuid4().hex[:8]}")
+        self.client.on_log = self._on_log
+        self.client.on_message = self._on_message
+        self.client.on_subscribe = lambda *args: self.subscribed.set()
+
+    def _on_log(self, client, userdata, level: int, buf: str) -> None:
+        """Count the packets from the debug log of paho."""
+        if buf.startswith("Received PUBLISH"):
+            self.publishes += 1
+            self.lastPacket = time.monotonic()
+        elif buf.startswith("Sending PUBACK"):
+            self.pubacks += 1
+
+    def _on_message(self, client, userdata, message: paho.MQTTMessage) -> None:
+        """Count the retained messages and those that are no live samples."""
+        if message.retain:
+            self.retained += 1
+            if not retained_is_live(message.topic[len(self.root) + 1 :]):
+                self.retainedReplayed += 1
+
+    def subscribe(self, filters: dict[str, int]) -> None:
+        """Connect and subscribe to the topic filters with their QoS."""
+        self.client.connect(BROKER_HOST, BROKER_PORT)
+        self.client.loop_start()
+        self.client.subscribe(list(filters.items()))
+        self.subscribed.wait(10)
+
+    def wait_quiet(self) -> None:
+        """Wait until no packet arrived for QUIET seconds and disconnect."""
+        while time.monotonic() - self.lastPacket < QUIET:
+            time.sleep(0.1)
+        self.client.disconnect()
+        self.client.loop_stop()
+
+
+def publish(client: paho.Client, topics: list[str]) -> None:
+    """Publish one retained message per topic and wait for the acks."""
+    infos = [
+        client.publish(topic, str(index), PUBLISH_QOS, retain=True)
+        for index, topic in enumerate(topics)
+    ]
+    for info in infos:
+        info.wait_for_publish()
+
+
+def run(policy: str, filters_for) -> dict:
+    """Publish the topics of a fresh MQTT root to a subscriber of the policy."""
+    root = f"bench/{uuid.uuid4().hex[:8]}/openWB"
+    topics = [topic for _, topic in catalog_topics(CHARGE_POINTS, root)]
+    echoes = [
+        topic
+        for topic in topics
+        if delivery_class(topic[len(root) + 1 :]) == DELIVERY_CONFIG_ECHO
+        and "/config/get/" in topic
+    ]
+    cyclic = [topic for topic in topics if topic not in echoes]
+    openWB = paho.Client(client_id=f"openwb-{uuid.uuid4().hex[:8]}")
+    openWB.connect(BROKER_HOST, BROKER_PORT)
+    openWB.loop_start()
+    publish(openWB, topics)
+    counter = PacketCounter(root)
+    counter.subscribe(filters_for(root))
+    for _ in range(CYCLES):
+        publish(openWB, cyclic)
+    counter.wait_quiet()
+    # Remove the retained messages of the run.
+    for topic in topics:
+        openWB.publish(topic, b"", PUBLISH_QOS, retain=True).wait_for_publish()
+    openWB.disconnect()
+    openWB.loop_stop()
+    return {
+        "policy": policy,
+        "topics": len(topics),
+        "publish_packets": counter.publishes,
+        "puback_packets": counter.pubacks,
+        "retained": counter.retained,
+        "retained_replayed": counter.retainedReplayed,
+    }
+
+
+def main() -> None:
+    """Run the benchmark."""
+    report(
+        "delivery",
+        [
+            run("qos1_wildcard", lambda root: {f"{root}/#": 1}),
+            run("delivery_policy", lambda root: subscription_filters([root])),
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
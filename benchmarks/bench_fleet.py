@@ -0,0 +1,106 @@
+"""Cost of a message for fleets of 1 to 50 openWB devices.
+
+Each openWB is a config entry with its own topic router and one charge point.
+Compared are one wildcard subscription per config entry, as before the hub,
+and the subscriptions of the hub, which routes the messages by the prefix
+index of the MQTT roots. Two layouts of the MQTT roots are measured: all
+devices below a common prefix (fleet/openWB1, fleet/openWB2, ...), which the
+hub covers with one set of subscriptions of the delivery policy, and
+separate roots (openWB1, openWB2, ...), which need subscriptions per device
+in both modes.
+"""
+from __future__ import annotations
+
+import random
+
+from custom_components.openwbmqtt.hub import OpenWBHub, subscription_filters
+from custom_components.openwbmqtt.router import OpenWBTopicRouter
+
+from .common import FakeMqttClient, catalog_topics, report, timeit
+
+PARSERS = {
+    "sensor": None,
+    "binary_sensor": int,
+    "switch": int,
+    "number": float,
+    "select": None,
+}
+MESSAGES = 20000
+
+
+def handler(value) -> None:
+    """Stand in for the state update of an entity."""
+
+
+def create_routers(roots: list[str]) -> list[tuple[OpenWBTopicRouter, list]]:
+    """Return a router with registered entities and the topics per MQTT root."""
+    routers = []
+    for root in roots:
+        router = OpenWBTopicRouter(None, root)
+        topics = catalog_topics(1, root)
+        for platform, topic in topics:
+            router.async_register(topic, handler, PARSERS[platform])
+        routers.append((router, [topic for _, topic in topics]))
+    return routers
+
+
+def setup_per_entry(routers) -> FakeMqttClient:
+    """Subscribe the MQTT root of every config entry on its own."""
+    client = FakeMqttClient()
+    for router, _ in routers:
+        client.subscribe(f"{router.mqtt_root}/#", router.async_handle_message, None)
+    return client
+
+
+def setup_hub(routers) -> FakeMqttClient:
+    """Subscribe the topic filters of the hub."""
+    client = FakeMqttClient()
+    hub = OpenWBHub(None)
+    for index, (router, _) in enumerate(routers):
+        hub.async_add_router(str(index), router)
+        # Index the router without subscribing via the MQTT integration.
+        hub._rootIndex[router.mqtt_root] = router  # pylint: disable=protected-access
+    for topicFilter in subscription_filters(
+        [router.mqtt_root for router, _ in routers]
+    ):
+        client.subscribe(topicFilter, hub.async_handle_message, None)
+    return client
+
+
+def main() -> None:
+    """Run the benchmark."""
+    random.seed(0)
+    results = []
+    for layout, prefix in (("common_prefix", "fleet/"), ("separate_roots", "")):
+        for devices in (1, 5, 10, 25, 50):
+            routers = create_routers(
+                [f"{prefix}openWB{index}" for index in range(1, devices + 1)]
+            )
+            messages = []
+            for _ in range(MESSAGES):
+                _, topics = random.choice(routers)
+                messages.append((random.choice(topics), b"1"))
+            for mode, setup in (("per_entry", setup_per_entry), ("hub", setup_hub)):
+                client = setup(routers)
+                dispatch_s = timeit(
+                    lambda client=client: [
+                        client.receive(*message) for message in messages
+                    ],
+                    repeat=10,
+                )
+                results.append(
+                    {
+                        "layout": layout,
+                        "mode": mode,
+                        "devices": devices,
+                        "subscriptions": client.subscriptions,
+                        "dispatch_ns_per_message": round(
+                            dispatch_s / len(messages) * 1e9, 1
+                        ),
+                    }
+                )
+    report("fleet", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Throughput of the MQTT message handlers of all platforms.
+
+The entities of one openWB with two charge points are registered at a topic
+router with a lightweight fake hass. Realistic payloads for the topics of
+const.py (watts, energy counters, TimeRemaining and uptime strings, valueMap
+enums, booleans, setpoints) are fed through the router, so every message
+passes parser, handler and the check for changed states.
+
+Reported per platform: messages per second, p50/p99 latency of a single
+message and the peak memory allocated while handling a message (measured
+with tracemalloc, so in a separate pass). IP address and version are not
+fed, their handlers write to the device registry.
+"""
+from __future__ import annotations
+
+import asyncio
+from collections import defaultdict
+import random
+import time
+import tracemalloc
+
+from custom_components.openwbmqtt.parsers import KEY_IP_ADDRESS, KEY_VERSION
+
+from .common import (
+    FakeConfigEntry,
+    FakeHass,
+    FakeMessage,
+    async_add_entities_to_fake_hass,
+    async_setup_platforms,
+    payload_candidates,
+    report,
+)
+
+CHARGE_POINTS = 2
+MESSAGES = 20000
+
+
+async def async_prepare():
+    """Set up the entities and return the router and the payloads per platform."""
+    hass = FakeHass()
+    entry = FakeConfigEntry("openWB", CHARGE_POINTS)
+    entities = [
+        entity
+        for entity in await async_setup_platforms(hass, entry)
+        if getattr(entity, "topics", None) is not None
+        and entity.entity_description.key not in (KEY_IP_ADDRESS, KEY_VERSION)
+    ]
+    router = await async_add_entities_to_fake_hass(hass, entry, entities)
+
+    messages = defaultdict(list)
+    topics = defaultdict(list)
+    for entity in entities:
+        topics[entity.entity_id.split(".")[0]].append(
+            (entity.topics.currentValue, payload_candidates(entity))
+        )
+    for platform, candidates in topics.items():
+        for _ in range(MESSAGES):
+            topic, payloads = random.choice(candidates)
+            messages[platform].append(FakeMessage(topic, random.choice(payloads)))
+    return router, entities, messages
+
+
+def main() -> None:
+    """Run the benchmark."""
+    random.seed(0)
+    router, entities, messages = asyncio.run(async_prepare())
+    receive = router.async_handle_message
+
+    results = []
+    for platform, platformMessages in sorted(messages.items()):
+        writesBefore = sum(e.stateWrites for e in entities)
+        latencies = []
+        for message in platformMessages:
+            start = time.perf_counter_ns()
+            receive(message)
+            latencies.append(time.perf_counter_ns() - start)
+        latencies.sort()
+        writes = sum(e.stateWrites for e in entities) - writesBefore
+
+        tracemalloc.start()
+        allocated = 0
+        for message in platformMessages[:2000]:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            receive(message)
+            allocated += tracemalloc.get_traced_memory()[1] - before
+        tracemalloc.stop()
+
+        results.append(
+            {
+                "platform": platform,
+                "messages": len(platformMessages),
+                "messages_per_s": round(len(platformMessages) / sum(latencies) * 1e9),
+                "p50_us": round(latencies[len(latencies) // 2] / 1000, 2),
+                "p99_us": round(latencies[int(len(latencies) * 0.99)] / 1000, 2),
+                "peak_alloc_bytes_per_message": round(allocated / 2000),
+                "state_writes": writes,
+            }
+        )
+    report("handlers", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""Accuracy and cost of the energy of a charge point integrated from its power.
+
+A charge point charges for one hour with a power that ramps up, holds and
+changes in steps, as the PV surplus changes. openWB publishes the power
+every 10 seconds. Compared are the integrator of integrator.py, which
+integrates every message on the receive timestamp and writes its sensor
+once per minute, and a model of the Riemann sum integration helper of HA
+with the trapezoidal method. The helper integrates the state changes of
+the power sensor in Decimal and writes its sensor twice per state change.
+Repeated payloads do not change the state of the power sensor, so the
+helper interpolates over the whole time the power was held. The state
+machine and the event bus of HA are not part of the model, so the cost of
+the helper is a lower bound.
+
+Reported per mode: error against the exact energy of the power curve, ns
+per message and state writes per hour.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from decimal import Decimal
+import time
+from types import SimpleNamespace
+
+from custom_components.openwbmqtt.integrator import OpenWBEnergyIntegrator
+from custom_components.openwbmqtt.router import OpenWBTopicRouter
+
+from .common import report
+
+SECONDS = 3600
+PUBLISH_INTERVAL = 10
+WRITE_INTERVAL = 60
+TOPIC = "openWB/lp/1/W"
+
+
+@dataclass(frozen=True)
+class TimedMessage:
+    """MQTT message with the receive timestamp of the HA MQTT client."""
+
+    topic: str
+    payload: str
+    timestamp: datetime
+    qos: int = 0
+    retain: bool = False
+
+
+def power(second: float) -> float:
+    """Return the charging power in W, ramps and steps of the PV surplus."""
+    if second < 300:
+        return 0.0
+    if second < 420:
+        return (second - 300) / 120 * 11000
+    if second < 1800:
+        return 11000.0
+    if second < 2700:
+        return 7400.0
+    if second < 3000:
+        return 4200.0
+    return 0.0
+
+
+def exact_energy() -> float:
+    """Return the energy of the power curve in kWh."""
+    return sum(power(second + 0.5) for second in range(SECONDS)) / 3.6e6
+
+
+def messages() -> list[TimedMessage]:
+    """Return the messages of openWB, the power is published in whole W."""
+    start = datetime(2024, 6, 1, 10, tzinfo=UTC)
+    return [
+        TimedMessage(
+            TOPIC, str(round(power(second))), start + timedelta(seconds=second)
+        )
+        for second in range(0, SECONDS + 1, PUBLISH_INTERVAL)
+    ]
+
+
+def run_integrator(feed: list[TimedMessage]) -> dict:
+    """Route the messages to the integrator."""
+    hass = SimpleNamespace(loop=None)
+    router = OpenWBTopicRouter(hass, "openWB")
+    integrator = OpenWBEnergyIntegrator(hass, router, "entry", WRITE_INTERVAL)
+    # The receive times are those of the simulated messages.
+    router.clock = lambda: router.message.timestamp.timestamp()
+    # The energies are saved in the background, not part of the benchmark.
+    integrator._dirty = True
+    integrator.energies["lp/1/W"] = [0.0, 0.0]
+    router.async_register(
+        TOPIC, lambda value: integrator._async_power("lp/1/W", value), float
+    )
+    start = time.perf_counter_ns()
+    for message in feed:
+        router.async_handle_message(message)
+    elapsed = time.perf_counter_ns() - start
+    return {
+        "energy_kwh": round(integrator.energies["lp/1/W"][0], 4),
+        "ns_per_message": round(elapsed / len(feed)),
+        "writes_per_hour": SECONDS // WRITE_INTERVAL,
+    }
+
+
+def run_riemann(feed: list[TimedMessage]) -> dict:
+    """Integrate the state changes like the Riemann sum integration helper."""
+    router = OpenWBTopicRouter(SimpleNamespace(loop=None), "openWB")
+    last: tuple[str, datetime] | None = None
+    energy = Decimal(0)
+    writes = 0
+
+    def state_changed(value: float) -> None:
+        nonlocal last, energy, writes
+        state = str(value)
+        if last is not None and last[0] == state:
+            return
+        now = router.message.timestamp
+        if last is not None:
+            elapsed = (now - last[1]).total_seconds()
+            area = (Decimal(state) + Decimal(last[0])) * Decimal(elapsed) / 2
+            energy += area / Decimal(3600000)
+            writes += 2
+        last = (state, now)
+
+    router.async_register(TOPIC, state_changed, float)
+    start = time.perf_counter_ns()
+    for message in feed:
+        router.async_handle_message(message)
+    elapsed = time.perf_counter_ns() - start
+    return {
+        "energy_kwh": round(float(energy), 4),
+        "ns_per_message": round(elapsed / len(feed)),
+        "writes_per_hour": writes,
+    }
+
+
+def main() -> None:
+    """Run the benchmark."""
+    exact = exact_energy()
+    feed = messages()
+    results = []
+    for mode, run in (("integrator", run_integrator), ("riemann", run_riemann)):
+        result = run(feed)
+        result["error_percent"] = round(100 * (result["energy_kwh"] - exact) / exact, 2)
+        results.append({"mode": mode, "exact_kwh": round(exact, 4)} | result)
+    report("integrator", results)
+
+
+if __name__ == "__main__":
+    main()
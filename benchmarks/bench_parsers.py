@@ -0,0 +1,130 @@
+"""Messages per second of the sensor payload parsers, per sensor type.
+
+Compares the compiled parser chains with the substring checks that were
+evaluated on every message before. State writes are not part of the
+measurement.
+"""
+from __future__ import annotations
+
+from datetime import timedelta
+import re
+
+from homeassistant.util import dt as dt_util
+
+from custom_components.openwbmqtt.const import SENSORS_GLOBAL, SENSORS_PER_LP
+from custom_components.openwbmqtt.parsers import (
+    KEY_COUNT_PHASES,
+    PHASES_ICONS,
+    compile_sensor_parser,
+)
+
+from .common import report, timeit
+
+# (sensor type, description key, entity id, payload)
+CASES = [
+    ("numeric", "W", "sensor.openwb_cp1_ladeleistung", "3680"),
+    (
+        "value_fn",
+        "kWhCounter",
+        "sensor.openwb_cp1_geladene_energie_gesamt",
+        "1234.5678",
+    ),
+    (
+        "time_remaining",
+        "TimeRemaining",
+        "sensor.openwb_cp1_voraus_ladeende",
+        "1 H 20 Min",
+    ),
+    (
+        "uptime",
+        "system/Uptime",
+        "sensor.openwb_uptime",
+        " 12:33:01 up 3 days, 19:02,  0 users,  load average: 1.32, 1.47, 1.45",
+    ),
+    ("count_phases", "countPhasesInUse", "sensor.openwb_cp1_aktive_phasen", "3"),
+]
+
+
+# value_fn of the descriptions before the numeric payloads were parsed by
+# compiled parsers.
+LEGACY_VALUE_FNS = {"kWhCounter": lambda x: round(float(x), 2)}
+
+
+def legacy_handler(description, entity_id: str, payload: str):
+    """Payload handling of openwbSensor before the parsers were compiled."""
+    value = payload
+    value_fn = LEGACY_VALUE_FNS.get(description.key, description.value_fn)
+    if value_fn is not None:
+        value = value_fn(value)
+    if description.valueMap is not None:
+        try:
+            value = description.valueMap.get(int(value))
+        except ValueError:
+            pass
+    if "TimeRemaining" in description.key:
+        now = dt_util.utcnow()
+        if "H" in value:
+            tmp = value.split()
+            value = now + timedelta(hours=int(tmp[0]), minutes=int(tmp[2]))
+        elif "Min" in value:
+            tmp = value.split()
+            value = now + timedelta(minutes=int(tmp[0]))
+        else:
+            value = None
+    if "uptime" in entity_id:
+        reluptime = re.match(r".*\sup\s(.*),.*\d*user.*", value)[1]
+        days = 0
+        if re.match(r"(\d*)\sday.*", reluptime):
+            days = re.match(r"(\d*)\sday", reluptime)[1]
+            reluptime = re.match(r".*,\s(.*)", reluptime)[1]
+        if re.match(".*min", reluptime):
+            hours = 0
+            mins = re.match(r"(\d*)\s*min", reluptime)[1]
+        else:
+            hours, mins = re.match(r"\s?(\d*):0?(\d*)", reluptime).group(1, 2)
+        value = f"{days} d {hours} h {mins} min"
+    elif "ip_adresse" in entity_id:
+        pass
+    elif "version" in entity_id:
+        pass
+    elif "countPhasesInUse" in description.key:
+        int(payload)
+    return value
+
+
+def main() -> None:
+    """Run the benchmark."""
+    descriptions = {d.key: d for d in SENSORS_GLOBAL + SENSORS_PER_LP}
+    loops = 20000
+    results = []
+    for sensor_type, key, entity_id, payload in CASES:
+        description = descriptions[key]
+        parser = compile_sensor_parser(description)
+        legacy_s = timeit(
+            lambda: [
+                legacy_handler(description, entity_id, payload) for _ in range(loops)
+            ]
+        )
+        if key == KEY_COUNT_PHASES:
+            # The icon lookup of the special handler.
+            compiled_s = timeit(
+                lambda: [PHASES_ICONS.get(payload) for _ in range(loops)]
+            )
+        elif parser is None:
+            # The router passes the payload on without calling a parser.
+            compiled_s = timeit(lambda: [payload for _ in range(loops)])
+        else:
+            compiled_s = timeit(lambda: [parser(payload) for _ in range(loops)])
+        results.append(
+            {
+                "sensor_type": sensor_type,
+                "key": key,
+                "legacy_msgs_per_s": round(loops / legacy_s),
+                "compiled_msgs_per_s": round(loops / compiled_s),
+            }
+        )
+    report("parsers", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Cost of the power flow sensors per control cycle.
+
+In every control cycle openWB publishes new values of pv/W, evu/W,
+housebattery/W, global/WAllChargePoints and lp/N/W. Compared are template
+sensors for PV -> house, PV -> charge points, grid -> charge points,
+battery -> charge points and self-sufficiency, rendered with the sandboxed
+Jinja environment that HA uses whenever one of their inputs changes, and the
+power flow engine of powerflow.py, which stores the inputs and computes all
+flows once per cycle. The templates are rendered without the state machine
+and the template entities of HA, so their cost is a lower bound.
+
+Reported per mode: renders or computations per cycle and us per cycle.
+"""
+from __future__ import annotations
+
+import random
+import time
+from types import SimpleNamespace
+
+from jinja2.sandbox import ImmutableSandboxedEnvironment
+
+from custom_components.openwbmqtt.powerflow import OpenWBPowerFlow
+
+from .common import report
+
+CYCLES = 2000
+CHARGE_POINTS = 2
+
+# Template sensors as they are found in HA configurations, with the same
+# allocation as powerflow.py.
+_SOURCES = """
+{%- set pv = [0, -(states('pv') | float(0))] | max -%}
+{%- set grid = states('evu') | float(0) -%}
+{%- set bat = states('bat') | float(0) -%}
+{%- set ev = [0, states('ev') | float(0)] | max -%}
+{%- set house = [0, pv + grid - bat - ev] | max -%}
+{%- set toGrid = [pv, [0, -grid] | max] | min -%}
+{%- set batToGrid = [[0, -bat] | max, [0, -grid] | max - toGrid] | min -%}
+{%- set toBat = [pv - toGrid, [0, bat] | max] | min -%}
+{%- set pvLeft = pv - toGrid - toBat -%}
+{%- set gridLeft = [0, grid] | max - [[0, grid] | max, [0, bat] | max - toBat] | min -%}
+{%- set batLeft = [0, -bat] | max - batToGrid -%}
+{%- set pool = pvLeft + gridLeft + batLeft -%}
+"""
+TEMPLATES = {
+    "pvToHouse": (
+        _SOURCES + "{{ (pvLeft / pool * house) | round(1) if pool > 0 else 0 }}",
+        ("pv", "evu", "bat", "ev"),
+    ),
+    "pvToChargePoints": (
+        _SOURCES + "{{ (pvLeft / pool * ev) | round(1) if pool > 0 else 0 }}",
+        ("pv", "evu", "bat", "ev"),
+    ),
+    "gridToChargePoints": (
+        _SOURCES + "{{ (gridLeft / pool * ev) | round(1) if pool > 0 else 0 }}",
+        ("pv", "evu", "bat", "ev"),
+    ),
+    "batteryToChargePoints": (
+        _SOURCES + "{{ (batLeft / pool * ev) | round(1) if pool > 0 else 0 }}",
+        ("pv", "evu", "bat", "ev"),
+    ),
+    "selfSufficiency": (
+        _SOURCES
+        + "{{ (100 * (1 - gridLeft / pool)) | round(1) if pool > 0 else none }}",
+        ("pv", "evu", "bat", "ev"),
+    ),
+}
+TEMPLATES.update(
+    {
+        f"pvToChargePoint{chargePoint}": (
+            _SOURCES
+            + f"{{{{ ((states('lp{chargePoint}') | float(0)) * pvLeft / pool) | round(0)"
+            " if pool > 0 else 0 }}",
+            ("pv", "evu", "bat", "ev", f"lp{chargePoint}"),
+        )
+        for chargePoint in range(1, CHARGE_POINTS + 1)
+    }
+)
+
+
+def cycles() -> list[dict[str, float]]:
+    """Return the published power values of the control cycles."""
+    result = []
+    for _ in range(CYCLES):
+        pv = -random.uniform(0, 9000)
+        lps = [
+            random.choice((0, random.uniform(1400, 11000)))
+            for _ in range(CHARGE_POINTS)
+        ]
+        bat = random.uniform(-3000, 3000)
+        house = random.uniform(200, 3000)
+        values = {
+            "pv": round(pv),
+            "bat": round(bat),
+            "ev": round(sum(lps)),
+            "evu": round(house + sum(lps) + bat + pv),
+        }
+        values.update({f"lp{n}": round(w) for n, w in enumerate(lps, start=1)})
+        result.append(values)
+    return result
+
+
+def run_templates(values: list[dict[str, float]]) -> dict:
+    """Render every template whose input changed."""
+    env = ImmutableSandboxedEnvironment()
+    state: dict[str, str] = {}
+    env.globals["states"] = lambda entity: state.get(entity, "unknown")
+    compiled = [
+        (env.from_string(source), inputs) for source, inputs in TEMPLATES.values()
+    ]
+    renders = 0
+    start = time.perf_counter_ns()
+    for cycle in values:
+        for entity, value in cycle.items():
+            state[entity] = str(value)
+            for template, inputs in compiled:
+                if entity in inputs:
+                    template.render()
+                    renders += 1
+    elapsed = time.perf_counter_ns() - start
+    return {
+        "per_cycle": round(renders / len(values), 1),
+        "us_per_cycle": round(elapsed / len(values) / 1000, 2),
+    }
+
+
+def run_engine(values: list[dict[str, float]]) -> dict:
+    """Feed the inputs to the engine and compute the flows once per cycle."""
+    engine = OpenWBPowerFlow(SimpleNamespace(loop=None), None, CHARGE_POINTS)
+    # The engine schedules the computation, here it runs at the end of the cycle.
+    engine._scheduled = True
+    indexes = {"pv": 0, "evu": 1, "bat": 2, "ev": 3}
+    indexes.update({f"lp{n}": 3 + n for n in range(1, CHARGE_POINTS + 1)})
+    start = time.perf_counter_ns()
+    for cycle in values:
+        for entity, value in cycle.items():
+            engine._async_input(indexes[entity], float(value))
+        engine._async_compute()
+        engine._scheduled = True
+    elapsed = time.perf_counter_ns() - start
+    return {
+        "per_cycle": round(engine.computations / len(values), 1),
+        "us_per_cycle": round(elapsed / len(values) / 1000, 2),
+    }
+
+
+def main() -> None:
+    """Run the benchmark."""
+    random.seed(0)
+    values = cycles()
+    report(
+        "powerflow",
+        [
+            {"mode": "templates"} | run_templates(values),
+            {"mode": "engine"} | run_engine(values),
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Cost of the rolling statistics of the power topics.
+
+pv/W, evu/W and lp/N/W of 16 charge points are published once per second
+for 20 minutes. For each topic, minimum, maximum and mean over 1, 5 and 15
+minutes are kept. Compared are the ring buffer of rolling.py, shared by the
+nine statistics of a topic, and the statistics helper of HA, where each of
+the nine sensors keeps its own buffer of the samples within its window and
+computes its statistic over the whole buffer with every sample.
+
+Reported per mode: ns per message (all nine statistics of the topic), the
+slowest message and the memory held by the statistics of all topics.
+"""
+from __future__ import annotations
+
+from collections import deque
+import random
+import statistics
+import time
+import tracemalloc
+
+from custom_components.openwbmqtt.const import ROLLING_WINDOWS
+from custom_components.openwbmqtt.rolling import OpenWBRollingStatistics
+
+from .common import report
+
+CHARGE_POINTS = 16
+SECONDS = 1200
+
+
+class RescanStatistics:
+    """Model of nine statistics sensors of HA for one topic."""
+
+    def __init__(self) -> None:
+        """Initialize one buffer per sensor."""
+        self.buffers = [
+            (length, function, deque())
+            for length in ROLLING_WINDOWS
+            for function in (min, max, statistics.mean)
+        ]
+        self.values: list[float] = []
+
+    def add(self, now: float, value: float) -> None:
+        """Add the sample to each buffer, purge old samples and compute."""
+        self.values = []
+        for length, function, buffer in self.buffers:
+            buffer.append((now, value))
+            while buffer[0][0] <= now - length:
+                buffer.popleft()
+            self.values.append(function(sample for _, sample in buffer))
+
+
+def run(factory, trace: bool = False) -> dict:
+    """Feed the messages to the statistics of all topics.
+
+    The memory is measured in a separate run, tracing the allocations slows
+    down the statistics.
+    """
+    random.seed(0)
+    if trace:
+        tracemalloc.start()
+    topics = [factory() for _ in range(CHARGE_POINTS + 2)]
+    powers = [random.uniform(0, 11000) for _ in topics]
+    elapsed = 0
+    slowest = 0
+    for second in range(SECONDS):
+        for index, topic in enumerate(topics):
+            powers[index] = max(0.0, powers[index] + random.uniform(-500, 500))
+            start = time.perf_counter_ns()
+            topic.add(float(second), powers[index])
+            duration = time.perf_counter_ns() - start
+            elapsed += duration
+            slowest = max(slowest, duration)
+    if trace:
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return {"memory_kib": round(memory / 1024)}
+    return {
+        "ns_per_message": round(elapsed / SECONDS / len(topics)),
+        "max_us": round(slowest / 1000, 1),
+    }
+
+
+def main() -> None:
+    """Run the benchmark."""
+    results = []
+    for mode, factory in (
+        ("ring_buffer", OpenWBRollingStatistics),
+        ("rescan", RescanStatistics),
+    ):
+        results.append(
+            {"mode": mode, "topics": CHARGE_POINTS + 2}
+            | run(factory)
+            | run(factory, trace=True)
+        )
+    report("rolling", results)
+
+
+if __name__ == "__main__":
+    main()
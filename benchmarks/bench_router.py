@@ -0,0 +1,83 @@
+"""Compare per-entity subscriptions with the wildcard subscription and topic router.
+
+Reports the setup time, the number of broker subscriptions and the cost of
+dispatching one message to the entities, for 1 and 8 charge points.
+"""
+from __future__ import annotations
+
+from custom_components.openwbmqtt.router import OpenWBTopicRouter
+
+from .common import MQTT_ROOT, FakeMqttClient, catalog_topics, report, timeit
+
+PARSERS = {
+    "sensor": None,
+    "binary_sensor": int,
+    "switch": int,
+    "number": float,
+    "select": None,
+}
+
+
+def handler(value) -> None:
+    """Stand in for the state update of an entity."""
+
+
+def setup_per_entity(topics: list[tuple[str, str]]) -> FakeMqttClient:
+    """Subscribe every entity on its own, as before the topic router."""
+    client = FakeMqttClient()
+    for platform, topic in topics:
+        parser = PARSERS[platform]
+
+        def message_received(message, parser=parser) -> None:
+            handler(message.payload if parser is None else parser(message.payload))
+
+        client.subscribe(topic, message_received)
+    return client
+
+
+def setup_router(topics: list[tuple[str, str]]) -> FakeMqttClient:
+    """Register every entity at the topic router of one wildcard subscription."""
+    client = FakeMqttClient()
+    router = OpenWBTopicRouter(None, MQTT_ROOT)
+    for platform, topic in topics:
+        router.async_register(topic, handler, PARSERS[platform])
+    client.subscribe(f"{MQTT_ROOT}/#", router.async_handle_message, None)
+    return client
+
+
+def main() -> None:
+    """Run the benchmark."""
+    results = []
+    for n_charge_points in (1, 8):
+        topics = catalog_topics(n_charge_points)
+        messages = [(topic, b"1") for _, topic in topics]
+        # openWB also publishes topics that no entity reads.
+        messages += [(f"{MQTT_ROOT}/graph/{i}", b"1") for i in range(20)]
+        for mode, setup in (("per_entity", setup_per_entity), ("router", setup_router)):
+            client = setup(topics)
+            setup_s = timeit(lambda setup=setup: setup(topics))
+            loops = 200
+            dispatch_s = timeit(
+                lambda client=client: [
+                    client.receive(*message)
+                    for _ in range(loops)
+                    for message in messages
+                ]
+            )
+            results.append(
+                {
+                    "mode": mode,
+                    "charge_points": n_charge_points,
+                    "entities": len(topics),
+                    "subscriptions": client.subscriptions,
+                    "setup_us": round(setup_s * 1e6, 1),
+                    "dispatch_ns_per_message": round(
+                        dispatch_s / (loops * len(messages)) * 1e9, 1
+                    ),
+                }
+            )
+    report("router", results)
+
+
+if __name__ == "__main__":
+    main()
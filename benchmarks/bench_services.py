@@ -0,0 +1,175 @@
+"""Latency and throughput of the service calls.
+
+A controller changes the charging current of one charge point, for example
+1000 times per minute. Compared are the sync service handlers as before,
+which HA runs in the executor thread pool and which build the topics with
+f-strings and publish through a thread safe hop back to the event loop, and
+the callback handlers of services.py, which run in the event loop, resolve
+the topics from the table built at setup and publish through the command
+coalescer. The MQTT client is not part of the model, a publish is counted
+once it reaches the event loop.
+
+Reported per mode: p50/p99 latency of one awaited service call, calls per
+second of 1000 calls issued at once, and the publishes of a controller whose
+setpoints openWB echoes on the get topic. A service call is an explicit
+request, so both modes publish every setpoint, repeated ones included.
+"""
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import random
+import time
+from types import SimpleNamespace
+from typing import Any
+
+from custom_components.openwbmqtt.commands import OpenWBCommandCoalescer
+from custom_components.openwbmqtt.const import DOMAIN
+from custom_components.openwbmqtt.hub import OpenWBHub
+from custom_components.openwbmqtt.latency import OpenWBCommandLatency
+from custom_components.openwbmqtt.profiles import command_topics
+from custom_components.openwbmqtt.router import OpenWBTopicRouter
+from custom_components.openwbmqtt.services import async_register_services
+
+from .common import FakeMessage, report
+
+CALLS = 1000
+CHARGE_POINTS = 2
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class FakeServiceHass:
+    """Fake hass with an event loop, a service registry and a counting publish."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Initialize the instance."""
+        self.loop = loop
+        self.data: dict[str, Any] = {}
+        self.handlers: dict[str, Any] = {}
+        self.services = SimpleNamespace(async_register=self._register)
+        self.publishes = 0
+
+    def _register(self, domain, service, handler, **kwargs) -> None:
+        """Remember the handler of a service."""
+        self.handlers[service] = handler
+
+    def count_publish(self) -> None:
+        """Count a publish that reached the event loop."""
+        self.publishes += 1
+
+    def async_create_task(self, coro) -> None:
+        """Count the publish of the command coalescer instead of running it."""
+        coro.close()
+        self.count_publish()
+
+
+def legacy_change_charge_current_per_cp(hass: FakeServiceHass, call) -> None:
+    """Sync handler as before, the publish is scheduled in the event loop."""
+    topic = f"{call.data.get('mqtt_prefix')}/config/set/sofort/lp/{call.data.get('charge_point_id')}/current"
+    payload = str(call.data.get("target_current"))
+    _LOGGER.debug("topic: %s, payload: %s", topic, payload)
+    hass.loop.call_soon_threadsafe(hass.count_publish)
+
+
+def setpoints(n: int) -> list[int]:
+    """Return the setpoints of a controller, a random walk between 6 and 16 A."""
+    current = 10
+    result = []
+    for _ in range(n):
+        current = min(16, max(6, current + random.choice((-1, 0, 0, 1))))
+        result.append(current)
+    return result
+
+
+async def async_run() -> list[dict[str, Any]]:
+    """Measure both modes and return the results."""
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=8)
+    hass = FakeServiceHass(loop)
+    hub = hass.data[DOMAIN] = OpenWBHub(hass)
+    router = OpenWBTopicRouter(hass, "openWB")
+    router.latency = OpenWBCommandLatency(hass)
+    router.commands = OpenWBCommandCoalescer(hass, 0, router.latency)
+    router.commandTopics = command_topics("openWB", CHARGE_POINTS)
+    hub.async_add_router("entry", router)
+    async_register_services(hass, hub)
+    handler = hass.handlers["change_charge_current_per_cp"]
+
+    targets = setpoints(CALLS)
+    calls = [
+        SimpleNamespace(
+            data={
+                "mqtt_prefix": "openWB",
+                "config_entry_id": "entry",
+                "charge_point_id": 1,
+                "target_current": t,
+            }
+        )
+        for t in targets
+    ]
+
+    async def legacy(call) -> None:
+        await loop.run_in_executor(
+            executor, legacy_change_charge_current_per_cp, hass, call
+        )
+        await asyncio.sleep(0)
+
+    async def current(call) -> None:
+        handler(call)
+
+    results = []
+    for mode, service in (("executor", legacy), ("callback", current)):
+        # Each publish is echoed by openWB, so the latency tracker and the
+        # cached payloads see what they see in operation.
+        getTopic = "openWB/config/get/sofort/lp/1/current"
+        latencies = []
+        for call in calls:
+            start = time.perf_counter_ns()
+            await service(call)
+            latencies.append(time.perf_counter_ns() - start)
+            router.async_handle_message(
+                FakeMessage(getTopic, str(call.data["target_current"]))
+            )
+        latencies.sort()
+        router.latency.async_cancel()
+
+        hass.publishes = 0
+        for call in calls:
+            await service(call)
+            router.async_handle_message(
+                FakeMessage(getTopic, str(call.data["target_current"]))
+            )
+        await asyncio.sleep(0)
+        controllerPublishes = hass.publishes
+        router.latency.async_cancel()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(service(call) for call in calls))
+        await asyncio.sleep(0)
+        burst = time.perf_counter() - start
+        router.latency.async_cancel()
+
+        results.append(
+            {
+                "mode": mode,
+                "calls": CALLS,
+                "p50_us": round(latencies[len(latencies) // 2] / 1000, 2),
+                "p99_us": round(latencies[int(len(latencies) * 0.99)] / 1000, 2),
+                "calls_per_s": round(CALLS / burst),
+                "controller_publishes": controllerPublishes,
+            }
+        )
+    executor.shutdown()
+    return results
+
+
+def main() -> None:
+    """Run the benchmark."""
+    random.seed(0)
+    report("services", asyncio.run(async_run()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Range queries of the charge session log of sessions.py.
+
+Ten years of charge sessions of four charge points, two sessions per charge
+point and day, are appended to a session log. Compared are the queries of
+the log, which find the first session of the range by binary search on the
+file, a linear scan that decodes every record of the same file, and a JSON
+document of all sessions that is loaded and filtered, as a session list
+kept in the storage of Home Assistant would be.
+
+Reported per query and mode: µs per query and the sessions found. The size
+of the files and the time to open the log, which reads the index of the
+charge points, are reported once.
+"""
+from __future__ import annotations
+
+from dataclasses import asdict
+from functools import partial
+import json
+import os
+import random
+import tempfile
+import time
+
+from custom_components.openwbmqtt.sessions import (
+    SESSION_HEADER,
+    SESSION_RECORD,
+    OpenWBChargeSession,
+    OpenWBSessionLog,
+)
+
+from .common import report, timeit
+
+YEARS = 10
+CHARGE_POINTS = 4
+SESSIONS_PER_DAY = 2
+DAY = 86400
+START = 1.6e9
+
+
+def sessions() -> list[OpenWBChargeSession]:
+    """Return the sessions ordered by their end."""
+    rnd = random.Random(0)
+    result = []
+    for day in range(YEARS * 365):
+        for chargePoint in range(1, CHARGE_POINTS + 1):
+            for _ in range(SESSIONS_PER_DAY):
+                start = START + day * DAY + rnd.uniform(0, DAY)
+                result.append(
+                    OpenWBChargeSession(
+                        chargePoint,
+                        start,
+                        start + rnd.uniform(600, 10 * 3600),
+                        rnd.uniform(2, 40),
+                        rnd.uniform(3000, 11000),
+                        f"tag{rnd.randint(1, 8)}",
+                    )
+                )
+    result.sort(key=lambda session: session.end)
+    return result
+
+
+def scan(path: str, start: float, end: float, chargePoint: int | None) -> list:
+    """Decode every record of the log and filter the sessions."""
+    with open(path, "rb") as file:
+        data = file.read()[SESSION_HEADER.size :]
+    return [
+        record
+        for record in SESSION_RECORD.iter_unpack(data)
+        if record[1] <= end
+        and record[2] >= start
+        and (chargePoint is None or record[5] == chargePoint)
+    ]
+
+
+def load_json(path: str, start: float, end: float, chargePoint: int | None) -> list:
+    """Load the JSON document of all sessions and filter the sessions."""
+    with open(path, encoding="utf-8") as file:
+        data = json.load(file)
+    return [
+        session
+        for session in data["sessions"]
+        if session["start"] <= end
+        and session["end"] >= start
+        and (chargePoint is None or session["chargePoint"] == chargePoint)
+    ]
+
+
+def main() -> None:
+    """Run the benchmark."""
+    feed = sessions()
+    last = feed[-1].end
+    queries = {
+        "last_day": (last - DAY, last, None),
+        "last_month": (last - 30 * DAY, last, None),
+        "one_year_cp1": (last - 365 * DAY, last, 1),
+        "first_month_cp2": (START, START + 30 * DAY, 2),
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        logPath = os.path.join(directory, "sessions")
+        jsonPath = os.path.join(directory, "sessions.json")
+        log = OpenWBSessionLog(logPath)
+        log.open()
+        for index in range(0, len(feed), 100):
+            log.append(feed[index : index + 100])
+        with open(jsonPath, "w", encoding="utf-8") as file:
+            json.dump({"sessions": [asdict(session) for session in feed]}, file)
+        start = time.perf_counter()
+        OpenWBSessionLog(logPath).open()
+        openTime = time.perf_counter() - start
+        results = [
+            {
+                "sessions": len(feed),
+                "log_bytes": os.path.getsize(logPath),
+                "json_bytes": os.path.getsize(jsonPath),
+                "open_ms": round(openTime * 1000, 1),
+            }
+        ]
+        for name, (rangeStart, rangeEnd, chargePoint) in queries.items():
+            for mode, query in (
+                ("log", log.query),
+                ("scan", partial(scan, logPath)),
+                ("json", partial(load_json, jsonPath)),
+            ):
+                found = len(query(rangeStart, rangeEnd, chargePoint))
+                seconds = timeit(
+                    lambda: query(rangeStart, rangeEnd, chargePoint), repeat=5
+                )
+                results.append(
+                    {
+                        "query": name,
+                        "mode": mode,
+                        "found": found,
+                        "us_per_query": round(seconds * 1e6),
+                    }
+                )
+    report("sessions", results)
+
+
+if __name__ == "__main__":
+    main()
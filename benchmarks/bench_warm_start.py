@@ -0,0 +1,102 @@
+"""Time until the entities of an openWB show values after a restart.
+
+The entities of one openWB are set up with a lightweight fake hass, once
+without and once with the snapshot of the payloads of a previous run, which
+is taken after one full control cycle of live data. Measured are the setup
+time and the share of the entities that have a state right after the setup,
+before any message of the broker arrived.
+
+The time until the dashboard is populated is derived from that: with the
+snapshot it is the setup time. Without the snapshot, the entities wait for
+live data; for topics that are not retained this is one control cycle of
+openWB (CONTROL_CYCLE_S), which is a model and not measured.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import time
+
+from custom_components.openwbmqtt.parsers import KEY_IP_ADDRESS, KEY_VERSION
+
+from .common import (
+    FakeConfigEntry,
+    FakeHass,
+    FakeMessage,
+    async_add_entities_to_fake_hass,
+    async_setup_platforms,
+    payload_candidates,
+    report,
+)
+
+CONTROL_CYCLE_S = 10.0
+
+
+async def async_start(
+    n_charge_points: int, payloads: dict[str, str] | None
+) -> tuple[float, list, object]:
+    """Set up all entities and return setup time, entities and router."""
+    start = time.perf_counter()
+    hass = FakeHass()
+    entry = FakeConfigEntry("openWB", n_charge_points)
+    entities = await async_setup_platforms(hass, entry)
+    router = await async_add_entities_to_fake_hass(hass, entry, entities, payloads)
+    return time.perf_counter() - start, entities, router
+
+
+def live_entities(entities: list) -> list:
+    """Return the entities that receive MQTT messages.
+
+    IP address and version are left out, their handlers write to the device
+    registry, which the fake hass does not have.
+    """
+    return [
+        entity
+        for entity in entities
+        if entity.discoveryTopic is not None
+        and entity.entity_description.key not in (KEY_IP_ADDRESS, KEY_VERSION)
+    ]
+
+
+def main() -> None:
+    """Run the benchmark."""
+    random.seed(0)
+    results = []
+    for n_charge_points in (1, 8):
+        # Previous run: one control cycle of live data, then the snapshot.
+        _, entities, router = asyncio.run(async_start(n_charge_points, None))
+        for entity in live_entities(entities):
+            router.async_handle_message(
+                FakeMessage(
+                    entity.discoveryTopic, random.choice(payload_candidates(entity))
+                )
+            )
+        payloads = router.snapshot_payloads()
+        snapshotBytes = len(json.dumps({"payloads": payloads}))
+
+        for mode, snapshot in (("live_only", None), ("snapshot", payloads)):
+            setup_s, entities, _ = asyncio.run(async_start(n_charge_points, snapshot))
+            entities = live_entities(entities)
+            populated = sum(1 for entity in entities if entity.stateWrites)
+            results.append(
+                {
+                    "mode": mode,
+                    "charge_points": n_charge_points,
+                    "entities": len(entities),
+                    "populated_after_setup": populated,
+                    "setup_ms": round(setup_s * 1e3, 2),
+                    "time_to_populated_s": round(
+                        setup_s
+                        if populated == len(entities)
+                        else setup_s + CONTROL_CYCLE_S,
+                        3,
+                    ),
+                    "snapshot_bytes": snapshotBytes if snapshot else 0,
+                }
+            )
+    report("warm_start", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Cost of the staleness watchdog for 1 to 50 openWB devices.
+
+Every topic is published once per 10 ticks, spread evenly over the ticks,
+for 100 ticks. Compared are the timer wheel of watchdog.py, where a
+message only updates the last seen tick and the wheel checks the due
+topics once per tick, and one asyncio timer per topic that is cancelled
+and scheduled again with every message.
+One watchdog serves the whole fleet here, the integration has one per
+config entry, which splits the cost of a tick among them.
+
+Reported per fleet size: topics, ns per message, and for the wheel the
+mean cost of a tick.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+from custom_components.openwbmqtt.watchdog import OpenWBTopicWatchdog
+
+from .common import catalog_topics, report
+
+INTERVAL = 10
+TICKS = 100
+FACTOR = 3
+
+
+def fleet_topics(n_devices: int) -> list[str]:
+    """Return the topics of a fleet of openWB devices with two charge points."""
+    return [
+        topic
+        for device in range(1, n_devices + 1)
+        for _, topic in catalog_topics(2, f"fleet/openWB{device}")
+    ]
+
+
+def run_wheel(loop: asyncio.AbstractEventLoop, topics: list[str]) -> dict:
+    """Feed the messages to the timer wheel and tick it."""
+    watchdog = OpenWBTopicWatchdog(SimpleNamespace(loop=loop), FACTOR)
+    seen = watchdog.async_seen
+    messageTime = 0
+    tickTime = 0
+    messages = 0
+    for tick in range(TICKS):
+        batch = topics[tick % INTERVAL :: INTERVAL]
+        start = time.perf_counter_ns()
+        for topic in batch:
+            seen(topic)
+        messageTime += time.perf_counter_ns() - start
+        messages += len(batch)
+        start = time.perf_counter_ns()
+        watchdog._async_tick()
+        tickTime += time.perf_counter_ns() - start
+        watchdog.async_stop()
+    assert not watchdog.stale
+    return {
+        "ns_per_message": round(messageTime / messages, 1),
+        "us_per_tick": round(tickTime / TICKS / 1000, 2),
+    }
+
+
+def run_timers(loop: asyncio.AbstractEventLoop, topics: list[str]) -> dict:
+    """Feed the messages to one timer per topic."""
+    timers: dict[str, asyncio.TimerHandle] = {}
+
+    def stale(topic: str) -> None:
+        """Stand in for marking the topic stale."""
+
+    messageTime = 0
+    messages = 0
+    for tick in range(TICKS):
+        batch = topics[tick % INTERVAL :: INTERVAL]
+        start = time.perf_counter_ns()
+        for topic in batch:
+            timer = timers.get(topic)
+            if timer is not None:
+                timer.cancel()
+            timers[topic] = loop.call_later(FACTOR * INTERVAL, stale, topic)
+        messageTime += time.perf_counter_ns() - start
+        messages += len(batch)
+    for timer in timers.values():
+        timer.cancel()
+    return {"ns_per_message": round(messageTime / messages, 1)}
+
+
+def main() -> None:
+    """Run the benchmark."""
+    loop = asyncio.new_event_loop()
+    results = []
+    for n_devices in (1, 10, 50):
+        topics = fleet_topics(n_devices)
+        for mode, run in (("timer_wheel", run_wheel), ("timer_per_topic", run_timers)):
+            results.append(
+                {"mode": mode, "devices": n_devices, "topics": len(topics)}
+                | run(loop, topics)
+            )
+    loop.close()
+    report("watchdog", results)
+
+
+if __name__ == "__main__":
+    main()
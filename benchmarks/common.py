@@ -0,0 +1,291 @@
+"""Helpers shared by the benchmarks."""
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+import json
+import random
+import subprocess
+import time
+from types import SimpleNamespace
+from typing import Any
+
+from homeassistant.helpers import entity_registry as er
+
+from custom_components.openwbmqtt import binary_sensor, number, select, sensor, switch
+from custom_components.openwbmqtt.const import (
+    BINARY_SENSORS_GLOBAL,
+    BINARY_SENSORS_PER_LP,
+    CHARGE_POINTS,
+    DOMAIN,
+    MQTT_ROOT_TOPIC,
+    NUMBERS_GLOBAL,
+    NUMBERS_PER_LP,
+    SELECTS_GLOBAL,
+    SELECTS_PER_LP,
+    SENSORS_GLOBAL,
+    SENSORS_PER_LP,
+    SWITCHES_PER_LP,
+)
+from custom_components.openwbmqtt.delivery import topic_matches
+from custom_components.openwbmqtt.hub import OpenWBHub
+from custom_components.openwbmqtt.parsers import (
+    KEY_COUNT_PHASES,
+    KEY_TIME_REMAINING,
+    KEY_UPTIME,
+)
+from custom_components.openwbmqtt.router import OpenWBTopicRouter
+
+MQTT_ROOT = "openWB"
+
+# Payloads of openWB for the topics that need a special parser.
+UPTIMES = [
+    " 12:33:01 up 3 days, 19:02,  0 users,  load average: 1.32, 1.47, 1.45",
+    " 08:10:44 up 41 min,  0 users,  load average: 0.52, 0.40, 0.38",
+    " 23:59:59 up 12:07,  1 user,  load average: 2.01, 1.80, 1.75",
+]
+TIMES_REMAINING = ["1 H 20 Min", "45 Min", "2 H 5 Min", "---"]
+
+
+@dataclass(frozen=True)
+class FakeMessage:
+    """Minimal stand-in for homeassistant.components.mqtt.ReceiveMessage."""
+
+    topic: str
+    payload: Any
+    qos: int = 0
+    retain: bool = False
+
+
+class FakeMqttClient:
+    """Model of the message dispatch done by the HA MQTT client.
+
+    Topics without wildcards are looked up in a dict, wildcard subscriptions
+    are matched one by one. The matching subscriptions are cached per topic,
+    like by the lru_cache of the HA client. Each matching subscription
+    decodes the payload, unless it was made with encoding None, and receives
+    its own message object through an exception catching wrapper, as in
+    homeassistant.components.mqtt.client. The SUBSCRIBE round trip to the
+    broker, the largest setup cost of a subscription, is not part of the model.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the client."""
+        self.simple: dict[str, list[Callable]] = {}
+        self.wildcard: list[tuple[str, Callable]] = []
+        self.subscriptions = 0
+        self._matches: dict[str, list[Callable]] = {}
+
+    def subscribe(
+        self, topic: str, msg_callback: Callable, encoding: str | None = "utf-8"
+    ) -> None:
+        """Add a subscription."""
+        self.subscriptions += 1
+        self._matches.clear()
+
+        def catch_log_exception(topic: str, payload: bytes) -> None:
+            if encoding is not None:
+                payload = payload.decode(encoding)
+            try:
+                msg_callback(FakeMessage(topic, payload))
+            except Exception:  # pylint: disable=broad-except
+                pass
+
+        if "#" in topic or "+" in topic:
+            self.wildcard.append((topic, catch_log_exception))
+        else:
+            self.simple.setdefault(topic, []).append(catch_log_exception)
+
+    def receive(self, topic: str, payload: bytes) -> None:
+        """Dispatch a raw message to all matching subscriptions."""
+        subscriptions = self._matches.get(topic)
+        if subscriptions is None:
+            subscriptions = self._matches[topic] = list(self.simple.get(topic, ()))
+            for topicFilter, msg_callback in self.wildcard:
+                if topic_matches(topicFilter, topic):
+                    subscriptions.append(msg_callback)
+        for msg_callback in subscriptions:
+            msg_callback(topic, payload)
+
+
+class FakeConfigEntry:
+    """Minimal stand-in for a config entry of the integration."""
+
+    def __init__(
+        self, mqtt_root: str, n_charge_points: int, options: dict | None = None
+    ) -> None:
+        """Initialize the config entry."""
+        self.entry_id = mqtt_root
+        self.unique_id = mqtt_root
+        self.data = {MQTT_ROOT_TOPIC: mqtt_root, CHARGE_POINTS: n_charge_points}
+        self.options = options or {}
+        self.on_unload: list[Callable] = []
+
+    def async_on_unload(self, func: Callable) -> None:
+        """Remember a callback that is called when the entry is unloaded."""
+        self.on_unload.append(func)
+
+
+async def async_setup_platforms(hass: Any, entry: FakeConfigEntry) -> list:
+    """Run the setup of all platforms and return the created entities."""
+    entities: list = []
+    for platform in (binary_sensor, number, select, sensor, switch):
+        await platform.async_setup_entry(hass, entry, entities.extend)
+    return entities
+
+
+class FakeEntityRegistry:
+    """Empty entity registry, all entities are new and enabled."""
+
+    def async_get_entity_id(self, domain: str, platform: str, unique_id: str) -> None:
+        """Return None, no entity is registered."""
+        return None
+
+
+class FakeHass:
+    """Lightweight stand-in for HomeAssistant with the hub of the integration."""
+
+    def __init__(self) -> None:
+        """Initialize the instance."""
+        self.data: dict[str, Any] = {
+            DOMAIN: OpenWBHub(self),
+            er.DATA_REGISTRY: FakeEntityRegistry(),
+        }
+
+
+async def async_add_entities_to_fake_hass(
+    hass: FakeHass,
+    entry: FakeConfigEntry,
+    entities: list,
+    payloads: dict[str, str] | None = None,
+) -> OpenWBTopicRouter:
+    """Register the entities at a new topic router, without a state machine.
+
+    The router is started with the payloads of a snapshot, if given.
+    async_write_ha_state of the entities only counts the writes in the
+    attribute stateWrites of the entity.
+    """
+    router = OpenWBTopicRouter(hass, entry.data[MQTT_ROOT_TOPIC])
+    hass.data[DOMAIN].async_add_router(entry.entry_id, router)
+    if payloads:
+        router.async_restore_payloads(payloads)
+    for entity in entities:
+        entity.hass = hass
+        entity.platform = SimpleNamespace(config_entry=entry)
+        entity.stateWrites = 0
+        entity.async_write_ha_state = _count_state_writes(entity)
+        await entity.async_added_to_hass()
+    return router
+
+
+def _count_state_writes(entity: Any) -> Callable[[], None]:
+    """Return a replacement of async_write_ha_state that counts the writes."""
+
+    def async_write_ha_state() -> None:
+        entity.stateWrites += 1
+
+    return async_write_ha_state
+
+
+def payload_candidates(entity) -> list[str]:
+    """Return a few realistic payloads of the topic of an entity."""
+    description = entity.entity_description
+    key = description.key
+    platform = entity.entity_id.split(".")[0]
+    if key == KEY_UPTIME:
+        return UPTIMES
+    if key == KEY_TIME_REMAINING:
+        return TIMES_REMAINING
+    if key == KEY_COUNT_PHASES:
+        return ["0", "1", "3"]
+    if platform in ("binary_sensor", "switch"):
+        return ["0", "1"]
+    if platform == "select":
+        return [str(value) for value in description.valueMapCurrentValue]
+    if platform == "number":
+        return [
+            str(description.native_min_value),
+            str(description.native_max_value),
+        ]
+    if getattr(description, "valueMap", None):
+        return [str(value) for value in description.valueMap]
+    if description.native_unit_of_measurement is None:
+        return ["openWB", "Ladepunkt 1", "0"]
+    return [str(random.randint(0, 11000)) for _ in range(3)]
+
+
+def catalog_topics(
+    n_charge_points: int, mqtt_root: str = MQTT_ROOT
+) -> list[tuple[str, str]]:
+    """Return (platform, topic) for every entity of one openWB device."""
+    topics = [("sensor", f"{mqtt_root}/{d.key}") for d in SENSORS_GLOBAL]
+    topics += [("binary_sensor", f"{mqtt_root}/{d.key}") for d in BINARY_SENSORS_GLOBAL]
+    topics += [
+        ("select", f"{mqtt_root}/{d.mqttTopicCurrentValue}") for d in SELECTS_GLOBAL
+    ]
+    for d in NUMBERS_GLOBAL:
+        if d.mqttTopicCurrentValue.startswith("/"):
+            topics.append(("number", f"{mqtt_root}{d.mqttTopicCurrentValue}"))
+        else:
+            topics.append(
+                (
+                    "number",
+                    f"{mqtt_root}/config/get/{d.mqttTopicChargeMode}/{d.mqttTopicCurrentValue}",
+                )
+            )
+    for cp in range(1, n_charge_points + 1):
+        topics += [("sensor", f"{mqtt_root}/lp/{cp}/{d.key}") for d in SENSORS_PER_LP]
+        topics += [
+            ("binary_sensor", f"{mqtt_root}/lp/{cp}/{d.key}")
+            for d in BINARY_SENSORS_PER_LP
+        ]
+        topics += [
+            (
+                "select",
+                f"{mqtt_root}/config/get/sofort/lp/{cp}/{d.mqttTopicCurrentValue}",
+            )
+            for d in SELECTS_PER_LP
+        ]
+        for platform, descriptions in (
+            ("switch", SWITCHES_PER_LP),
+            ("number", NUMBERS_PER_LP),
+        ):
+            for d in descriptions:
+                if d.mqttTopicChargeMode:
+                    topic = f"{mqtt_root}/config/get/{d.mqttTopicChargeMode}/lp/{cp}/{d.mqttTopicCurrentValue}"
+                else:
+                    topic = f"{mqtt_root}/lp/{cp}/{d.mqttTopicCurrentValue}"
+                topics.append((platform, topic))
+    return topics
+
+
+def timeit(func: Callable[[], Any], repeat: int = 5) -> float:
+    """Return the best wall time of several runs in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def git_commit() -> str | None:
+    """Return the commit of the working tree, if known."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def report(name: str, results: list[dict[str, Any]]) -> None:
+    """Print the results as one JSON document."""
+    print(
+        json.dumps(
+            {"benchmark": name, "commit": git_commit(), "results": results}, indent=2
+        )
+    )
@@ -0,0 +1,106 @@
+"""The openwbmqtt component for controlling the openWB wallbox via home assistant / MQTT."""
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity import Entity
+
+from .const import BATCH_QUIET_GAP
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class OpenWBStateBatcher:
+    """Coalesce the state writes of one openWB control cycle.
+
+    openWB publishes its topic tree in bursts. Entities whose state changed
+    during a burst are collected and written in one pass, either when no
+    state changed for the quiet gap or when the maximum latency has passed
+    since the first change of the burst.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        maxLatency: float,
+        quietGap: float = BATCH_QUIET_GAP,
+    ) -> None:
+        """Initialize the batcher, the latencies are given in seconds."""
+        self.hass = hass
+        self.maxLatency = maxLatency
+        self.quietGap = min(quietGap, maxLatency)
+        # Insertion ordered set of the entities to be written.
+        self._dirty: dict[Entity, None] = {}
+        self._burstStart = 0.0
+        self._lastChange = 0.0
+        self._quietGapTimer: asyncio.TimerHandle | None = None
+        self._latencyTimer: asyncio.TimerHandle | None = None
+        # Metrics of the batches.
+        self.flushes = 0
+        self.lastFlushSize = 0
+        self.maxFlushSize = 0
+        self.lastBurstDuration = 0.0
+
+    @callback
+    def async_schedule_write(self, entity: Entity) -> None:
+        """Write the state of the entity with the next batch."""
+        now = self.hass.loop.time()
+        self._lastChange = now
+        if not self._dirty:
+            self._burstStart = now
+            self._latencyTimer = self.hass.loop.call_at(
+                now + self.maxLatency, self.async_flush
+            )
+            # The quiet gap timer is not moved on every change, but checks
+            # the time of the last change when it fires.
+            self._quietGapTimer = self.hass.loop.call_at(
+                now + self.quietGap, self._async_check_quiet_gap
+            )
+        self._dirty[entity] = None
+
+    @callback
+    def async_discard(self, entity: Entity) -> None:
+        """Drop the pending write of an entity that is removed."""
+        self._dirty.pop(entity, None)
+
+    @callback
+    def _async_check_quiet_gap(self) -> None:
+        """Flush the batch if no state changed for the quiet gap."""
+        due = self._lastChange + self.quietGap
+        if due > self.hass.loop.time():
+            self._quietGapTimer = self.hass.loop.call_at(
+                due, self._async_check_quiet_gap
+            )
+            return
+        self._quietGapTimer = None
+        self.async_flush()
+
+    @callback
+    def async_flush(self) -> None:
+        """Write the states of all collected entities."""
+        self.async_cancel_timers()
+        dirty, self._dirty = self._dirty, {}
+        if not dirty:
+            return
+
+        self.flushes += 1
+        self.lastFlushSize = len(dirty)
+        self.maxFlushSize = max(self.maxFlushSize, self.lastFlushSize)
+        self.lastBurstDuration = self._lastChange - self._burstStart
+        for entity in dirty:
+            try:
+                entity.async_write_ha_state()
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error writing the state of %s", entity.entity_id)
+
+    @callback
+    def async_cancel_timers(self) -> None:
+        """Cancel the pending timers of the batch."""
+        if self._quietGapTimer is not None:
+            self._quietGapTimer.cancel()
+            self._quietGapTimer = None
+        if self._latencyTimer is not None:
+            self._latencyTimer.cancel()
+            self._latencyTimer = None
@@ -1,17 +1,19 @@
 """The openwbmqtt component for controlling the openWB wallbox via home assistant / MQTT."""
 from __future__ import annotations
 
-import copy
 import logging
 
-from homeassistant.components import mqtt
 from homeassistant.components.binary_sensor import DOMAIN, BinarySensorEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.util import slugify
 
-from .common import OpenWBBaseEntity
+from .common import (
+    OpenWBBaseEntity,
+    OpenWBTopicBinding,
+    async_add_discovered_entities,
+)
 
 # Import global values.
 from .const import (
@@ -35,30 +37,30 @@ async def async_setup_entry(
 
     sensorList = []
     # Create all global sensors.
-    global_sensors = copy.deepcopy(BINARY_SENSORS_GLOBAL)
-    for description in global_sensors:
-        description.mqttTopicCurrentValue = f"{mqttRoot}/{description.key}"
-        _LOGGER.debug("mqttTopic: %s", description.mqttTopicCurrentValue)
+    for description in BINARY_SENSORS_GLOBAL:
+        topics = OpenWBTopicBinding(f"{mqttRoot}/{description.key}")
+        _LOGGER.debug("mqttTopic: %s", topics.currentValue)
         sensorList.append(
             openwbBinarySensor(
                 uniqueID=integrationUniqueID,
                 description=description,
+                topics=topics,
                 device_friendly_name=integrationUniqueID,
                 mqtt_root=mqttRoot,
             )
         )
     # Create all sensors for each charge point, respectively.
     for chargePoint in range(1, nChargePoints + 1):
-        local_sensors_per_lp = copy.deepcopy(BINARY_SENSORS_PER_LP)
-        for description in local_sensors_per_lp:
-            description.mqttTopicCurrentValue = (
+        for description in BINARY_SENSORS_PER_LP:
+            topics = OpenWBTopicBinding(
                 f"{mqttRoot}/lp/{str(chargePoint)}/{description.key}"
             )
-            _LOGGER.debug("mqttTopic: %s", description.mqttTopicCurrentValue)
+            _LOGGER.debug("mqttTopic: %s", topics.currentValue)
             sensorList.append(
                 openwbBinarySensor(
                     uniqueID=integrationUniqueID,
                     description=description,
+                    topics=topics,
                     nChargePoints=int(nChargePoints),
                     currentChargePoint=chargePoint,
                     device_friendly_name=integrationUniqueID,
@@ -66,7 +68,7 @@ async def async_setup_entry(
                 )
             )
 
-    async_add_entities(sensorList)
+    async_add_discovered_entities(hass, config, async_add_entities, sensorList)
 
 
 class openwbBinarySensor(OpenWBBaseEntity, BinarySensorEntity):
@@ -80,6 +82,7 @@ class openwbBinarySensor(OpenWBBaseEntity, BinarySensorEntity):
         device_friendly_name: str,
         mqtt_root: str,
         description: openwbBinarySensorEntityDescription,
+        topics: OpenWBTopicBinding,
         nChargePoints: int | None = None,
         currentChargePoint: int | None = None,
     ) -> None:
@@ -93,6 +96,7 @@ class openwbBinarySensor(OpenWBBaseEntity, BinarySensorEntity):
         )
 
         self.entity_description = description
+        self.topics = topics
         if nChargePoints:
             self._attr_unique_id = slugify(
                 f"{uniqueID}-CP{currentChargePoint}-{description.name}"
@@ -110,16 +114,16 @@ class openwbBinarySensor(OpenWBBaseEntity, BinarySensorEntity):
         """Subscribe to MQTT events."""
 
         @callback
-        def message_received(message):
+        def message_received(value):
             """Handle new MQTT messages."""
-            self._attr_is_on = bool(int(message.payload))
+            self._attr_is_on = bool(value)
 
             # Update entity state with value published on MQTT.
-            self.async_write_ha_state()
+            self.async_write_ha_state_if_changed(self._attr_is_on)
 
-        await mqtt.async_subscribe(
-            self.hass,
-            self.entity_description.mqttTopicCurrentValue,
+        # The switch of the same topic shares the int parser.
+        self.async_subscribe_topic(
+            self.topics.currentValue,
             message_received,
-            1,
+            int,
         )
@@ -0,0 +1,91 @@
+"""The openwbmqtt component for controlling the openWB wallbox via home assistant / MQTT."""
+from __future__ import annotations
+
+import asyncio
+
+from homeassistant.components import mqtt
+from homeassistant.core import HomeAssistant, callback
+
+from .latency import OpenWBCommandLatency
+
+
+class OpenWBCommandCoalescer:
+    """Coalesce the commands published to the set topics of one openWB device.
+
+    openWB applies commands once per control cycle. Commands to the same topic
+    within the settle window are merged, only the last one is published.
+    Commands that request the value openWB already confirmed on the get topic
+    are dropped, together with a pending command of their topic.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        settleWindow: float,
+        latency: OpenWBCommandLatency | None = None,
+    ) -> None:
+        """Initialize the coalescer, the settle window is given in seconds."""
+        self.hass = hass
+        self.settleWindow = settleWindow
+        self.latency = latency
+        # Arguments of _async_send and timer of the pending command per topic.
+        self._pending: dict[str, tuple[tuple, asyncio.TimerHandle]] = {}
+        # Counters of the commands.
+        self.sent = 0
+        self.merged = 0
+        self.dropped = 0
+
+    @callback
+    def async_publish(
+        self,
+        topic: str,
+        payload: str,
+        noop: bool = False,
+        confirmTopic: str | None = None,
+        chargePoint: int | None = None,
+        immediate: bool = False,
+    ) -> None:
+        """Publish a command after the settle window, unless it is a no-op.
+
+        If a confirmation topic is given, the time until openWB confirms the
+        command on it is measured. Immediate commands skip the settle window.
+        """
+        pending = self._pending.pop(topic, None)
+        if pending is not None:
+            pending[1].cancel()
+        # A no-op that cancels a pending command counts as dropped only.
+        if noop:
+            self.dropped += 1
+            return
+        if pending is not None:
+            self.merged += 1
+        args = (topic, payload, confirmTopic, chargePoint)
+        if immediate or not self.settleWindow:
+            self._async_send(*args)
+            return
+        self._pending[topic] = (
+            args,
+            self.hass.loop.call_later(self.settleWindow, self._async_send, *args),
+        )
+
+    @callback
+    def async_flush(self) -> None:
+        """Publish all pending commands right away."""
+        for args, timer in list(self._pending.values()):
+            timer.cancel()
+            self._async_send(*args)
+
+    @callback
+    def _async_send(
+        self,
+        topic: str,
+        payload: str,
+        confirmTopic: str | None,
+        chargePoint: int | None,
+    ) -> None:
+        """Publish a command."""
+        self._pending.pop(topic, None)
+        self.sent += 1
+        if self.latency is not None and confirmTopic is not None:
+            self.latency.async_track(confirmTopic, payload, chargePoint)
+        self.hass.async_create_task(mqtt.async_publish(self.hass, topic, payload))
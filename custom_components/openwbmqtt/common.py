@@ -1,12 +1,144 @@
 """The openwbmqtt component for controlling the openWB wallbox via home assistant / MQTT."""
-from homeassistant.helpers.entity import DeviceInfo
+from __future__ import annotations
 
-from .const import DOMAIN, MANUFACTURER, MODEL
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import partial
+import logging
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.entity import DeviceInfo, Entity, EntityPlatformState
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import CONF_DISCOVERY, DEFAULT_DISCOVERY, DOMAIN, MANUFACTURER, MODEL
+from .router import OpenWBTopicRouter
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class OpenWBTopicBinding:
+    """MQTT topics of one entity, resolved for its openWB and charge point.
+
+    The entity descriptions are shared by all entities of all config entries,
+    the topics that differ per entity are kept here.
+    """
+
+    currentValue: str | None
+    command: str | None = None
+    # None for the topics of the openWB itself.
+    chargePoint: int | None = None
+
+
+@callback
+def async_add_discovered_entities(
+    hass: HomeAssistant,
+    config: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+    entities: list[Entity],
+) -> None:
+    """Add the entities of a platform.
+
+    In discovery mode, an entity is only added once its topic has been
+    published below the MQTT root. The entities discovered by the messages
+    of one loop iteration, for example the retained messages after the
+    subscription, are added together.
+
+    Entities that are disabled in the entity registry are not passed to HA,
+    so they register no topics and parse no payloads. HA also rejects the
+    entities that are created disabled by default, and removes the entities
+    that are disabled later on. All of them are added again as soon as they
+    are enabled, without waiting for HA to reload the config entry.
+    """
+    discovery = config.options.get(CONF_DISCOVERY, DEFAULT_DISCOVERY)
+    router: OpenWBTopicRouter | None = (
+        hass.data[DOMAIN].routers[config.entry_id] if discovery else None
+    )
+    registry = er.async_get(hass)
+    pending: list[Entity] = []
+    # Entities by platform and unique id.
+    byUniqueID: dict[tuple[str, str], Entity] = {
+        (entity.entity_id.split(".", 1)[0], entity.unique_id): entity
+        for entity in entities
+    }
+    # Entities that wait for their discovery topic.
+    waiting: set[Entity] = set()
+
+    @callback
+    def async_add_pending() -> None:
+        if pending:
+            async_add_entities(list(pending))
+            pending.clear()
+
+    @callback
+    def async_discovered(entity: Entity) -> None:
+        waiting.discard(entity)
+        if not pending:
+            hass.loop.call_soon(async_add_pending)
+        pending.append(entity)
+
+    @callback
+    def async_watch(entity: Entity) -> None:
+        waiting.add(entity)
+        config.async_on_unload(
+            router.async_watch_topic(
+                entity.discoveryTopic, partial(async_discovered, entity)
+            )
+        )
+
+    @callback
+    def async_registry_updated(event: Event) -> None:
+        """Add an entity again once it is enabled in the entity registry."""
+        if (
+            event.data["action"] != "update"
+            or "disabled_by" not in event.data["changes"]
+        ):
+            return
+        entry = registry.async_get(event.data["entity_id"])
+        if (
+            entry is None
+            or entry.disabled
+            or entry.platform != DOMAIN
+            or entry.config_entry_id != config.entry_id
+        ):
+            return
+        entity = byUniqueID.get((entry.domain, entry.unique_id))
+        if entity is None or entity in waiting or entity.async_is_added():
+            return
+        _LOGGER.debug("Add enabled entity %s", entry.entity_id)
+        entity.async_prepare_add()
+        if discovery and entity.discoveryTopic is not None:
+            async_watch(entity)
+        else:
+            async_add_entities([entity])
+
+    immediate = []
+    for key, entity in byUniqueID.items():
+        entityID = registry.async_get_entity_id(key[0], DOMAIN, key[1])
+        entry = None if entityID is None else registry.async_get(entityID)
+        if entry is not None and entry.disabled:
+            continue
+        if not discovery or entity.discoveryTopic is None:
+            immediate.append(entity)
+        else:
+            async_watch(entity)
+    config.async_on_unload(
+        hass.bus.async_listen(er.EVENT_ENTITY_REGISTRY_UPDATED, async_registry_updated)
+    )
+    config.async_on_unload(pending.clear)
+    async_add_entities(immediate)
 
 
 class OpenWBBaseEntity:
     """Openwallbox entity base class."""
 
+    _router: OpenWBTopicRouter
+    # State of the last call to async_write_ha_state.
+    _lastWrittenState: tuple | None = None
+
     def __init__(
         self,
         device_friendly_name: str,
@@ -15,13 +147,112 @@ class OpenWBBaseEntity:
         """Init device info class."""
         self.device_friendly_name = device_friendly_name
         self.mqtt_root = mqtt_root
-
-    @property
-    def device_info(self) -> DeviceInfo:
-        """Return the device information."""
-        return DeviceInfo(
+        # The device information never changes, so it is built only once.
+        self._attr_device_info = DeviceInfo(
             name=self.device_friendly_name,
             identifiers={(DOMAIN, self.device_friendly_name)},
             manufacturer=MANUFACTURER,
             model=MODEL,
         )
+        # Topics of the entity that the watchdog reported as stale.
+        self._staleTopics: set[str] = set()
+
+    @property
+    def discoveryTopic(self) -> str | None:
+        """Return the topic that creates the entity in discovery mode.
+
+        None means that the entity is always created.
+        """
+        topics: OpenWBTopicBinding | None = getattr(self, "topics", None)
+        return None if topics is None else topics.currentValue
+
+    @callback
+    def async_subscribe_topic(
+        self,
+        topic: str,
+        handler: Callable[[Any], None],
+        parser: Callable[[Any], Any] | None = None,
+    ) -> None:
+        """Register a handler for an MQTT topic at the topic router of the config entry.
+
+        The handler is removed automatically when the entity is removed.
+        """
+        self._router = self.hass.data[DOMAIN].routers[
+            self.platform.config_entry.entry_id
+        ]
+        self.async_on_remove(
+            self._router.async_register(
+                topic, handler, parser, self.entity_id.split(".", 1)[0]
+            )
+        )
+        if self._router.watchdog is not None:
+            self.async_on_remove(
+                self._router.watchdog.async_listen(topic, self._async_topic_stale)
+            )
+
+    @callback
+    def async_is_added(self) -> bool:
+        """Return True if HA added the entity and did not remove it since."""
+        return self._platform_state == EntityPlatformState.ADDED
+
+    @callback
+    def async_prepare_add(self) -> None:
+        """Allow HA to add the entity again after it rejected or removed it.
+
+        HA does the same when the entity id of an entity changes.
+        """
+        self._platform_state = EntityPlatformState.NOT_ADDED
+        # Set by Entity.async_remove, it would skip the next removal.
+        self.__dict__.pop("_Entity__remove_event", None)
+        self._lastWrittenState = None
+        if self._staleTopics:
+            self._staleTopics.clear()
+            self._attr_available = True
+
+    @callback
+    def _async_topic_stale(self, topic: str, stale: bool) -> None:
+        """Mark the entity unavailable while one of its topics is stale."""
+        if stale:
+            self._staleTopics.add(topic)
+        else:
+            self._staleTopics.discard(topic)
+        if self._attr_available == (not self._staleTopics):
+            return
+        self._attr_available = not self._staleTopics
+        self.async_write_ha_state()
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Drop the pending batched write of the entity."""
+        router: OpenWBTopicRouter | None = getattr(self, "_router", None)
+        if router is not None and router.batcher is not None:
+            router.batcher.async_discard(self)
+        await super().async_will_remove_from_hass()
+
+    @callback
+    def _reports_state(self, *state: Any) -> bool:
+        """Return True if openWB reported the state in this run.
+
+        A state restored from the snapshot may be outdated, commands are
+        never dropped because of it.
+        """
+        return state == self._lastWrittenState and not self._router.is_restored(
+            self.topics.currentValue
+        )
+
+    @callback
+    def async_write_ha_state_if_changed(self, *state: Any) -> None:
+        """Write the entity state only if it differs from the last written state.
+
+        openWB republishes most topics in every control cycle, even if the value
+        did not change. The writes and the skipped writes are counted by the topic router.
+        If batching is enabled, the state is written with the next batch.
+        """
+        if state == self._lastWrittenState:
+            self._router.suppressedWrites += 1
+            return
+        self._lastWrittenState = state
+        self._router.stateWrites += 1
+        if self._router.batcher is not None:
+            self._router.batcher.async_schedule_write(self)
+        else:
+            self.async_write_ha_state()
@@ -1,10 +1,41 @@
 """The openwbmqtt component for controlling the openWB wallbox via home assistant / MQTT."""
 from __future__ import annotations
 
-from homeassistant.config_entries import ConfigFlow
+import voluptuous as vol
+
+from homeassistant.config_entries import ConfigEntry, ConfigFlow, OptionsFlow
+from homeassistant.core import callback
 
 # Import global values.
-from .const import DATA_SCHEMA, DOMAIN, MQTT_ROOT_TOPIC
+from .const import (
+    CONF_BATCH_LATENCY,
+    CONF_CHARGE_SESSIONS,
+    CONF_COMMAND_SETTLE,
+    CONF_COMPACT_PHASES,
+    CONF_DISCOVERY,
+    CONF_ENERGY_INTERVAL,
+    CONF_POWER_FLOW,
+    CONF_ROLLING_STATISTICS,
+    CONF_SAMPLING_WINDOW,
+    CONF_STALE_FACTOR,
+    DATA_SCHEMA,
+    DEFAULT_BATCH_LATENCY,
+    DEFAULT_CHARGE_SESSIONS,
+    DEFAULT_COMMAND_SETTLE,
+    DEFAULT_COMPACT_PHASES,
+    DEFAULT_DISCOVERY,
+    DEFAULT_ENERGY_INTERVAL,
+    DEFAULT_POWER_FLOW,
+    DEFAULT_ROLLING_STATISTICS,
+    DEFAULT_SAMPLING_WINDOW,
+    DEFAULT_STALE_FACTOR,
+    DOMAIN,
+    MQTT_ROOT_TOPIC,
+    SAMPLING_MODES,
+    SENSORS_GLOBAL,
+    SENSORS_PER_LP,
+)
+from .sampling import sampling_mode, sampling_option_key
 
 
 class openwbmqttConfigFlow(ConfigFlow, domain=DOMAIN):
@@ -29,3 +60,83 @@ class openwbmqttConfigFlow(ConfigFlow, domain=DOMAIN):
             title=title,
             data=user_input,
         )
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: ConfigEntry) -> OptionsFlow:
+        """Return the options flow."""
+        return openwbmqttOptionsFlow(config_entry)
+
+
+class openwbmqttOptionsFlow(OptionsFlow):
+    """Options flow of the openWB integration."""
+
+    def __init__(self, config_entry: ConfigEntry) -> None:
+        """Initialize the options flow."""
+        self.config_entry = config_entry
+
+    async def async_step_init(self, user_input=None):
+        """Return the options form."""
+
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self.config_entry.options
+        schema = {
+            vol.Required(
+                CONF_SAMPLING_WINDOW,
+                default=options.get(CONF_SAMPLING_WINDOW, DEFAULT_SAMPLING_WINDOW),
+            ): vol.All(vol.Coerce(int), vol.Range(min=0, max=3600)),
+            vol.Required(
+                CONF_BATCH_LATENCY,
+                default=options.get(CONF_BATCH_LATENCY, DEFAULT_BATCH_LATENCY),
+            ): vol.All(vol.Coerce(int), vol.Range(min=0, max=5000)),
+            vol.Required(
+                CONF_COMPACT_PHASES,
+                default=options.get(CONF_COMPACT_PHASES, DEFAULT_COMPACT_PHASES),
+            ): bool,
+            vol.Required(
+                CONF_DISCOVERY,
+                default=options.get(CONF_DISCOVERY, DEFAULT_DISCOVERY),
+            ): bool,
+            vol.Required(
+                CONF_COMMAND_SETTLE,
+                default=options.get(CONF_COMMAND_SETTLE, DEFAULT_COMMAND_SETTLE),
+            ): vol.All(vol.Coerce(int), vol.Range(min=0, max=10000)),
+            vol.Required(
+                CONF_STALE_FACTOR,
+                default=options.get(CONF_STALE_FACTOR, DEFAULT_STALE_FACTOR),
+            ): vol.All(vol.Coerce(float), vol.Range(min=0, max=100)),
+            vol.Required(
+                CONF_POWER_FLOW,
+                default=options.get(CONF_POWER_FLOW, DEFAULT_POWER_FLOW),
+            ): bool,
+            vol.Required(
+                CONF_ROLLING_STATISTICS,
+                default=options.get(
+                    CONF_ROLLING_STATISTICS, DEFAULT_ROLLING_STATISTICS
+                ),
+            ): bool,
+            vol.Required(
+                CONF_ENERGY_INTERVAL,
+                default=options.get(CONF_ENERGY_INTERVAL, DEFAULT_ENERGY_INTERVAL),
+            ): vol.All(vol.Coerce(int), vol.Range(min=0, max=3600)),
+            vol.Required(
+                CONF_CHARGE_SESSIONS,
+                default=options.get(CONF_CHARGE_SESSIONS, DEFAULT_CHARGE_SESSIONS),
+            ): bool,
+        }
+        # One sampling mode per sensor description that can be sampled.
+        for description in SENSORS_GLOBAL + SENSORS_PER_LP:
+            if description.samplingPolicy is None:
+                continue
+            schema[
+                vol.Required(
+                    sampling_option_key(description.key),
+                    default=sampling_mode(
+                        options, description.key, description.samplingPolicy
+                    ),
+                )
+            ] = vol.In(SAMPLING_MODES)
+
+        return self.async_show_form(step_id="init", data_schema=vol.Schema(schema))
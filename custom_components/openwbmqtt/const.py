@@ -27,6 +27,7 @@ from homeassistant.const import (
     UnitOfEnergy,
     UnitOfLength,
     UnitOfPower,
+    UnitOfTime,
 )
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.entity import EntityCategory
@@ -48,6 +49,151 @@ DEFAULT_CHARGE_POINTS = 1
 MANUFACTURER = "openWB"
 MODEL = "openWB"
 
+# Options of the options flow
+CONF_SAMPLING_WINDOW = "sampling_window"
+DEFAULT_SAMPLING_WINDOW = 0
+CONF_BATCH_LATENCY = "batch_latency"
+DEFAULT_BATCH_LATENCY = 0
+CONF_COMPACT_PHASES = "compact_phases"
+DEFAULT_COMPACT_PHASES = False
+CONF_DISCOVERY = "discovery"
+DEFAULT_DISCOVERY = False
+CONF_COMMAND_SETTLE = "command_settle"
+DEFAULT_COMMAND_SETTLE = 0
+CONF_STALE_FACTOR = "stale_factor"
+DEFAULT_STALE_FACTOR = 0
+CONF_POWER_FLOW = "power_flow"
+DEFAULT_POWER_FLOW = False
+CONF_ROLLING_STATISTICS = "rolling_statistics"
+DEFAULT_ROLLING_STATISTICS = False
+CONF_ENERGY_INTERVAL = "energy_interval"
+DEFAULT_ENERGY_INTERVAL = 0
+CONF_CHARGE_SESSIONS = "charge_sessions"
+DEFAULT_CHARGE_SESSIONS = False
+
+# A burst of openWB messages is considered finished if no state changed for
+# this time (in seconds). The batch latency (in milliseconds) is the upper bound.
+BATCH_QUIET_GAP = 0.05
+
+# Commands that openWB did not confirm on the get topic within this time (in
+# seconds) are counted as timeouts. The confirmation latencies are counted in
+# buckets with these upper bounds (in seconds).
+COMMAND_CONFIRM_TIMEOUT = 60
+LATENCY_BUCKETS = (0.25, 0.5, 1, 2, 3, 5, 7.5, 10, 15, 20, 30, 45, 60)
+
+# Topics of the settings changed by the services, relative to the MQTT root:
+# setting -> (command topic, current value topic). The topic table of a config
+# entry is built once at setup, {chargePoint} is replaced by the number of each
+# charge point.
+SERVICE_TOPICS_GLOBAL = {
+    "global_charge_mode": ("set/ChargeMode", "global/ChargeMode"),
+    "target_price": (
+        "set/awattar/MaxPriceForCharging",
+        "global/awattar/MaxPriceForCharging",
+    ),
+}
+SERVICE_TOPICS_PER_LP = {
+    "charge_point_enabled": (
+        "set/lp{chargePoint}/ChargePointEnabled",
+        "lp/{chargePoint}/ChargePointEnabled",
+    ),
+    "charge_limitation": (
+        "config/set/sofort/lp/{chargePoint}/chargeLimitation",
+        "config/get/sofort/lp/{chargePoint}/chargeLimitation",
+    ),
+    "energy_to_charge": (
+        "config/set/sofort/lp/{chargePoint}/energyToCharge",
+        "config/get/sofort/lp/{chargePoint}/energyToCharge",
+    ),
+    "required_soc": (
+        "config/set/sofort/lp/{chargePoint}/socToChargeTo",
+        "config/get/sofort/lp/{chargePoint}/socToChargeTo",
+    ),
+    "target_current": (
+        "config/set/sofort/lp/{chargePoint}/current",
+        "config/get/sofort/lp/{chargePoint}/current",
+    ),
+    "price_based_charging": (
+        "set/lp{chargePoint}/etBasedCharging",
+        "config/get/sofort/lp/{chargePoint}/etBasedCharging",
+    ),
+}
+
+# Payloads of the settings of the services. The service apply_charge_profile
+# waits at most this time (in seconds) for the confirmation of its commands.
+GLOBAL_CHARGE_MODES = {
+    "Sofortladen": 0,
+    "Min+PV-Laden": 1,
+    "Nur PV-Laden": 2,
+    "Stop": 3,
+    "Standby": 4,
+}
+CHARGE_LIMITATIONS = {"Not limited": 0, "kWh": 1, "SOC": 2}
+CHARGE_PROFILE_TIMEOUT = 30
+
+# The handler time of the MQTT messages is measured for every n-th message and
+# scaled by n, reading the clock costs more than handling a typical message.
+TRAFFIC_TIMING_INTERVAL = 16
+
+# Entities are unavailable if their topic has been silent for more than the
+# stale factor times its publish interval. The watchdog of a config entry
+# counts the time in ticks (in seconds) and keeps the deadlines of the next
+# WATCHDOG_SLOTS ticks in its timer wheel.
+WATCHDOG_TICK = 1
+WATCHDOG_SLOTS = 256
+
+# The power flows are computed once this delay (in seconds) after the first
+# changed power topic, openWB publishes the power topics within one burst.
+POWER_FLOW_DELAY = 0.5
+
+# Rolling statistics of the power topics over windows of these lengths (in
+# seconds). The samples of a topic are kept in a ring buffer of
+# ROLLING_CAPACITY samples, enough for the longest window at one message per
+# second. The topics are relative to the MQTT root or to the charge point.
+ROLLING_WINDOWS = (60, 300, 900)
+ROLLING_CAPACITY = 1024
+ROLLING_TOPICS_GLOBAL = {"pv/W": "PV-Leistung", "evu/W": "EVU-Leistung"}
+ROLLING_TOPICS_PER_LP = {"W": "Ladeleistung"}
+
+# The power topics are integrated into energies. Gaps between two messages of
+# more than ENERGY_MAX_GAP (in seconds) are not integrated, openWB or the
+# broker were not available. The energies are saved at most once per delay (in
+# seconds).
+ENERGY_MAX_GAP = 120
+ENERGY_STORAGE_VERSION = 1
+ENERGY_SAVE_DELAY = 60
+
+# Completed charge sessions are appended to a log file per config entry, the
+# open sessions are saved at most once per delay (in seconds) so that they
+# continue after a restart. A plug-out more than SESSION_MAX_GAP (in seconds)
+# after the last message of a session, for example after a restart, ends the
+# session at its last message. The topics are relative to the charge point.
+SESSION_LOG_VERSION = 1
+SESSION_STORAGE_VERSION = 1
+SESSION_SAVE_DELAY = 60
+SESSION_MAX_GAP = 120
+SESSION_TOPIC_PLUGGED = "boolPlugStat"
+SESSION_TOPIC_ENERGY = "kWhChargedSincePlugged"
+SESSION_TOPIC_POWER = "W"
+SESSION_TOPIC_TAG = "lastRfId"
+
+# Snapshot of the last payloads that is replayed after a restart. Changes are
+# written at most once per delay (in seconds).
+SNAPSHOT_STORAGE_VERSION = 1
+SNAPSHOT_SAVE_DELAY = 60
+# Topics relative to the time they were published, such as the uptime or
+# the remaining charging time, are parsed against the current clock. They
+# are not kept in the snapshot, a replay after a restart would be wrong.
+SNAPSHOT_EXCLUDED_TOPICS = ("system/Uptime", "lp/+/TimeRemaining")
+
+# Sampling modes of measurement sensors. Readings are aggregated over the
+# sampling window before the state is written.
+SAMPLING_OFF = "off"
+SAMPLING_MEAN = "mean"
+SAMPLING_MAX = "max"
+SAMPLING_LAST = "last"
+SAMPLING_MODES = [SAMPLING_OFF, SAMPLING_MEAN, SAMPLING_MAX, SAMPLING_LAST]
+
 # Data schema required by configuration flow
 DATA_SCHEMA = vol.Schema(
     {
@@ -57,24 +203,32 @@ DATA_SCHEMA = vol.Schema(
 )
 
 
-@dataclass
+# The entity descriptions are shared by all entities and config entries and
+# must not be changed. The mqttTopic* fields hold the topics relative to the
+# MQTT root, they are resolved per entity into an OpenWBTopicBinding.
+@dataclass(frozen=True)
 class openwbSensorEntityDescription(SensorEntityDescription):
     """Enhance the sensor entity description for openWB."""
 
     value_fn: Callable | None = None
     valueMap: dict | None = None
-    mqttTopicCurrentValue: str | None = None
+    # Default sampling mode, None if the sensor cannot be sampled.
+    samplingPolicy: str | None = None
+    # Numeric payloads are parsed from the raw bytes, multiplied by the scale
+    # and rounded to the digits, 0 digits give an int.
+    numeric: bool = False
+    scale: float | None = None
+    digits: int | None = None
 
 
-@dataclass
+@dataclass(frozen=True)
 class openwbBinarySensorEntityDescription(BinarySensorEntityDescription):
     """Enhance the sensor entity description for openWB."""
 
     state: Callable | None = None
-    mqttTopicCurrentValue: str | None = None
 
 
-@dataclass
+@dataclass(frozen=True)
 class openwbSelectEntityDescription(SelectEntityDescription):
     """Enhance the select entity description for openWB."""
 
@@ -85,7 +239,7 @@ class openwbSelectEntityDescription(SelectEntityDescription):
     modes: list | None = None
 
 
-@dataclass
+@dataclass(frozen=True)
 class openwbSwitchEntityDescription(SwitchEntityDescription):
     """Enhance the select entity description for openWB."""
 
@@ -94,7 +248,7 @@ class openwbSwitchEntityDescription(SwitchEntityDescription):
     mqttTopicChargeMode: str | None = None
 
 
-@dataclass
+@dataclass(frozen=True)
 class openWBNumberEntityDescription(NumberEntityDescription):
     """Enhance the number entity description for openWB."""
 
@@ -103,6 +257,107 @@ class openWBNumberEntityDescription(NumberEntityDescription):
     mqttTopicChargeMode: str | None = None
 
 
+@dataclass(frozen=True)
+class openwbDeliveryPolicy:
+    """MQTT delivery of a class of openWB topics."""
+
+    # QoS of the subscription.
+    qos: int
+    # Whether retained messages, sent by the broker after subscribing, are
+    # current values. Otherwise they set the state of the entities like the
+    # payloads of the snapshot, but are no live samples for the watchdog,
+    # the energy integration or the rolling statistics.
+    retainedLive: bool
+    # Whether openWB publishes the topics in every control cycle, so that a
+    # silent topic is stale.
+    periodic: bool
+
+
+# Delivery classes of the openWB topics. openWB republishes telemetry and
+# counters in every control cycle, a lost message is replaced by the next
+# one, so they are subscribed at QoS 0. States and flags such as the plug
+# status, and the diagnostics, are only published if they change, their
+# retained message is their current value. The echoes of the settings below
+# config/get are only published if a setting changes. Retained telemetry
+# is the last reading of an openWB that may be offline, it is at least as
+# recent as the snapshot but no live sample.
+DELIVERY_TELEMETRY = "telemetry"
+DELIVERY_COUNTER = "counter"
+DELIVERY_STATE = "state"
+DELIVERY_CONFIG_ECHO = "config_echo"
+DELIVERY_DIAGNOSTIC = "diagnostic"
+DELIVERY_POLICIES = {
+    DELIVERY_TELEMETRY: openwbDeliveryPolicy(qos=0, retainedLive=False, periodic=True),
+    DELIVERY_COUNTER: openwbDeliveryPolicy(qos=0, retainedLive=True, periodic=True),
+    DELIVERY_STATE: openwbDeliveryPolicy(qos=0, retainedLive=True, periodic=False),
+    DELIVERY_CONFIG_ECHO: openwbDeliveryPolicy(qos=1, retainedLive=True, periodic=False),
+    DELIVERY_DIAGNOSTIC: openwbDeliveryPolicy(qos=0, retainedLive=True, periodic=False),
+}
+
+# Subscriptions below the MQTT root and their delivery class. The topic
+# filters must not overlap, the broker delivers a message once per matching
+# subscription. Topics are states unless they are listed below.
+DELIVERY_SUBSCRIPTIONS = {
+    "config/get/#": DELIVERY_CONFIG_ECHO,
+    "lp/#": DELIVERY_STATE,
+    "global/#": DELIVERY_STATE,
+    "evu/#": DELIVERY_STATE,
+    "pv/#": DELIVERY_STATE,
+    "housebattery/#": DELIVERY_STATE,
+    "system/#": DELIVERY_DIAGNOSTIC,
+}
+
+# Topics of another delivery class than their subscription. They keep the
+# QoS of the subscription, the class decides about their retained messages.
+DELIVERY_TOPICS = {
+    "lp/+/W": DELIVERY_TELEMETRY,
+    "lp/+/APhase1": DELIVERY_TELEMETRY,
+    "lp/+/APhase2": DELIVERY_TELEMETRY,
+    "lp/+/APhase3": DELIVERY_TELEMETRY,
+    "lp/+/VPhase1": DELIVERY_TELEMETRY,
+    "lp/+/VPhase2": DELIVERY_TELEMETRY,
+    "lp/+/VPhase3": DELIVERY_TELEMETRY,
+    "lp/+/PfPhase1": DELIVERY_TELEMETRY,
+    "lp/+/PfPhase2": DELIVERY_TELEMETRY,
+    "lp/+/PfPhase3": DELIVERY_TELEMETRY,
+    "global/WHouseConsumption": DELIVERY_TELEMETRY,
+    "global/WAllChargePoints": DELIVERY_TELEMETRY,
+    "evu/W": DELIVERY_TELEMETRY,
+    "pv/W": DELIVERY_TELEMETRY,
+    "housebattery/W": DELIVERY_TELEMETRY,
+    "lp/+/kWhCounter": DELIVERY_COUNTER,
+    "lp/+/kWhActualCharged": DELIVERY_COUNTER,
+    "lp/+/kWhChargedSincePlugged": DELIVERY_COUNTER,
+    "lp/+/kWhDailyCharged": DELIVERY_COUNTER,
+    "lp/+/kmCharged": DELIVERY_COUNTER,
+    "lp/+/ChargePointEnabled": DELIVERY_CONFIG_ECHO,
+    "lp/+/manualSoc": DELIVERY_CONFIG_ECHO,
+    "lp/+/strChargePointName": DELIVERY_DIAGNOSTIC,
+    "global/ChargeMode": DELIVERY_CONFIG_ECHO,
+    "global/awattar/MaxPriceForCharging": DELIVERY_CONFIG_ECHO,
+    "global/DailyYieldAllChargePointsKwh": DELIVERY_COUNTER,
+    "global/DailyYieldHausverbrauchKwh": DELIVERY_COUNTER,
+    "global/cpuModel": DELIVERY_DIAGNOSTIC,
+    "global/cpuTemp": DELIVERY_DIAGNOSTIC,
+    "global/cpuUse": DELIVERY_DIAGNOSTIC,
+    "global/diskFree": DELIVERY_DIAGNOSTIC,
+    "global/diskUse": DELIVERY_DIAGNOSTIC,
+    "global/memFree": DELIVERY_DIAGNOSTIC,
+    "global/memTotal": DELIVERY_DIAGNOSTIC,
+    "global/memUse": DELIVERY_DIAGNOSTIC,
+    "evu/WhImported": DELIVERY_COUNTER,
+    "evu/WhExported": DELIVERY_COUNTER,
+    "evu/DailyYieldImportKwh": DELIVERY_COUNTER,
+    "evu/DailyYieldExportKwh": DELIVERY_COUNTER,
+    "pv/WhCounter": DELIVERY_COUNTER,
+    "pv/DailyYieldKwh": DELIVERY_COUNTER,
+    "housebattery/WhImported": DELIVERY_COUNTER,
+    "housebattery/WhExported": DELIVERY_COUNTER,
+    "housebattery/DailyYieldImportKwh": DELIVERY_COUNTER,
+    "housebattery/DailyYieldExportKwh": DELIVERY_COUNTER,
+}
+
+
 # List of global sensors that are relevant to the entire wallbox
 SENSORS_GLOBAL = [
     # System
@@ -154,6 +409,7 @@ SENSORS_GLOBAL = [
         device_class=None,
         native_unit_of_measurement=PERCENTAGE,
         entity_category=EntityCategory.DIAGNOSTIC,
+        numeric=True,
         icon="mdi:cpu-32-bit",
     ),
     openwbSensorEntityDescription(
@@ -162,6 +418,7 @@ SENSORS_GLOBAL = [
         device_class=SensorDeviceClass.TEMPERATURE,
         native_unit_of_measurement="°C",
         entity_category=EntityCategory.DIAGNOSTIC,
+        numeric=True,
         icon="mdi:thermometer-alert",
     ),
     openwbSensorEntityDescription(
@@ -170,6 +427,7 @@ SENSORS_GLOBAL = [
         device_class=None,
         native_unit_of_measurement="MB",
         entity_category=EntityCategory.DIAGNOSTIC,
+        numeric=True,
         icon="mdi:memory",
     ),
     openwbSensorEntityDescription(
@@ -178,6 +436,7 @@ SENSORS_GLOBAL = [
         device_class=None,
         native_unit_of_measurement="MB",
         entity_category=EntityCategory.DIAGNOSTIC,
+        numeric=True,
         icon="mdi:memory",
     ),
     openwbSensorEntityDescription(
@@ -186,6 +445,7 @@ SENSORS_GLOBAL = [
         device_class=None,
         native_unit_of_measurement="MB",
         entity_category=EntityCategory.DIAGNOSTIC,
+        numeric=True,
         icon="mdi:memory",
     ),
     openwbSensorEntityDescription(
@@ -211,7 +471,9 @@ SENSORS_GLOBAL = [
         native_unit_of_measurement=UnitOfPower.WATT,
         state_class=SensorStateClass.MEASUREMENT,
         entity_registry_enabled_default=False,
+        numeric=True,
         icon="mdi:home-lightning-bolt-outline",
+        samplingPolicy=SAMPLING_MEAN,
     ),
     openwbSensorEntityDescription(
         key="global/DailyYieldHausverbrauchKwh",
@@ -219,7 +481,8 @@ SENSORS_GLOBAL = [
         device_class=SensorDeviceClass.ENERGY,
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         state_class=SensorStateClass.TOTAL_INCREASING,
-        value_fn=lambda x: round(float(x), 2),
+        numeric=True,
+        digits=2,
         icon="mdi:counter",
     ),
     openwbSensorEntityDescription(
@@ -228,7 +491,9 @@ SENSORS_GLOBAL = [
         device_class=SensorDeviceClass.POWER,
         native_unit_of_measurement=UnitOfPower.WATT,
         state_class=SensorStateClass.MEASUREMENT,
+        numeric=True,
         icon="mdi:battery-charging-50",
+        samplingPolicy=SAMPLING_MEAN,
     ),
     openwbSensorEntityDescription(
         key="global/DailyYieldAllChargePointsKwh",
@@ -236,7 +501,8 @@ SENSORS_GLOBAL = [
         device_class=SensorDeviceClass.ENERGY,
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         state_class=SensorStateClass.TOTAL_INCREASING,
-        value_fn=lambda x: round(float(x), 2),
+        numeric=True,
+        digits=2,
         icon="mdi:counter",
     ),
     # PV
@@ -247,8 +513,11 @@ SENSORS_GLOBAL = [
         native_unit_of_measurement=UnitOfPower.WATT,
         state_class=SensorStateClass.MEASUREMENT,
         entity_registry_enabled_default=False,
-        value_fn=lambda x: round(float(x) * (-1.0)),
+        numeric=True,
+        scale=-1,
+        digits=0,
         icon="mdi:solar-power-variant-outline",
+        samplingPolicy=SAMPLING_MEAN,
     ),
     openwbSensorEntityDescription(
         key="pv/WhCounter",
@@ -257,7 +526,9 @@ SENSORS_GLOBAL = [
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         state_class=SensorStateClass.TOTAL_INCREASING,
         entity_registry_enabled_default=False,
-        value_fn=lambda x: round(float(x) / 1000.0, 2),
+        numeric=True,
+        scale=0.001,
+        digits=2,
         icon="mdi:counter",
     ),
     openwbSensorEntityDescription(
@@ -266,7 +537,8 @@ SENSORS_GLOBAL = [
         device_class=SensorDeviceClass.ENERGY,
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         state_class=SensorStateClass.TOTAL_INCREASING,
-        value_fn=lambda x: round(float(x), 2),
+        numeric=True,
+        digits=2,
         icon="mdi:counter",
     ),
     # EVU
@@ -277,7 +549,9 @@ SENSORS_GLOBAL = [
         native_unit_of_measurement=UnitOfPower.WATT,
         state_class=SensorStateClass.MEASUREMENT,
         entity_registry_enabled_default=False,
+        numeric=True,
         icon="mdi:transmission-tower",
+        samplingPolicy=SAMPLING_MEAN,
     ),
     openwbSensorEntityDescription(
         key="evu/WhImported",
@@ -286,7 +560,9 @@ SENSORS_GLOBAL = [
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         state_class=SensorStateClass.TOTAL_INCREASING,
         entity_registry_enabled_default=False,
-        value_fn=lambda x: round(float(x) / 1000.0, 2),
+        numeric=True,
+        scale=0.001,
+        digits=2,
         icon="mdi:transmission-tower-export",
     ),
     openwbSensorEntityDescription(
@@ -296,7 +572,9 @@ SENSORS_GLOBAL = [
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         state_class=SensorStateClass.TOTAL_INCREASING,
         entity_registry_enabled_default=False,
-        value_fn=lambda x: round(float(x) / 1000.0, 2),
+        numeric=True,
+        scale=0.001,
+        digits=2,
         icon="mdi:transmission-tower-import",
     ),
     openwbSensorEntityDescription(
@@ -306,7 +584,8 @@ SENSORS_GLOBAL = [
         state_class=SensorStateClass.TOTAL_INCREASING,
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         entity_registry_enabled_default=False,
-        value_fn=lambda x: round(float(x), 2),
+        numeric=True,
+        digits=2,
         icon="mdi:transmission-tower-import",
     ),
     openwbSensorEntityDescription(
@@ -316,7 +595,8 @@ SENSORS_GLOBAL = [
         state_class=SensorStateClass.TOTAL_INCREASING,
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         entity_registry_enabled_default=False,
-        value_fn=lambda x: round(float(x), 2),
+        numeric=True,
+        digits=2,
         icon="mdi:transmission-tower-export",
     ),
     openwbSensorEntityDescription(
@@ -326,7 +606,8 @@ SENSORS_GLOBAL = [
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         state_class=SensorStateClass.TOTAL_INCREASING,
         entity_registry_enabled_default=False,
-        value_fn=lambda x: round(float(x), 2),
+        numeric=True,
+        digits=2,
         icon="mdi:counter",
     ),
     # Housebattery
@@ -337,7 +618,9 @@ SENSORS_GLOBAL = [
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         state_class=SensorStateClass.TOTAL_INCREASING,
         entity_registry_enabled_default=False,
-        value_fn=lambda x: round(float(x) / 1000.0, 2),
+        numeric=True,
+        scale=0.001,
+        digits=2,
         icon="mdi:battery-arrow-down-outline",
     ),
     openwbSensorEntityDescription(
@@ -347,7 +630,9 @@ SENSORS_GLOBAL = [
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         state_class=SensorStateClass.TOTAL_INCREASING,
         entity_registry_enabled_default=False,
-        value_fn=lambda x: round(float(x) / 1000.0, 2),
+        numeric=True,
+        scale=0.001,
+        digits=2,
         icon="mdi:battery-arrow-up-outline",
     ),
     openwbSensorEntityDescription(
@@ -357,7 +642,8 @@ SENSORS_GLOBAL = [
         state_class=SensorStateClass.TOTAL_INCREASING,
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         entity_registry_enabled_default=False,
-        value_fn=lambda x: round(float(x), 2),
+        numeric=True,
+        digits=2,
         icon="mdi:battery-arrow-up-outline",
     ),
     openwbSensorEntityDescription(
@@ -367,7 +653,8 @@ SENSORS_GLOBAL = [
         state_class=SensorStateClass.TOTAL_INCREASING,
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         entity_registry_enabled_default=False,
-        value_fn=lambda x: round(float(x), 2),
+        numeric=True,
+        digits=2,
         icon="mdi:battery-arrow-down-outline",
     ),
     openwbSensorEntityDescription(
@@ -377,8 +664,10 @@ SENSORS_GLOBAL = [
         native_unit_of_measurement=UnitOfPower.WATT,
         state_class=SensorStateClass.MEASUREMENT,
         entity_registry_enabled_default=False,
-        value_fn=lambda x: round(float(x)),
+        numeric=True,
+        digits=0,
         icon="mdi:home-battery-outline",
+        samplingPolicy=SAMPLING_MEAN,
     ),
     openwbSensorEntityDescription(
         key="housebattery/%Soc",
@@ -387,6 +676,7 @@ SENSORS_GLOBAL = [
         native_unit_of_measurement=PERCENTAGE,
         state_class=SensorStateClass.MEASUREMENT,
         entity_registry_enabled_default=False,
+        numeric=True,
         icon="mdi:battery-charging-low",
     ),
     openwbSensorEntityDescription(
@@ -396,6 +686,7 @@ SENSORS_GLOBAL = [
         native_unit_of_measurement=CURRENCY_CENT,
         state_class=SensorStateClass.MEASUREMENT,
         entity_registry_enabled_default=False,
+        numeric=True,
         icon="mdi:currency-eur",
     )
 ]
@@ -407,6 +698,8 @@ SENSORS_PER_LP = [
         device_class=SensorDeviceClass.POWER,
         native_unit_of_measurement=UnitOfPower.WATT,
         state_class=SensorStateClass.MEASUREMENT,
+        samplingPolicy=SAMPLING_MEAN,
+        numeric=True,
     ),
     openwbSensorEntityDescription(
         key="energyConsumptionPer100km",
@@ -415,6 +708,7 @@ SENSORS_PER_LP = [
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         entity_category=EntityCategory.DIAGNOSTIC,
         entity_registry_enabled_default=False,
+        numeric=True,
     ),
     openwbSensorEntityDescription(
         key="socFaultState",
@@ -447,6 +741,7 @@ SENSORS_PER_LP = [
         device_class=SensorDeviceClass.CURRENT,
         native_unit_of_measurement=UnitOfElectricCurrent.AMPERE,
         state_class=SensorStateClass.MEASUREMENT,
+        numeric=True,
     ),
     openwbSensorEntityDescription(
         key="kmCharged",
@@ -454,6 +749,7 @@ SENSORS_PER_LP = [
         device_class=None,
         native_unit_of_measurement=UnitOfLength.KILOMETERS,
         state_class=SensorStateClass.MEASUREMENT,
+        numeric=True,
         icon="mdi:map-marker-distance",
     ),
     openwbSensorEntityDescription(
@@ -461,6 +757,7 @@ SENSORS_PER_LP = [
         name="SoC",
         device_class=SensorDeviceClass.BATTERY,
         native_unit_of_measurement=PERCENTAGE,
+        numeric=True,
     ),
     openwbSensorEntityDescription(
         key="kWhActualCharged",
@@ -469,7 +766,8 @@ SENSORS_PER_LP = [
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         state_class=SensorStateClass.TOTAL,
         icon="mdi:counter",
-        value_fn=lambda x: round(float(x), 2),
+        numeric=True,
+        digits=2,
     ),
     openwbSensorEntityDescription(
         key="kWhChargedSincePlugged",
@@ -478,7 +776,8 @@ SENSORS_PER_LP = [
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         state_class=SensorStateClass.TOTAL,
         icon="mdi:counter",
-        value_fn=lambda x: round(float(x), 2),
+        numeric=True,
+        digits=2,
     ),
     openwbSensorEntityDescription(
         key="kWhDailyCharged",
@@ -487,7 +786,8 @@ SENSORS_PER_LP = [
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         state_class=SensorStateClass.TOTAL,
         icon="mdi:counter",
-        value_fn=lambda x: round(float(x), 2),
+        numeric=True,
+        digits=2,
     ),
     openwbSensorEntityDescription(
         key="kWhCounter",
@@ -496,7 +796,8 @@ SENSORS_PER_LP = [
         native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
         state_class=SensorStateClass.TOTAL_INCREASING,
         icon="mdi:counter",
-        value_fn=lambda x: round(float(x), 2),
+        numeric=True,
+        digits=2,
     ),
     openwbSensorEntityDescription(
         key="countPhasesInUse",
@@ -527,6 +828,8 @@ SENSORS_PER_LP = [
         native_unit_of_measurement=PERCENTAGE,
         entity_category=EntityCategory.DIAGNOSTIC,
         entity_registry_enabled_default=False,
+        samplingPolicy=SAMPLING_LAST,
+        numeric=True,
     ),
     openwbSensorEntityDescription(
         key="PfPhase2",
@@ -535,6 +838,8 @@ SENSORS_PER_LP = [
         native_unit_of_measurement=PERCENTAGE,
         entity_category=EntityCategory.DIAGNOSTIC,
         entity_registry_enabled_default=False,
+        samplingPolicy=SAMPLING_LAST,
+        numeric=True,
     ),
     openwbSensorEntityDescription(
         key="PfPhase3",
@@ -543,6 +848,8 @@ SENSORS_PER_LP = [
         native_unit_of_measurement=PERCENTAGE,
         entity_category=EntityCategory.DIAGNOSTIC,
         entity_registry_enabled_default=False,
+        samplingPolicy=SAMPLING_LAST,
+        numeric=True,
     ),
     openwbSensorEntityDescription(
         key="VPhase1",
@@ -550,6 +857,8 @@ SENSORS_PER_LP = [
         device_class=SensorDeviceClass.VOLTAGE,
         native_unit_of_measurement=UnitOfElectricPotential.VOLT,
         entity_registry_enabled_default=False,
+        samplingPolicy=SAMPLING_MEAN,
+        numeric=True,
     ),
     openwbSensorEntityDescription(
         key="VPhase2",
@@ -557,6 +866,8 @@ SENSORS_PER_LP = [
         device_class=SensorDeviceClass.VOLTAGE,
         native_unit_of_measurement=UnitOfElectricPotential.VOLT,
         entity_registry_enabled_default=False,
+        samplingPolicy=SAMPLING_MEAN,
+        numeric=True,
     ),
     openwbSensorEntityDescription(
         key="VPhase3",
@@ -564,24 +875,389 @@ SENSORS_PER_LP = [
         device_class=SensorDeviceClass.VOLTAGE,
         native_unit_of_measurement=UnitOfElectricPotential.VOLT,
         entity_registry_enabled_default=False,
+        samplingPolicy=SAMPLING_MEAN,
+        numeric=True,
     ),
     openwbSensorEntityDescription(
         key="APhase1",
         name="Stromstärke (Phase 1)",
         device_class=SensorDeviceClass.CURRENT,
         native_unit_of_measurement=UnitOfElectricCurrent.AMPERE,
+        samplingPolicy=SAMPLING_MAX,
+        numeric=True,
     ),
     openwbSensorEntityDescription(
         key="APhase2",
         name="Stromstärke (Phase 2)",
         device_class=SensorDeviceClass.CURRENT,
         native_unit_of_measurement=UnitOfElectricCurrent.AMPERE,
+        samplingPolicy=SAMPLING_MAX,
+        numeric=True,
     ),
     openwbSensorEntityDescription(
         key="APhase3",
         name="Stromstärke (Phase 3)",
         device_class=SensorDeviceClass.CURRENT,
         native_unit_of_measurement=UnitOfElectricCurrent.AMPERE,
+        samplingPolicy=SAMPLING_MAX,
+        numeric=True,
+    ),
+]
+
+# Compact mode of the phase sensors: one entity per charge point replaces the
+# nine sensors of voltage, current and power factor. The state is the total
+# current, the values of the topics are written to the attributes.
+PHASE_ATTRIBUTES = {
+    "VPhase1": "voltage_phase1",
+    "VPhase2": "voltage_phase2",
+    "VPhase3": "voltage_phase3",
+    "APhase1": "current_phase1",
+    "APhase2": "current_phase2",
+    "APhase3": "current_phase3",
+    "PfPhase1": "power_factor_phase1",
+    "PfPhase2": "power_factor_phase2",
+    "PfPhase3": "power_factor_phase3",
+}
+# The phase topics of a charge point are published within one burst. The
+# state of the compact entity is written once this delay (in seconds) after
+# the first topic of the burst.
+PHASES_WRITE_DELAY = 0.5
+SENSORS_PHASES_PER_LP = [
+    openwbSensorEntityDescription(
+        key="phases",
+        name="Stromstärke (alle Phasen)",
+        device_class=SensorDeviceClass.CURRENT,
+        native_unit_of_measurement=UnitOfElectricCurrent.AMPERE,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:sine-wave",
+    ),
+]
+
+# Diagnostic sensors that report the counters of the topic router of the integration.
+# value_fn is called with the router.
+SENSORS_ROUTER = [
+    openwbSensorEntityDescription(
+        key="suppressedWrites",
+        name="Unterdrückte Zustandsaktualisierungen",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda router: router.suppressedWrites,
+        icon="mdi:content-save-off-outline",
+    ),
+    openwbSensorEntityDescription(
+        key="batchFlushSize",
+        name="Zustandsaktualisierungen je Stapel",
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda router: (
+            None if router.batcher is None else router.batcher.lastFlushSize
+        ),
+        icon="mdi:tray-full",
+    ),
+    openwbSensorEntityDescription(
+        key="batchBurstDuration",
+        name="Dauer des Nachrichtenstapels",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda router: (
+            None
+            if router.batcher is None
+            else round(router.batcher.lastBurstDuration * 1000)
+        ),
+        icon="mdi:timer-outline",
+    ),
+    openwbSensorEntityDescription(
+        key="commandsMerged",
+        name="Zusammengefasste Befehle",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda router: router.commands.merged,
+        icon="mdi:call-merge",
+    ),
+    openwbSensorEntityDescription(
+        key="commandsDropped",
+        name="Verworfene Befehle",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda router: router.commands.dropped,
+        icon="mdi:send-circle-outline",
+    ),
+    openwbSensorEntityDescription(
+        key="parseErrors",
+        name="Nicht lesbare Nachrichten",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda router: sum(
+            stats.parseErrors for stats in router.topicStats.values()
+        ),
+        icon="mdi:message-alert-outline",
+    ),
+]
+
+# Diagnostic sensors of the confirmation latency of commands, once for the
+# openWB itself and once per charge point. value_fn is called with the
+# router and the charge point.
+SENSORS_LATENCY = [
+    openwbSensorEntityDescription(
+        key="commandLatencyP50",
+        name="Bestätigungsdauer von Befehlen (Median)",
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda router, chargePoint: router.latency.percentile(
+            chargePoint, 50
+        ),
+        icon="mdi:timer-sync-outline",
+    ),
+    openwbSensorEntityDescription(
+        key="commandLatencyP95",
+        name="Bestätigungsdauer von Befehlen (95. Perzentil)",
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda router, chargePoint: router.latency.percentile(
+            chargePoint, 95
+        ),
+        icon="mdi:timer-sync-outline",
+    ),
+    openwbSensorEntityDescription(
+        key="commandTimeouts",
+        name="Unbestätigte Befehle",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda router, chargePoint: router.latency.timeouts.get(
+            chargePoint, 0
+        ),
+        icon="mdi:timer-alert-outline",
+    ),
+]
+
+# Diagnostic sensors of the MQTT traffic of a config entry. value_fn is called
+# with the router and returns a total, the state is its rate per second between
+# two updates of the sensor.
+SENSORS_TRAFFIC = [
+    openwbSensorEntityDescription(
+        key="messageRate",
+        name="MQTT-Nachrichten pro Sekunde",
+        native_unit_of_measurement="1/s",
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda router: router.traffic_totals()[0],
+        icon="mdi:message-processing-outline",
+    ),
+    openwbSensorEntityDescription(
+        key="handlerLoad",
+        name="Verarbeitungszeit der Nachrichten pro Sekunde",
+        native_unit_of_measurement="ms/s",
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        value_fn=lambda router: router.traffic_totals()[1] / 1e6,
+        icon="mdi:cpu-64-bit",
+    ),
+]
+
+# Sensors of the power flows computed by the power flow engine. value_fn is
+# called with the engine, and the charge point for the sensors per charge point.
+SENSORS_POWER_FLOW = [
+    openwbSensorEntityDescription(
+        key="pvToHouse",
+        name="PV → Haus",
+        device_class=SensorDeviceClass.POWER,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda engine, chargePoint: engine.flows.get("pvToHouse"),
+        icon="mdi:solar-power",
+    ),
+    openwbSensorEntityDescription(
+        key="pvToChargePoints",
+        name="PV → Ladepunkte",
+        device_class=SensorDeviceClass.POWER,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda engine, chargePoint: engine.flows.get("pvToChargePoints"),
+        icon="mdi:solar-power",
+    ),
+    openwbSensorEntityDescription(
+        key="pvToBattery",
+        name="PV → Batterie",
+        device_class=SensorDeviceClass.POWER,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda engine, chargePoint: engine.flows.get("pvToBattery"),
+        icon="mdi:solar-power",
+    ),
+    openwbSensorEntityDescription(
+        key="pvToGrid",
+        name="PV → Netz",
+        device_class=SensorDeviceClass.POWER,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda engine, chargePoint: engine.flows.get("pvToGrid"),
+        icon="mdi:solar-power",
+    ),
+    openwbSensorEntityDescription(
+        key="gridToHouse",
+        name="Netz → Haus",
+        device_class=SensorDeviceClass.POWER,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda engine, chargePoint: engine.flows.get("gridToHouse"),
+        icon="mdi:transmission-tower-export",
+    ),
+    openwbSensorEntityDescription(
+        key="gridToChargePoints",
+        name="Netz → Ladepunkte",
+        device_class=SensorDeviceClass.POWER,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda engine, chargePoint: engine.flows.get("gridToChargePoints"),
+        icon="mdi:transmission-tower-export",
+    ),
+    openwbSensorEntityDescription(
+        key="gridToBattery",
+        name="Netz → Batterie",
+        device_class=SensorDeviceClass.POWER,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda engine, chargePoint: engine.flows.get("gridToBattery"),
+        icon="mdi:transmission-tower-export",
+    ),
+    openwbSensorEntityDescription(
+        key="batteryToHouse",
+        name="Batterie → Haus",
+        device_class=SensorDeviceClass.POWER,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda engine, chargePoint: engine.flows.get("batteryToHouse"),
+        icon="mdi:home-battery-outline",
+    ),
+    openwbSensorEntityDescription(
+        key="batteryToChargePoints",
+        name="Batterie → Ladepunkte",
+        device_class=SensorDeviceClass.POWER,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda engine, chargePoint: engine.flows.get("batteryToChargePoints"),
+        icon="mdi:home-battery-outline",
+    ),
+    openwbSensorEntityDescription(
+        key="batteryToGrid",
+        name="Batterie → Netz",
+        device_class=SensorDeviceClass.POWER,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda engine, chargePoint: engine.flows.get("batteryToGrid"),
+        icon="mdi:home-battery-outline",
+    ),
+    openwbSensorEntityDescription(
+        key="selfSufficiency",
+        name="Autarkiegrad",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda engine, chargePoint: engine.flows.get("selfSufficiency"),
+        icon="mdi:home-percent-outline",
+    ),
+]
+SENSORS_POWER_FLOW_PER_LP = [
+    openwbSensorEntityDescription(
+        key="pvPower",
+        name="Ladeleistung aus PV",
+        device_class=SensorDeviceClass.POWER,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda engine, chargePoint: engine.chargePointsPV.get(chargePoint),
+        icon="mdi:solar-power",
+    ),
+]
+
+# Sensors of the rolling statistics, once per topic and window. value_fn is
+# called with the statistics of the topic and the index of the window.
+SENSORS_ROLLING = [
+    openwbSensorEntityDescription(
+        key="min",
+        name="Minimum",
+        device_class=SensorDeviceClass.POWER,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda statistics, window: statistics.minimum(window),
+        icon="mdi:arrow-collapse-down",
+    ),
+    openwbSensorEntityDescription(
+        key="max",
+        name="Maximum",
+        device_class=SensorDeviceClass.POWER,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda statistics, window: statistics.maximum(window),
+        icon="mdi:arrow-collapse-up",
+    ),
+    openwbSensorEntityDescription(
+        key="mean",
+        name="Mittelwert",
+        device_class=SensorDeviceClass.POWER,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda statistics, window: statistics.mean(window),
+        icon="mdi:chart-bell-curve-cumulative",
+    ),
+]
+
+# Sensors of the integrated power topics. The key is the power topic, relative
+# to the MQTT root or to the charge point. value_fn is called with the energies
+# of the topic in kWh, (positive power, negative power).
+SENSORS_ENERGY_GLOBAL = [
+    openwbSensorEntityDescription(
+        key="evu/W",
+        name="Netzbezug (integriert)",
+        device_class=SensorDeviceClass.ENERGY,
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda energies: energies[0],
+        icon="mdi:transmission-tower-import",
+    ),
+    openwbSensorEntityDescription(
+        key="evu/W",
+        name="Netzeinspeisung (integriert)",
+        device_class=SensorDeviceClass.ENERGY,
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda energies: energies[1],
+        icon="mdi:transmission-tower-export",
+    ),
+    openwbSensorEntityDescription(
+        key="pv/W",
+        name="PV-Ertrag (integriert)",
+        device_class=SensorDeviceClass.ENERGY,
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda energies: energies[1],
+        icon="mdi:solar-power",
+    ),
+]
+SENSORS_ENERGY_PER_LP = [
+    openwbSensorEntityDescription(
+        key="W",
+        name="Geladene Energie (integriert)",
+        device_class=SensorDeviceClass.ENERGY,
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda energies: energies[0],
+        icon="mdi:counter",
     ),
 ]
 
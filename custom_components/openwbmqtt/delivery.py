@@ -0,0 +1,46 @@
+"""The openwbmqtt component for controlling the openWB wallbox via home assistant / MQTT."""
+from __future__ import annotations
+
+from .const import (
+    DELIVERY_POLICIES,
+    DELIVERY_SUBSCRIPTIONS,
+    DELIVERY_TOPICS,
+    openwbDeliveryPolicy,
+)
+
+
+def topic_matches(topicFilter: str, topic: str) -> bool:
+    """Return True if an MQTT topic filter with + and # wildcards matches the topic."""
+    levels = topic.split("/")
+    for index, level in enumerate(topicFilter.split("/")):
+        if level == "#":
+            return True
+        if index >= len(levels) or level not in ("+", levels[index]):
+            return False
+    return len(levels) == index + 1
+
+
+def delivery_class(topic: str) -> str | None:
+    """Return the delivery class of a topic relative to the MQTT root.
+
+    None means that the topic is not subscribed.
+    """
+    for topicFilter, deliveryClass in DELIVERY_TOPICS.items():
+        if topic_matches(topicFilter, topic):
+            return deliveryClass
+    for topicFilter, deliveryClass in DELIVERY_SUBSCRIPTIONS.items():
+        if topic_matches(topicFilter, topic):
+            return deliveryClass
+    return None
+
+
+def delivery_policy(topic: str) -> openwbDeliveryPolicy | None:
+    """Return the delivery policy of a topic relative to the MQTT root, None if not subscribed."""
+    deliveryClass = delivery_class(topic)
+    return None if deliveryClass is None else DELIVERY_POLICIES[deliveryClass]
+
+
+def retained_is_live(topic: str) -> bool:
+    """Return True if retained messages of a topic relative to the MQTT root are current values."""
+    policy = delivery_policy(topic)
+    return policy is None or policy.retainedLive
@@ -0,0 +1,80 @@
+"""Diagnostics of the openwbmqtt component."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, MQTT_ROOT_TOPIC
+from .router import OpenWBTopicStats
+
+# Topics without a registered entity are grouped under this platform.
+UNROUTED = "unrouted"
+# The MQTT root identifies the openWB, it is also the title, the unique id
+# and the device identifier of the config entry.
+TO_REDACT = {MQTT_ROOT_TOPIC, "title", "unique_id"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return the traffic counters of the openWB device of a config entry.
+
+    The counters of a topic used by the entities of several platforms are
+    added to each of the platforms. Times are given in milliseconds. The
+    topics are relative to the MQTT root, which is redacted.
+    """
+    router = hass.data[DOMAIN].routers[entry.entry_id]
+    start = len(router.mqtt_root) + 1
+
+    platforms: dict[str, OpenWBTopicStats] = {}
+    topics = {}
+    for topic, stats in sorted(
+        router.topicStats.items(), key=lambda item: -item[1].handlerTime
+    ):
+        counters = stats.as_dict()
+        counters["handlerTime"] = round(stats.handlerTime / 1e6, 3)
+        topics[topic[start:]] = counters
+        for platform in router.topicPlatforms.get(topic, (UNROUTED,)):
+            total = platforms.setdefault(platform, OpenWBTopicStats())
+            for name in OpenWBTopicStats.__slots__:
+                setattr(total, name, getattr(total, name) + getattr(stats, name))
+
+    platformCounters = {}
+    for platform, total in sorted(platforms.items()):
+        platformCounters[platform] = total.as_dict()
+        platformCounters[platform]["handlerTime"] = round(total.handlerTime / 1e6, 3)
+
+    return {
+        "entry": async_redact_data(
+            {
+                "title": entry.title,
+                "unique_id": entry.unique_id,
+                "data": dict(entry.data),
+                "options": dict(entry.options),
+            },
+            TO_REDACT,
+        ),
+        "router": {
+            "stateWrites": router.stateWrites,
+            "suppressedWrites": router.suppressedWrites,
+            "batchFlushes": None if router.batcher is None else router.batcher.flushes,
+            "commandsSent": router.commands.sent,
+            "commandsMerged": router.commands.merged,
+            "commandsDropped": router.commands.dropped,
+            "commandsPending": len(router.latency.pending),
+            "commandTimeouts": {
+                str(chargePoint): timeouts
+                for chargePoint, timeouts in router.latency.timeouts.items()
+            },
+        },
+        "staleTopics": (
+            []
+            if router.watchdog is None
+            else sorted(topic[start:] for topic in router.watchdog.stale)
+        ),
+        "platforms": platformCounters,
+        "topics": topics,
+    }
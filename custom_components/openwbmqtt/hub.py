@@ -0,0 +1,174 @@
+"""The openwbmqtt component for controlling the openWB wallbox via home assistant / MQTT."""
+from __future__ import annotations
+
+from collections.abc import Callable
+import logging
+import os
+from typing import Any
+
+from homeassistant.components import mqtt
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers import config_validation as cv, device_registry as dr
+
+from .const import (
+    DELIVERY_POLICIES,
+    DELIVERY_SUBSCRIPTIONS,
+    openwbSensorEntityDescription,
+)
+from .parsers import compile_sensor_parser
+from .router import OpenWBTopicRouter
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def subscription_filters(roots: list[str]) -> dict[str, int]:
+    """Return the MQTT topic filters that cover the given MQTT roots, with their QoS.
+
+    Each root is covered by the subscriptions of the delivery policy. If all
+    roots share a parent, for example a prefix added by a bridge, and have
+    the same depth, the levels in which they differ are replaced by a + so
+    that one set of subscriptions covers all of them. Otherwise, each root
+    is subscribed on its own.
+    """
+    if not roots:
+        return {}
+    levels = [root.split("/") for root in roots]
+    if os.path.commonprefix(levels) and len({len(parts) for parts in levels}) == 1:
+        scopes = [
+            "/".join(
+                parts[0] if len(set(parts)) == 1 else "+" for parts in zip(*levels)
+            )
+        ]
+    else:
+        scopes = sorted(roots)
+    return {
+        f"{scope}/{topicFilter}": DELIVERY_POLICIES[deliveryClass].qos
+        for scope in scopes
+        for topicFilter, deliveryClass in DELIVERY_SUBSCRIPTIONS.items()
+    }
+
+
+class OpenWBHub:
+    """Integration wide owner of the MQTT subscriptions of all openWB devices.
+
+    The topic routers of the config entries are indexed by their MQTT root.
+    A message is passed to the router whose root is a prefix of the topic,
+    found by looking up the parent levels of the topic in the index on the
+    first message of a topic. The routers of a topic are then cached, so a
+    message costs one dict lookup, independent of the depth of the topic and
+    of the number of openWB devices.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the hub."""
+        self.hass = hass
+        # Topic routers of the config entries, by entry id and by MQTT root.
+        self.routers: dict[str, OpenWBTopicRouter] = {}
+        self._rootIndex: dict[str, OpenWBTopicRouter] = {}
+        # Routers by topic, cleared when the MQTT roots change. openWB
+        # publishes a fixed set of topics, so the cache stays small.
+        self._topicRouters: dict[str, tuple[OpenWBTopicRouter, ...]] = {}
+        self._subscriptions: dict[str, CALLBACK_TYPE] = {}
+        # Compiled sensor parsers, shared by all config entries. The entity
+        # descriptions are module constants, so their id is stable.
+        self._sensorParsers: dict[int, Callable[[str], Any] | None] = {}
+
+    def sensor_parser(
+        self, description: openwbSensorEntityDescription
+    ) -> Callable[[str], Any] | None:
+        """Return the compiled parser of a sensor description."""
+        key = id(description)
+        if key not in self._sensorParsers:
+            self._sensorParsers[key] = compile_sensor_parser(description)
+        return self._sensorParsers[key]
+
+    @callback
+    def async_add_router(self, entryID: str, router: OpenWBTopicRouter) -> None:
+        """Add the topic router of a config entry, before its entities are set up."""
+        self.routers[entryID] = router
+
+    async def async_subscribe_router(self, router: OpenWBTopicRouter) -> None:
+        """Pass the messages below the MQTT root of the router to it."""
+        self._rootIndex[router.mqtt_root] = router
+        self._topicRouters.clear()
+        await self._async_update_subscriptions()
+
+    async def async_remove_router(self, entryID: str) -> OpenWBTopicRouter:
+        """Remove the topic router of a config entry and its subscriptions."""
+        router = self.routers.pop(entryID)
+        self._rootIndex.pop(router.mqtt_root, None)
+        self._topicRouters.clear()
+        await self._async_update_subscriptions()
+        return router
+
+    @callback
+    def routers_for_service(self, data: dict[str, Any]) -> list[OpenWBTopicRouter]:
+        """Return the topic routers of the openWB devices addressed by a service call.
+
+        A call addresses devices, a config entry or an MQTT prefix. Without
+        any of them, it addresses the openWB device if only one is configured.
+        """
+        if deviceIDs := data.get("device_id"):
+            registry = dr.async_get(self.hass)
+            entryIDs = []
+            for deviceID in cv.ensure_list(deviceIDs):
+                if (device := registry.async_get(deviceID)) is not None:
+                    entryIDs.extend(device.config_entries)
+        elif entryID := data.get("config_entry_id"):
+            entryIDs = [entryID]
+        elif mqttPrefix := data.get("mqtt_prefix"):
+            router = self._rootIndex.get(mqttPrefix)
+            return [] if router is None else [router]
+        elif len(self.routers) == 1:
+            entryIDs = list(self.routers)
+        else:
+            entryIDs = []
+        return [
+            self.routers[entryID] for entryID in entryIDs if entryID in self.routers
+        ]
+
+    async def _async_update_subscriptions(self) -> None:
+        """Subscribe to the topic filters of the current MQTT roots.
+
+        New subscriptions are made before the obsolete ones are removed, so
+        that no message is lost in between.
+        """
+        filters = subscription_filters(list(self._rootIndex))
+        for topicFilter, qos in filters.items():
+            if topicFilter not in self._subscriptions:
+                _LOGGER.debug("Subscribe to %s at QoS %s", topicFilter, qos)
+                # The payloads are passed on as raw bytes, the router
+                # decodes only the ones that are parsed as text.
+                self._subscriptions[topicFilter] = await mqtt.async_subscribe(
+                    self.hass,
+                    topicFilter,
+                    self.async_handle_message,
+                    qos,
+                    encoding=None,
+                )
+        for topicFilter in list(self._subscriptions):
+            if topicFilter not in filters:
+                _LOGGER.debug("Unsubscribe from %s", topicFilter)
+                self._subscriptions.pop(topicFilter)()
+
+    @callback
+    def async_handle_message(self, message: mqtt.ReceiveMessage) -> None:
+        """Pass an MQTT message to the routers whose MQTT root matches the topic."""
+        routers = self._topicRouters.get(message.topic)
+        if routers is None:
+            routers = self._async_find_routers(message.topic)
+        for router in routers:
+            router.async_handle_message(message)
+
+    @callback
+    def _async_find_routers(self, topic: str) -> tuple[OpenWBTopicRouter, ...]:
+        """Look up the parent levels of a topic in the index and cache the routers."""
+        routers = []
+        index = topic.find("/")
+        while index != -1:
+            router = self._rootIndex.get(topic[:index])
+            if router is not None:
+                routers.append(router)
+            index = topic.find("/", index + 1)
+        self._topicRouters[topic] = result = tuple(routers)
+        return result
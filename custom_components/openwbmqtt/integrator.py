@@ -0,0 +1,166 @@
+"""The openwbmqtt component for controlling the openWB wallbox via home assistant / MQTT."""
+from __future__ import annotations
+
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from functools import partial
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    DOMAIN,
+    ENERGY_MAX_GAP,
+    ENERGY_SAVE_DELAY,
+    ENERGY_STORAGE_VERSION,
+)
+from .router import OpenWBTopicRouter
+
+
+def energy_store(hass: HomeAssistant, entryID: str) -> Store:
+    """Return the store of the energies of a config entry."""
+    return Store(hass, ENERGY_STORAGE_VERSION, f"{DOMAIN}.{entryID}.energy")
+
+
+def trapezoid(power0: float, power1: float, seconds: float) -> tuple[float, float]:
+    """Return the energy of the positive and the negative power in kWh.
+
+    The power changes linearly between the two samples, given in W. If the
+    sign changes, each part is integrated up to the zero crossing.
+    """
+    if power0 >= 0 and power1 >= 0:
+        return (power0 + power1) * seconds / 7.2e6, 0.0
+    if power0 <= 0 and power1 <= 0:
+        return 0.0, -(power0 + power1) * seconds / 7.2e6
+    crossing = power0 / (power0 - power1) * seconds
+    before = power0 * crossing / 7.2e6
+    after = power1 * (seconds - crossing) / 7.2e6
+    return (before, -after) if power0 > 0 else (after, -before)
+
+
+class OpenWBEnergyIntegrator:
+    """Integrate the power topics of one openWB device into energies.
+
+    The power is integrated in the message path with the trapezoidal rule,
+    on the times at which the topic router received the messages. The
+    energies of the positive and the negative power are kept per topic and
+    stored, so that they continue after a restart. The gap until the first
+    message after a restart is not integrated. The listeners are called once
+    per write interval, independent of the messages. A power topic is
+    registered while it has listeners, the energy of a topic without enabled
+    sensors is not integrated.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        router: OpenWBTopicRouter,
+        entryID: str,
+        interval: float,
+    ) -> None:
+        """Initialize the integrator of a config entry, the interval is given in seconds."""
+        self.hass = hass
+        self.router = router
+        self.interval = interval
+        self._store = energy_store(hass, entryID)
+        # topic relative to the MQTT root -> [energy of the positive power,
+        # energy of the negative power] in kWh
+        self.energies: dict[str, list[float]] = {}
+        # topic relative to the MQTT root -> (timestamp, power) of the last
+        # message
+        self._samples: dict[str, tuple[float, float]] = {}
+        self._listeners: list[Callable[[], None]] = []
+        # topic relative to the MQTT root -> (number of listeners, callback to
+        # remove the topic from the router)
+        self._topics: dict[str, tuple[int, CALLBACK_TYPE]] = {}
+        self._remove: list[CALLBACK_TYPE] = []
+        self._dirty = False
+
+    async def async_load(self) -> None:
+        """Load the stored energies."""
+        data = await self._store.async_load()
+        if data is not None:
+            self.energies.update(data["energies"])
+
+    @callback
+    def async_start(self) -> None:
+        """Start the timer of the write interval."""
+        self._remove.append(
+            async_track_time_interval(
+                self.hass, self._async_write, timedelta(seconds=self.interval)
+            )
+        )
+
+    async def async_stop(self) -> None:
+        """Remove the power topics and save the energies."""
+        for remove in self._remove:
+            remove()
+        self._remove.clear()
+        for _, remove in self._topics.values():
+            remove()
+        self._topics.clear()
+        if self._dirty:
+            await self._store.async_save(self._data())
+
+    @callback
+    def async_listen(self, topic: str, listener: Callable[[], None]) -> CALLBACK_TYPE:
+        """Call the listener once per write interval.
+
+        The power topic, relative to the MQTT root, is registered at the
+        router with its first listener and removed with its last one.
+        """
+        self.energies.setdefault(topic, [0.0, 0.0])
+        count, remove = self._topics.get(topic, (0, None))
+        if remove is None:
+            remove = self.router.async_register(
+                f"{self.router.mqtt_root}/{topic}",
+                partial(self._async_power, topic),
+                float,
+                "sensor",
+            )
+        self._topics[topic] = (count + 1, remove)
+        self._listeners.append(listener)
+
+        @callback
+        def async_remove() -> None:
+            self._listeners.remove(listener)
+            count, remove = self._topics.pop(topic)
+            if count > 1:
+                self._topics[topic] = (count - 1, remove)
+            else:
+                remove()
+                self._samples.pop(topic, None)
+
+        return async_remove
+
+    @callback
+    def _async_write(self, now: datetime) -> None:
+        """Call the listeners."""
+        for listener in self._listeners:
+            listener()
+
+    @callback
+    def _async_power(self, topic: str, power: float) -> None:
+        """Integrate the power since the last message of the topic."""
+        if self.router.message is None:
+            # Replayed payloads of the snapshot have no time.
+            return
+        now = self.router.async_message_time()
+        last = self._samples.get(topic)
+        self._samples[topic] = (now, power)
+        if last is None or not 0 < now - last[0] <= ENERGY_MAX_GAP:
+            return
+        positive, negative = trapezoid(last[1], power, now - last[0])
+        energies = self.energies[topic]
+        energies[0] += positive
+        energies[1] += negative
+        if not self._dirty:
+            self._dirty = True
+            self._store.async_delay_save(self._data, ENERGY_SAVE_DELAY)
+
+    @callback
+    def _data(self) -> dict[str, dict[str, list[float]]]:
+        """Return the data to store."""
+        self._dirty = False
+        return {"energies": self.energies}
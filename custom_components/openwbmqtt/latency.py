@@ -0,0 +1,170 @@
+"""The openwbmqtt component for controlling the openWB wallbox via home assistant / MQTT."""
+from __future__ import annotations
+
+import asyncio
+from bisect import bisect_left
+from collections.abc import Callable
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import COMMAND_CONFIRM_TIMEOUT, LATENCY_BUCKETS
+
+
+def same_payload(a: Any, b: Any) -> bool:
+    """Return True if two payloads carry the same value, for example 16, '16.0' and b'16'."""
+    try:
+        return float(a) == float(b)
+    except (TypeError, ValueError):
+        return _text(a) == _text(b)
+
+
+def _text(payload: Any) -> str:
+    """Return the text of a payload, received payloads are bytes."""
+    if isinstance(payload, bytes):
+        return payload.decode(errors="replace")
+    return str(payload)
+
+
+class OpenWBHistogram:
+    """Histogram of latencies in seconds with fixed buckets."""
+
+    __slots__ = ("bounds", "counts", "total")
+
+    def __init__(self, bounds: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        """Initialize an empty histogram, the last bucket is unbounded."""
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0
+
+    def add(self, value: float) -> None:
+        """Count a latency."""
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += 1
+
+    def percentile(self, percent: float) -> float | None:
+        """Return the upper bound of the bucket that contains the percentile.
+
+        Latencies above the last bound are reported as the last bound.
+        """
+        if not self.total:
+            return None
+        rank = self.total * percent / 100
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                break
+        return self.bounds[min(index, len(self.bounds) - 1)]
+
+
+class OpenWBCommandLatency:
+    """Measure the time from a command until openWB confirms it on the get topic.
+
+    A command is pending until a message of its get topic carries the
+    commanded value, or until the timeout has passed. The latencies and
+    timeouts are kept per charge point, None for the openWB itself.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, timeout: float = COMMAND_CONFIRM_TIMEOUT
+    ) -> None:
+        """Initialize the measurement, the timeout is given in seconds."""
+        self.hass = hass
+        self.timeout = timeout
+        # get topic -> commanded payload, charge point, start time, timer
+        self.pending: dict[str, tuple[Any, int | None, float, asyncio.TimerHandle]] = {}
+        self.histograms: dict[int | None, OpenWBHistogram] = {}
+        self.timeouts: dict[int | None, int] = {}
+        # Topics still pending and the future of callers waiting for them.
+        self._waiters: list[tuple[set[str], asyncio.Future[None]]] = []
+        # Called when the pending commands change.
+        self.listener: Callable[[], None] | None = None
+
+    @callback
+    def async_track(self, topic: str, payload: Any, chargePoint: int | None) -> None:
+        """Start to wait for the confirmation of a command on its get topic.
+
+        A later command to the same topic replaces the pending one.
+        """
+        if (pending := self.pending.pop(topic, None)) is not None:
+            pending[3].cancel()
+        now = self.hass.loop.time()
+        self.pending[topic] = (
+            payload,
+            chargePoint,
+            now,
+            self.hass.loop.call_at(now + self.timeout, self._async_timeout, topic),
+        )
+        self._async_notify()
+
+    @callback
+    def async_confirm(self, topic: str, payload: Any) -> None:
+        """Record the latency if the message confirms the pending command."""
+        expected, chargePoint, start, timer = self.pending[topic]
+        if not same_payload(expected, payload):
+            return
+        del self.pending[topic]
+        timer.cancel()
+        self._async_notify()
+        self.histograms.setdefault(chargePoint, OpenWBHistogram()).add(
+            self.hass.loop.time() - start
+        )
+        if self._waiters:
+            self._async_release(topic)
+
+    @callback
+    def _async_notify(self) -> None:
+        """Call the listener of the pending commands."""
+        if self.listener is not None:
+            self.listener()
+
+    @callback
+    def _async_timeout(self, topic: str) -> None:
+        """Count a command that openWB did not confirm in time."""
+        _, chargePoint, _, _ = self.pending.pop(topic)
+        self._async_notify()
+        self.timeouts[chargePoint] = self.timeouts.get(chargePoint, 0) + 1
+        if self._waiters:
+            self._async_release(topic)
+
+    @callback
+    def async_wait(self, topics: list[str]) -> asyncio.Future[None]:
+        """Return a future that is done once no command of the topics is pending.
+
+        A command is no longer pending when it is confirmed or timed out.
+        """
+        future = self.hass.loop.create_future()
+        waiting = {topic for topic in topics if topic in self.pending}
+        if waiting:
+            self._waiters.append((waiting, future))
+        else:
+            future.set_result(None)
+        return future
+
+    @callback
+    def _async_release(self, topic: str) -> None:
+        """Release the callers that waited for the topic as the last one."""
+        for waiting, future in list(self._waiters):
+            waiting.discard(topic)
+            if not waiting or future.done():
+                self._waiters.remove((waiting, future))
+                if not future.done():
+                    future.set_result(None)
+
+    def percentile(self, chargePoint: int | None, percent: float) -> float | None:
+        """Return a percentile of the latencies of a charge point in seconds."""
+        histogram = self.histograms.get(chargePoint)
+        return None if histogram is None else histogram.percentile(percent)
+
+    @callback
+    def async_cancel(self) -> None:
+        """Stop waiting for the pending commands and release the waiting callers."""
+        for _, _, _, timer in self.pending.values():
+            timer.cancel()
+        self.pending.clear()
+        self._async_notify()
+        for _, future in self._waiters:
+            if not future.done():
+                future.set_result(None)
+        self._waiters.clear()
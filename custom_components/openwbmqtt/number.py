@@ -1,18 +1,20 @@
 """The openwbmqtt component for controlling the openWB wallbox via home assistant / MQTT."""
 from __future__ import annotations
 
-import copy
 import logging
 
 # from sqlalchemy import desc
-from homeassistant.components import mqtt
 from homeassistant.components.number import DOMAIN, NumberEntity, NumberMode
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.util import slugify
 
-from .common import OpenWBBaseEntity
+from .common import (
+    OpenWBBaseEntity,
+    OpenWBTopicBinding,
+    async_add_discovered_entities,
+)
 
 # Import global values.
 from .const import (
@@ -36,19 +38,23 @@ async def async_setup_entry(
 
     numberList = []
 
-    NUMBERS_GLOBAL_COPY = copy.deepcopy(NUMBERS_GLOBAL)
-    for description in NUMBERS_GLOBAL_COPY:
+    for description in NUMBERS_GLOBAL:
         if description.mqttTopicCommand.startswith("/"):
-            description.mqttTopicCommand = f"{mqttRoot}{description.mqttTopicCommand}"
-            description.mqttTopicCurrentValue = f"{mqttRoot}{description.mqttTopicCurrentValue}"
+            topics = OpenWBTopicBinding(
+                currentValue=f"{mqttRoot}{description.mqttTopicCurrentValue}",
+                command=f"{mqttRoot}{description.mqttTopicCommand}",
+            )
         else:
-            description.mqttTopicCommand = f"{mqttRoot}/config/set/{str(description.mqttTopicChargeMode)}/{description.mqttTopicCommand}"
-            description.mqttTopicCurrentValue = f"{mqttRoot}/config/get/{str(description.mqttTopicChargeMode)}/{description.mqttTopicCurrentValue}"
+            topics = OpenWBTopicBinding(
+                currentValue=f"{mqttRoot}/config/get/{str(description.mqttTopicChargeMode)}/{description.mqttTopicCurrentValue}",
+                command=f"{mqttRoot}/config/set/{str(description.mqttTopicChargeMode)}/{description.mqttTopicCommand}",
+            )
 
         numberList.append(
             openWBNumber(
                 unique_id=integrationUniqueID,
                 description=description,
+                topics=topics,
                 device_friendly_name=integrationUniqueID,
                 mqtt_root=mqttRoot,
                 # state=description.min_value,
@@ -56,19 +62,25 @@ async def async_setup_entry(
         )
 
     for chargePoint in range(1, nChargePoints + 1):
-        NUMBERS_PER_LP_COPY = copy.deepcopy(NUMBERS_PER_LP)
-        for description in NUMBERS_PER_LP_COPY:
+        for description in NUMBERS_PER_LP:
             if description.mqttTopicChargeMode:
-                description.mqttTopicCommand = f"{mqttRoot}/config/set/{str(description.mqttTopicChargeMode)}/lp/{str(chargePoint)}/{description.mqttTopicCommand}"
-                description.mqttTopicCurrentValue = f"{mqttRoot}/config/get/{str(description.mqttTopicChargeMode)}/lp/{str(chargePoint)}/{description.mqttTopicCurrentValue}"
+                topics = OpenWBTopicBinding(
+                    currentValue=f"{mqttRoot}/config/get/{str(description.mqttTopicChargeMode)}/lp/{str(chargePoint)}/{description.mqttTopicCurrentValue}",
+                    command=f"{mqttRoot}/config/set/{str(description.mqttTopicChargeMode)}/lp/{str(chargePoint)}/{description.mqttTopicCommand}",
+                    chargePoint=chargePoint,
+                )
             else:  # for manual SoC module
-                description.mqttTopicCommand = f"{mqttRoot}/set/lp/{str(chargePoint)}/{description.mqttTopicCommand}"
-                description.mqttTopicCurrentValue = f"{mqttRoot}/lp/{str(chargePoint)}/{description.mqttTopicCurrentValue}"
+                topics = OpenWBTopicBinding(
+                    currentValue=f"{mqttRoot}/lp/{str(chargePoint)}/{description.mqttTopicCurrentValue}",
+                    command=f"{mqttRoot}/set/lp/{str(chargePoint)}/{description.mqttTopicCommand}",
+                    chargePoint=chargePoint,
+                )
 
             numberList.append(
                 openWBNumber(
                     unique_id=integrationUniqueID,
                     description=description,
+                    topics=topics,
                     nChargePoints=int(nChargePoints),
                     currentChargePoint=chargePoint,
                     device_friendly_name=integrationUniqueID,
@@ -76,7 +88,7 @@ async def async_setup_entry(
                     # state=description.min_value,
                 )
             )
-    async_add_entities(numberList)
+    async_add_discovered_entities(hass, config, async_add_entities, numberList)
 
 
 class openWBNumber(OpenWBBaseEntity, NumberEntity):
@@ -90,6 +102,7 @@ class openWBNumber(OpenWBBaseEntity, NumberEntity):
         device_friendly_name: str,
         mqtt_root: str,
         description: openWBNumberEntityDescription,
+        topics: OpenWBTopicBinding,
         state: float | None = None,
         currentChargePoint: int | None = None,
         nChargePoints: int | None = None,
@@ -105,6 +118,7 @@ class openWBNumber(OpenWBBaseEntity, NumberEntity):
         )
 
         self.entity_description = description
+        self.topics = topics
 
         if nChargePoints:
             self._attr_unique_id = slugify(
@@ -137,17 +151,16 @@ class openWBNumber(OpenWBBaseEntity, NumberEntity):
         """Subscribe to MQTT events."""
 
         @callback
-        def message_received(message):
+        def message_received(value):
             """Handle new MQTT messages."""
-            self._attr_native_value = float(message.payload)
-            self.async_write_ha_state()
+            self._attr_native_value = value
+            self.async_write_ha_state_if_changed(self._attr_native_value)
 
-        # Subscribe to MQTT topic and connect callack message
-        await mqtt.async_subscribe(
-            self.hass,
-            self.entity_description.mqttTopicCurrentValue,
+        # Register the topic at the router and connect callback message
+        self.async_subscribe_topic(
+            self.topics.currentValue,
             message_received,
-            1,
+            float,
         )
 
     async def async_set_native_value(self, value):
@@ -158,13 +171,16 @@ class openWBNumber(OpenWBBaseEntity, NumberEntity):
         Only then, openWB has changed the setting as well.
         """
         self._attr_native_value = value
-        self.publishToMQTT()
+        # Nothing to do if openWB already confirmed the value.
+        self.publishToMQTT(noop=self._reports_state(value))
         # self.async_write_ha_state()
 
-    def publishToMQTT(self):
+    def publishToMQTT(self, noop: bool = False):
         """Publish data to MQTT."""
-        topic = f"{self.entity_description.mqttTopicCommand}"
+        topic = f"{self.topics.command}"
         _LOGGER.debug("MQTT topic: %s", topic)
         payload = str(int(self._attr_native_value))
         _LOGGER.debug("MQTT payload: %s", payload)
-        self.hass.components.mqtt.publish(self.hass, topic, payload)
+        self._router.commands.async_publish(
+            topic, payload, noop, self.topics.currentValue, self.topics.chargePoint
+        )
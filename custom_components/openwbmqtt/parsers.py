@@ -0,0 +1,152 @@
+"""The openwbmqtt component for controlling the openWB wallbox via home assistant / MQTT."""
+from __future__ import annotations
+
+from collections.abc import Callable
+from datetime import datetime, timedelta
+import re
+from typing import Any
+
+from homeassistant.util import dt as dt_util
+
+from .const import openwbSensorEntityDescription
+
+# Keys of the sensors that need a special parser or handler.
+KEY_IP_ADDRESS = "system/IpAddress"
+KEY_VERSION = "system/Version"
+KEY_UPTIME = "system/Uptime"
+KEY_TIME_REMAINING = "TimeRemaining"
+KEY_COUNT_PHASES = "countPhasesInUse"
+
+# Icons of countPhasesInUse, keyed by the raw payload.
+PHASES_ICONS = {
+    "0": "mdi:numeric-0-circle-outline",
+    "1": "mdi:numeric-1-circle-outline",
+    "3": "mdi:numeric-3-circle-outline",
+}
+PHASES_ICON_DEFAULT = "mdi:numeric"
+
+# Output of uptime, for example " 12:33:01 up 3 days, 19:02,  0 users,  load average: ..."
+_UPTIME = re.compile(r".*\sup\s(.*),.*\d*user.*")
+_UPTIME_DAYS = re.compile(r"(\d*)\sday")
+_UPTIME_AFTER_DAYS = re.compile(r".*,\s(.*)")
+_UPTIME_MINUTES = re.compile(r"(\d*)\s*min")
+_UPTIME_HOURS_MINUTES = re.compile(r"\s?(\d*):0?(\d*)")
+
+
+def parse_uptime(payload: str) -> str:
+    """Reformat the output of uptime to 'd h min'."""
+    reluptime = _UPTIME.match(payload)[1]
+    days = 0
+    if match := _UPTIME_DAYS.match(reluptime):
+        days = match[1]
+        reluptime = _UPTIME_AFTER_DAYS.match(reluptime)[1]
+    if "min" in reluptime:
+        hours = 0
+        mins = _UPTIME_MINUTES.match(reluptime)[1]
+    else:
+        hours, mins = _UPTIME_HOURS_MINUTES.match(reluptime).group(1, 2)
+    return f"{days} d {hours} h {mins} min"
+
+
+def parse_time_remaining(payload: str) -> datetime | None:
+    """Convert the remaining charge time, for example '1 H 20 Min', to a timestamp."""
+    if "H" in payload:
+        tmp = payload.split()
+        return dt_util.utcnow() + timedelta(hours=int(tmp[0]), minutes=int(tmp[2]))
+    if "Min" in payload:
+        return dt_util.utcnow() + timedelta(minutes=int(payload.split()[0]))
+    return None
+
+
+def decode_payload(payload: bytes | str, errors: str = "strict") -> str:
+    """Return a payload as text, the payloads of a snapshot are text already."""
+    return payload.decode(errors=errors) if isinstance(payload, bytes) else payload
+
+
+def accepts_bytes(parser: Callable[[Any], Any] | None) -> bool:
+    """Return True if a parser can be called with the raw bytes of a payload.
+
+    int and float parse bytes as they are, the other parsers get the text.
+    """
+    return parser is int or parser is float or hasattr(parser, "acceptsBytes")
+
+
+def text_parser(parser: Callable[[str], Any] | None) -> Callable[[Any], Any]:
+    """Return a parser that decodes the raw bytes for a parser of text."""
+    if parser is None:
+        return decode_payload
+
+    def parse_text(payload: bytes | str) -> Any:
+        return parser(decode_payload(payload))
+
+    return parse_text
+
+
+def compile_numeric_parser(
+    scale: float | None, digits: int | None
+) -> Callable[[bytes | str], float | int]:
+    """Return a parser of a numeric payload that is scaled and rounded.
+
+    float parses the raw bytes of a payload directly. The scale, which
+    includes the sign, and the digits are constants of the parser. Without
+    digits, integer values are returned as int, like openWB publishes them.
+    """
+    # round() without digits returns an int.
+    ndigits = digits or None
+    if digits is None:
+        factor = 1.0 if scale is None else scale
+
+        def parse_number(payload: bytes | str) -> float | int:
+            value = float(payload) * factor
+            return int(value) if value.is_integer() else value
+
+    elif scale is None:
+
+        def parse_number(payload: bytes | str) -> float | int:
+            return round(float(payload), ndigits)
+
+    else:
+
+        def parse_number(payload: bytes | str) -> float | int:
+            return round(float(payload) * scale, ndigits)
+
+    parse_number.acceptsBytes = True
+    return parse_number
+
+
+def _compile_value_map(
+    valueMap: dict, value_fn: Callable | None
+) -> Callable[[str], Any]:
+    """Return a parser that maps the payload with a lookup table."""
+    # Lookup table keyed by the raw payload; other spellings of the keys
+    # (for example '01') fall back to the conversion to int.
+    table = {str(key): value for key, value in valueMap.items()}
+
+    def parse_value_map(payload: str) -> Any:
+        if value_fn is None and payload in table:
+            return table[payload]
+        value = payload if value_fn is None else value_fn(payload)
+        try:
+            return valueMap.get(int(value))
+        except ValueError:
+            return value
+
+    return parse_value_map
+
+
+def compile_sensor_parser(
+    description: openwbSensorEntityDescription,
+) -> Callable[[str], Any] | None:
+    """Return the parser chain of a sensor description.
+
+    None means that the payload is used as it is.
+    """
+    if description.key == KEY_UPTIME:
+        return parse_uptime
+    if description.key == KEY_TIME_REMAINING:
+        return parse_time_remaining
+    if description.valueMap is not None:
+        return _compile_value_map(description.valueMap, description.value_fn)
+    if description.numeric:
+        return compile_numeric_parser(description.scale, description.digits)
+    return description.value_fn
@@ -0,0 +1,177 @@
+"""The openwbmqtt component for controlling the openWB wallbox via home assistant / MQTT."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from functools import partial
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+from .const import POWER_FLOW_DELAY
+from .router import OpenWBTopicRouter
+
+# Topics of the inputs, relative to the MQTT root, in the order of the state
+# vector. The power of the charge points follows.
+POWER_FLOW_TOPICS = ("pv/W", "evu/W", "housebattery/W", "global/WAllChargePoints")
+
+
+def power_flow(
+    pv: float, grid: float, battery: float, chargePoints: float
+) -> dict[str, float]:
+    """Split the power of the sources among the consumers, in W.
+
+    The arguments follow openWB: pv is negative while producing, grid is
+    positive while importing and battery is positive while charging. The
+    house consumption is the remainder of the power balance. Export and
+    battery charging are supplied by PV first, the house and the charge
+    points share the remaining sources in proportion.
+    """
+    production = max(0.0, -pv)
+    gridImport = max(0.0, grid)
+    gridExport = max(0.0, -grid)
+    batteryCharge = max(0.0, battery)
+    batteryDischarge = max(0.0, -battery)
+    chargePoints = max(0.0, chargePoints)
+    house = max(0.0, production + grid - battery - chargePoints)
+
+    pvToGrid = min(production, gridExport)
+    batteryToGrid = min(batteryDischarge, gridExport - pvToGrid)
+    pvToBattery = min(production - pvToGrid, batteryCharge)
+    gridToBattery = min(gridImport, batteryCharge - pvToBattery)
+    pvLeft = production - pvToGrid - pvToBattery
+    gridLeft = gridImport - gridToBattery
+    batteryLeft = batteryDischarge - batteryToGrid
+    pool = pvLeft + gridLeft + batteryLeft
+    if pool > 0:
+        pvShare = pvLeft / pool
+        gridShare = gridLeft / pool
+        batteryShare = batteryLeft / pool
+    else:
+        pvShare = gridShare = batteryShare = 0.0
+    consumption = house + chargePoints
+    gridToConsumers = gridShare * consumption
+    return {
+        "house": house,
+        "pvToHouse": pvShare * house,
+        "pvToChargePoints": pvShare * chargePoints,
+        "pvToBattery": pvToBattery,
+        "pvToGrid": pvToGrid,
+        "gridToHouse": gridShare * house,
+        "gridToChargePoints": gridShare * chargePoints,
+        "gridToBattery": gridToBattery,
+        "batteryToHouse": batteryShare * house,
+        "batteryToChargePoints": batteryShare * chargePoints,
+        "batteryToGrid": batteryToGrid,
+        "selfSufficiency": (
+            100 * (1 - gridToConsumers / consumption) if consumption > 0 else None
+        ),
+    }
+
+
+class OpenWBPowerFlow:
+    """Power flows of one openWB device, computed from its power topics.
+
+    The inputs are kept in a state vector. A changed input schedules one
+    computation of the flows after a short delay, so that the inputs of one
+    control cycle are combined, and the listeners are called once with the
+    new flows. The PV share of the power of each charge point is computed
+    as well. The input topics are registered while the engine has listeners,
+    so the engine costs nothing if all its sensors are disabled.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        router: OpenWBTopicRouter,
+        nChargePoints: int,
+        delay: float = POWER_FLOW_DELAY,
+    ) -> None:
+        """Initialize the engine, the delay is given in seconds."""
+        self.hass = hass
+        self.router = router
+        self.nChargePoints = nChargePoints
+        self.delay = delay
+        self._inputs = [0.0] * (len(POWER_FLOW_TOPICS) + nChargePoints)
+        self._received = [False] * len(self._inputs)
+        self._scheduled: asyncio.TimerHandle | None = None
+        self._listeners: list[Callable[[], None]] = []
+        self._remove: list[CALLBACK_TYPE] = []
+        # Flows of the openWB and PV power of the charge points, by number.
+        self.flows: dict[str, float | None] = {}
+        self.chargePointsPV: dict[int, float] = {}
+        self.computations = 0
+
+    @callback
+    def async_start(self) -> None:
+        """Register the input topics at the topic router."""
+        topics = list(POWER_FLOW_TOPICS) + [
+            f"lp/{chargePoint}/W" for chargePoint in range(1, self.nChargePoints + 1)
+        ]
+        for index, topic in enumerate(topics):
+            self._remove.append(
+                self.router.async_register(
+                    f"{self.router.mqtt_root}/{topic}",
+                    partial(self._async_input, index),
+                    float,
+                )
+            )
+
+    @callback
+    def async_stop(self) -> None:
+        """Remove the input topics and the scheduled computation."""
+        for remove in self._remove:
+            remove()
+        self._remove.clear()
+        if self._scheduled is not None:
+            self._scheduled.cancel()
+            self._scheduled = None
+
+    @callback
+    def async_listen(self, listener: Callable[[], None]) -> CALLBACK_TYPE:
+        """Call the listener after each computation of the flows.
+
+        The first listener starts the engine, removing the last one stops it.
+        """
+        if not self._listeners:
+            self.async_start()
+        self._listeners.append(listener)
+
+        @callback
+        def async_remove() -> None:
+            self._listeners.remove(listener)
+            if not self._listeners:
+                self.async_stop()
+
+        return async_remove
+
+    @callback
+    def _async_input(self, index: int, value: float) -> None:
+        """Update an input and schedule the computation if it changed or is new."""
+        if self._received[index] and self._inputs[index] == value:
+            return
+        self._received[index] = True
+        self._inputs[index] = value
+        if self._scheduled is None:
+            self._scheduled = self.hass.loop.call_later(self.delay, self._async_compute)
+
+    @callback
+    def _async_compute(self) -> None:
+        """Compute the flows from the state vector and notify the listeners."""
+        self._scheduled = None
+        # The flows are unknown until PV, grid and charge points are known.
+        if not (self._received[0] and self._received[1] and self._received[3]):
+            return
+        self.computations += 1
+        pv, grid, battery, chargePoints = self._inputs[: len(POWER_FLOW_TOPICS)]
+        flows = power_flow(pv, grid, battery, chargePoints)
+        self.flows = {
+            key: None if value is None else round(value, 1)
+            for key, value in flows.items()
+        }
+        pvShare = flows["pvToChargePoints"] / chargePoints if chargePoints > 0 else 0
+        for chargePoint, power in enumerate(
+            self._inputs[len(POWER_FLOW_TOPICS) :], start=1
+        ):
+            self.chargePointsPV[chargePoint] = round(max(0.0, power) * pvShare)
+        for listener in self._listeners:
+            listener()
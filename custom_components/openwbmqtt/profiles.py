@@ -0,0 +1,179 @@
+"""The openwbmqtt component for controlling the openWB wallbox via home assistant / MQTT."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import ServiceValidationError
+
+from .common import OpenWBTopicBinding
+from .const import (
+    CHARGE_LIMITATIONS,
+    CHARGE_PROFILE_TIMEOUT,
+    GLOBAL_CHARGE_MODES,
+    SERVICE_TOPICS_GLOBAL,
+    SERVICE_TOPICS_PER_LP,
+)
+from .latency import same_payload
+from .router import OpenWBTopicRouter
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def command_topics(
+    mqttRoot: str, nChargePoints: int
+) -> dict[tuple[str, int | None], OpenWBTopicBinding]:
+    """Return the topics of the settings of the services for one openWB device.
+
+    The table is keyed by the setting and the charge point, None for the
+    settings of the openWB itself.
+    """
+    topics = {
+        (setting, None): OpenWBTopicBinding(
+            currentValue=f"{mqttRoot}/{currentValue}",
+            command=f"{mqttRoot}/{command}",
+        )
+        for setting, (command, currentValue) in SERVICE_TOPICS_GLOBAL.items()
+    }
+    for chargePoint in range(1, nChargePoints + 1):
+        for setting, (command, currentValue) in SERVICE_TOPICS_PER_LP.items():
+            topics[setting, chargePoint] = OpenWBTopicBinding(
+                currentValue=f"{mqttRoot}/{currentValue.format(chargePoint=chargePoint)}",
+                command=f"{mqttRoot}/{command.format(chargePoint=chargePoint)}",
+                chargePoint=chargePoint,
+            )
+    return topics
+
+
+@callback
+def async_publish_setting(
+    router: OpenWBTopicRouter,
+    setting: str,
+    chargePoint: int | None,
+    payload: str,
+    immediate: bool = True,
+    onlyChanged: bool = False,
+) -> OpenWBTopicBinding:
+    """Publish a setting through the command coalescer of the router.
+
+    A service call is an explicit request, so the command is published
+    right away and unconditionally. With onlyChanged, it is dropped if
+    openWB already reports the payload.
+    """
+    topics = router.commandTopics.get((setting, chargePoint))
+    if topics is None:
+        raise ServiceValidationError(
+            f"Charge point {chargePoint} is not configured for {router.mqtt_root}"
+        )
+    router.commands.async_publish(
+        topics.command,
+        payload,
+        noop=onlyChanged
+        and same_payload(router.reported_payload(topics.currentValue), payload),
+        confirmTopic=topics.currentValue,
+        chargePoint=chargePoint,
+        immediate=immediate,
+    )
+    return topics
+
+
+def status_payload(value: Any) -> str:
+    """Return the payload of an 'On' / 'Off' selection."""
+    return str(1) if value == "On" else str(0)
+
+
+def charge_profile_settings(data: dict[str, Any]) -> list[tuple[str, int | None, str]]:
+    """Return the settings, charge points and payloads given in the data of a service call.
+
+    Settings missing in the data are left unchanged.
+    """
+    settings = []
+    if (chargeMode := data.get("global_charge_mode")) is not None:
+        settings.append(
+            ("global_charge_mode", None, str(GLOBAL_CHARGE_MODES.get(chargeMode, 4)))
+        )
+    chargePoints = data.get("charge_point_ids") or []
+    if not isinstance(chargePoints, list):
+        chargePoints = [chargePoints]
+    limitation = data.get("charge_limitation")
+    for chargePoint in sorted({int(chargePoint) for chargePoint in chargePoints}):
+        if (status := data.get("charge_point_enabled")) is not None:
+            settings.append(
+                ("charge_point_enabled", chargePoint, status_payload(status))
+            )
+        if limitation is not None:
+            settings.append(
+                (
+                    "charge_limitation",
+                    chargePoint,
+                    str(CHARGE_LIMITATIONS.get(limitation, 0)),
+                )
+            )
+            if limitation == "kWh" and data.get("energy_to_charge") is not None:
+                settings.append(
+                    ("energy_to_charge", chargePoint, str(data["energy_to_charge"]))
+                )
+            elif limitation == "SOC" and data.get("required_soc") is not None:
+                settings.append(
+                    ("required_soc", chargePoint, str(data["required_soc"]))
+                )
+        if (current := data.get("target_current")) is not None:
+            settings.append(("target_current", chargePoint, str(current)))
+        if (status := data.get("price_based_charging")) is not None:
+            settings.append(
+                ("price_based_charging", chargePoint, status_payload(status))
+            )
+    return settings
+
+
+async def async_apply_charge_profile(
+    hass: HomeAssistant,
+    router: OpenWBTopicRouter,
+    data: dict[str, Any],
+) -> dict[str, Any]:
+    """Publish the settings of a charge profile that differ from the current values.
+
+    All commands are published at once, without the settle window. If
+    requested, wait until openWB confirmed all commands or the timeout has
+    passed. Return the topics of the changed, unchanged, confirmed and
+    unconfirmed settings, relative to the MQTT root.
+    """
+    start = len(router.mqtt_root) + 1
+    changed = []
+    unchanged = []
+    for setting, chargePoint, payload in charge_profile_settings(data):
+        topics = async_publish_setting(
+            router, setting, chargePoint, payload, onlyChanged=True
+        )
+        if same_payload(router.reported_payload(topics.currentValue), payload):
+            unchanged.append(topics.currentValue)
+        else:
+            changed.append((topics.currentValue, payload))
+    _LOGGER.debug(
+        "Charge profile of %s: %d changed, %d unchanged settings",
+        router.mqtt_root,
+        len(changed),
+        len(unchanged),
+    )
+
+    result: dict[str, Any] = {
+        "changed": [topic[start:] for topic, _ in changed],
+        "unchanged": [topic[start:] for topic in unchanged],
+    }
+    if not data.get("wait_for_confirmation"):
+        return result
+    try:
+        await asyncio.wait_for(
+            router.latency.async_wait([topic for topic, _ in changed]),
+            data.get("timeout", CHARGE_PROFILE_TIMEOUT),
+        )
+    except asyncio.TimeoutError:
+        pass
+    result["confirmed"] = []
+    result["unconfirmed"] = []
+    for topic, payload in changed:
+        confirmed = same_payload(router.reported_payload(topic), payload)
+        result["confirmed" if confirmed else "unconfirmed"].append(topic[start:])
+    return result
@@ -0,0 +1,140 @@
+"""The openwbmqtt component for controlling the openWB wallbox via home assistant / MQTT."""
+from __future__ import annotations
+
+from array import array
+from collections import deque
+from collections.abc import Callable
+import time
+
+from homeassistant.core import CALLBACK_TYPE, callback
+
+from .const import ROLLING_CAPACITY, ROLLING_WINDOWS
+from .router import OpenWBTopicRouter
+
+
+class OpenWBRollingStatistics:
+    """Minimum, maximum and mean of one topic over rolling time windows.
+
+    The samples are kept in a ring buffer of a fixed capacity, shared by all
+    windows, and addressed by their sequence number. Each window keeps the
+    sequence number of its first sample, the sum of its samples and two
+    monotonic deques with the candidates for its minimum and maximum. A
+    sample is added and removed from each window once, so an update costs
+    constant time. The rounding error of the running sums of power values
+    stays far below the precision of the sensors. If the topic is published
+    faster than the capacity allows, the windows are limited to the last
+    capacity samples.
+
+    If a router and a topic are given, the topic is registered while the
+    statistics have listeners. Its payloads are parsed with the parser, which
+    applies the scale of the sensor of the topic. Replayed payloads of the
+    snapshot are no samples of the windows and are skipped.
+    """
+
+    def __init__(
+        self,
+        windows: tuple[int, ...] = ROLLING_WINDOWS,
+        capacity: int = ROLLING_CAPACITY,
+        router: OpenWBTopicRouter | None = None,
+        topic: str | None = None,
+        parser: Callable[[bytes | str], float] = float,
+    ) -> None:
+        """Initialize empty windows, their lengths are given in seconds."""
+        self.windows = windows
+        self.capacity = capacity
+        self.router = router
+        self.topic = topic
+        self.parser = parser
+        self._remove: CALLBACK_TYPE | None = None
+        self._times = array("d", bytes(8 * capacity))
+        self._values = array("d", bytes(8 * capacity))
+        # Sequence number of the next sample.
+        self._next = 0
+        self._starts = [0] * len(windows)
+        self._sums = [0.0] * len(windows)
+        self._minima: list[deque[int]] = [deque() for _ in windows]
+        self._maxima: list[deque[int]] = [deque() for _ in windows]
+        self._listeners: list[Callable[[], None]] = []
+
+    def add(self, now: float, value: float) -> None:
+        """Add a sample taken at the given monotonic time."""
+        capacity = self.capacity
+        values = self._values
+        times = self._times
+        sequence = self._next
+        overwritten = sequence - capacity
+        for index, length in enumerate(self.windows):
+            minima = self._minima[index]
+            maxima = self._maxima[index]
+            start = self._starts[index]
+            total = self._sums[index]
+            # Remove the sample whose slot is taken by the new sample.
+            if start == overwritten:
+                total -= values[start % capacity]
+                if minima[0] == start:
+                    minima.popleft()
+                if maxima[0] == start:
+                    maxima.popleft()
+                start += 1
+            while minima and values[minima[-1] % capacity] >= value:
+                minima.pop()
+            minima.append(sequence)
+            while maxima and values[maxima[-1] % capacity] <= value:
+                maxima.pop()
+            maxima.append(sequence)
+            # Remove the samples that left the window.
+            limit = now - length
+            while start < sequence and times[start % capacity] <= limit:
+                total -= values[start % capacity]
+                if minima[0] == start:
+                    minima.popleft()
+                if maxima[0] == start:
+                    maxima.popleft()
+                start += 1
+            self._starts[index] = start
+            self._sums[index] = total + value
+        values[sequence % capacity] = value
+        times[sequence % capacity] = now
+        self._next = sequence + 1
+
+    def minimum(self, index: int) -> float | None:
+        """Return the minimum of a window."""
+        minima = self._minima[index]
+        return self._values[minima[0] % self.capacity] if minima else None
+
+    def maximum(self, index: int) -> float | None:
+        """Return the maximum of a window."""
+        maxima = self._maxima[index]
+        return self._values[maxima[0] % self.capacity] if maxima else None
+
+    def mean(self, index: int) -> float | None:
+        """Return the mean of the samples of a window."""
+        count = self._next - self._starts[index]
+        return self._sums[index] / count if count else None
+
+    @callback
+    def async_listen(self, listener: Callable[[], None]) -> CALLBACK_TYPE:
+        """Call the listener after each sample."""
+        if self.router is not None and not self._listeners:
+            self._remove = self.router.async_register(
+                self.topic, self.async_received, self.parser, "sensor"
+            )
+        self._listeners.append(listener)
+
+        @callback
+        def async_remove() -> None:
+            self._listeners.remove(listener)
+            if self._remove is not None and not self._listeners:
+                self._remove()
+                self._remove = None
+
+        return async_remove
+
+    @callback
+    def async_received(self, value: float) -> None:
+        """Add a parsed message of the topic and notify the listeners."""
+        if self.router is not None and self.router.message is None:
+            return
+        self.add(time.monotonic(), value)
+        for listener in self._listeners:
+            listener()
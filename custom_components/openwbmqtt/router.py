@@ -0,0 +1,480 @@
+"""The openwbmqtt component for controlling the openWB wallbox via home assistant / MQTT."""
+from __future__ import annotations
+
+from collections.abc import Callable
+import logging
+import time
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.components import mqtt
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+from .batching import OpenWBStateBatcher
+from .commands import OpenWBCommandCoalescer
+from .const import TRAFFIC_TIMING_INTERVAL, openwbDeliveryPolicy
+from .delivery import delivery_policy
+from .latency import OpenWBCommandLatency
+from .parsers import accepts_bytes, decode_payload, text_parser
+from .snapshot import OpenWBSnapshot, snapshot_topic
+from .watchdog import OpenWBTopicWatchdog
+
+if TYPE_CHECKING:
+    from .common import OpenWBTopicBinding
+    from .sessions import OpenWBSessionTracker
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class OpenWBTopicStats:
+    """Traffic counters of one topic.
+
+    unchanged counts the messages that repeat the last payload of the topic.
+    retainedReplayed counts the retained messages that the delivery policy of
+    the topic passes on as no live samples.
+    handlerTime is the cumulative time of parsers and handlers in nanoseconds,
+    estimated from a sample of the messages.
+    """
+
+    __slots__ = (
+        "messages",
+        "unchanged",
+        "stateWrites",
+        "parseErrors",
+        "handlerTime",
+        "retainedReplayed",
+    )
+
+    def __init__(self) -> None:
+        """Initialize the counters."""
+        self.messages = 0
+        self.unchanged = 0
+        self.stateWrites = 0
+        self.parseErrors = 0
+        self.handlerTime = 0
+        self.retainedReplayed = 0
+
+    def as_dict(self) -> dict[str, int]:
+        """Return the counters."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class OpenWBTopicRouter:
+    """Dispatch the messages of one openWB device to its entities.
+
+    Instead of one MQTT subscription per entity, the hub subscribes to
+    mqttroot/# and passes the messages of the device to its router. Entities
+    register a handler for their topic together with an optional parser.
+    Handlers of the same topic that share a parser receive the value of one
+    single parser call.
+
+    The payloads arrive as raw bytes. Numeric parsers read the bytes, the
+    other parsers are wrapped once to decode the text first.
+    """
+
+    def __init__(self, hass: HomeAssistant, mqtt_root: str) -> None:
+        """Initialize the router for one openWB device."""
+        self.hass = hass
+        self.mqtt_root = mqtt_root
+        # topic -> parser -> handlers
+        self._routes: dict[str, dict[Callable | None, list[Callable]]] = {}
+        # Last payload per topic, replayed to handlers registered later on.
+        self._lastPayloads: dict[str, Any] = {}
+        # Topics whose last payload was restored from the snapshot and has
+        # not been received from openWB since.
+        self._restored: set[str] = set()
+        # Parsers of text, wrapped to decode the payload.
+        self._textParsers: dict[Callable | None, Callable] = {}
+        # Actions waiting for the first message of a topic.
+        self._topicWatchers: dict[str, list[Callable[[], None]]] = {}
+        # Topics ever registered or watched, their payloads are kept in the
+        # snapshot.
+        self._snapshotTopics: set[str] = set()
+        # Number of state writes, and of the ones skipped because the state
+        # did not change.
+        self.stateWrites = 0
+        self.suppressedWrites = 0
+        # Traffic counters per topic and the platforms of the entities that
+        # registered the topic.
+        self.topicStats: dict[str, OpenWBTopicStats] = {}
+        self.topicPlatforms: dict[str, set[str]] = {}
+        self._untimedMessages = TRAFFIC_TIMING_INTERVAL
+        # Optional batching of the state writes of the entities.
+        self.batcher: OpenWBStateBatcher | None = None
+        # Coalescer of the commands published by the entities.
+        self.commands: OpenWBCommandCoalescer | None = None
+        # Confirmation latency of the commands.
+        self._latency: OpenWBCommandLatency | None = None
+        # Topics of the settings changed by the services, by setting and
+        # charge point.
+        self.commandTopics: dict[tuple[str, int | None], OpenWBTopicBinding] = {}
+        # Optional snapshot of the payloads, saved when a payload changes.
+        self.snapshot: OpenWBSnapshot | None = None
+        # Optional watchdog of the topics that stopped being published.
+        self._watchdog: OpenWBTopicWatchdog | None = None
+        # Whether a message may have to be passed to the restored topics,
+        # the watchers, the watchdog or the pending commands.
+        self._hooks = False
+        # Optional tracker of the charge sessions.
+        self.sessions: OpenWBSessionTracker | None = None
+        # The message passed to the handlers, None while payloads are replayed.
+        self.message: mqtt.ReceiveMessage | None = None
+        # Clock of the receive times in seconds since the epoch, and the
+        # receive time of the message, read once it is needed.
+        self.clock: Callable[[], float] = time.time
+        self._messageTime: float | None = None
+        # Delivery policy by topic, None for topics that are not subscribed.
+        self._policies: dict[str, openwbDeliveryPolicy | None] = {}
+
+    @property
+    def latency(self) -> OpenWBCommandLatency | None:
+        """Return the confirmation latency of the commands."""
+        return self._latency
+
+    @latency.setter
+    def latency(self, latency: OpenWBCommandLatency | None) -> None:
+        """Measure the confirmation latency of the commands."""
+        self._latency = latency
+        if latency is not None:
+            latency.listener = self._async_update_hooks
+        self._async_update_hooks()
+
+    @property
+    def watchdog(self) -> OpenWBTopicWatchdog | None:
+        """Return the watchdog of the topics that stopped being published."""
+        return self._watchdog
+
+    @watchdog.setter
+    def watchdog(self, watchdog: OpenWBTopicWatchdog | None) -> None:
+        """Watch the topics that stopped being published."""
+        self._watchdog = watchdog
+        self._async_update_hooks()
+
+    @callback
+    def _async_update_hooks(self) -> None:
+        """Update whether the messages have to be passed to the hooks."""
+        self._hooks = bool(
+            self._restored
+            or self._topicWatchers
+            or self._watchdog is not None
+            or (self._latency is not None and self._latency.pending)
+        )
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Stop the pending work of the router."""
+        if self.batcher is not None:
+            self.batcher.async_flush()
+        if self.commands is not None:
+            self.commands.async_flush()
+        if self.latency is not None:
+            self.latency.async_cancel()
+        if self.watchdog is not None:
+            self.watchdog.async_stop()
+
+    @callback
+    def async_restore_payloads(self, payloads: dict[str, str]) -> None:
+        """Restore the payloads of a snapshot, before the entities are registered.
+
+        The topics of the snapshot are relative to the MQTT root.
+        """
+        for topic, payload in payloads.items():
+            if not snapshot_topic(topic):
+                continue
+            topic = f"{self.mqtt_root}/{topic}"
+            if topic not in self._lastPayloads:
+                self._lastPayloads[topic] = payload
+                self._restored.add(topic)
+        self._async_update_hooks()
+
+    def last_payload(self, topic: str) -> Any:
+        """Return the last payload of a topic, None if it was not received yet.
+
+        The payload is bytes, or text if it was restored from the snapshot.
+        """
+        return self._lastPayloads.get(topic)
+
+    def reported_payload(self, topic: str) -> Any:
+        """Return the last payload that openWB published in this run, None if not received yet.
+
+        A payload restored from the snapshot may be outdated, for example if
+        a setting was changed on the wallbox while Home Assistant was down.
+        """
+        return None if topic in self._restored else self._lastPayloads.get(topic)
+
+    def is_restored(self, topic: str) -> bool:
+        """Return True if the last payload of the topic was restored from the snapshot."""
+        return topic in self._restored
+
+    @callback
+    def snapshot_payloads(self) -> dict[str, str]:
+        """Return the last payloads of the topics of interest for the snapshot."""
+        start = len(self.mqtt_root) + 1
+        return {
+            topic[start:]: decode_payload(payload, "replace")
+            for topic, payload in self._lastPayloads.items()
+            if payload and topic in self._snapshotTopics
+        }
+
+    @callback
+    def async_register(
+        self,
+        topic: str,
+        handler: Callable[[Any], None],
+        parser: Callable[[Any], Any] | None = None,
+        platform: str | None = None,
+    ) -> CALLBACK_TYPE:
+        """Register a handler for a topic and return a callback to remove it.
+
+        If the topic has already been received, the handler is called with the
+        last payload right away, like the broker does for retained messages.
+        The platform of the handler is used to group the traffic counters.
+        """
+        self._async_add_snapshot_topic(topic)
+        if platform is not None:
+            self.topicPlatforms.setdefault(topic, set()).add(platform)
+        if not accepts_bytes(parser):
+            if parser not in self._textParsers:
+                self._textParsers[parser] = text_parser(parser)
+            parser = self._textParsers[parser]
+        handlers = self._routes.setdefault(topic, {}).setdefault(parser, [])
+        handlers.append(handler)
+
+        if topic in self._lastPayloads:
+            self._async_dispatch(topic, parser, [handler], self._lastPayloads[topic])
+
+        @callback
+        def async_remove() -> None:
+            handlers.remove(handler)
+            if not handlers:
+                route = self._routes[topic]
+                del route[parser]
+                if not route:
+                    del self._routes[topic]
+
+        return async_remove
+
+    @callback
+    def _async_add_snapshot_topic(self, topic: str) -> None:
+        """Keep the payloads of the topic in the snapshot, unless it is excluded."""
+        if topic not in self._snapshotTopics and snapshot_topic(
+            topic[len(self.mqtt_root) + 1 :]
+        ):
+            self._snapshotTopics.add(topic)
+
+    @callback
+    def async_watch_topic(
+        self, topic: str, action: Callable[[], None]
+    ) -> CALLBACK_TYPE:
+        """Call the action once the topic has been published with a payload.
+
+        Returns a callback to stop watching the topic.
+        """
+        self._async_add_snapshot_topic(topic)
+        if self._lastPayloads.get(topic):
+            action()
+            return lambda: None
+
+        watchers = self._topicWatchers.setdefault(topic, [])
+        watchers.append(action)
+        self._hooks = True
+
+        @callback
+        def async_remove() -> None:
+            if action in watchers:
+                watchers.remove(action)
+            if not watchers and self._topicWatchers.get(topic) is watchers:
+                del self._topicWatchers[topic]
+                self._async_update_hooks()
+
+        return async_remove
+
+    @callback
+    def async_handle_message(self, message: mqtt.ReceiveMessage) -> None:
+        """Handle new MQTT messages.
+
+        The traffic counters cost a dict lookup and a few increments per
+        message, so they are always on. The snapshot is only scheduled if a
+        payload changed, the other hooks are skipped with one check while
+        none of them is active. The handlers are called inline, only the
+        timed messages go through _async_route.
+        """
+        topic = message.topic
+        payload = message.payload
+        stats = self.topicStats.get(topic)
+        if stats is None:
+            stats = self.topicStats[topic] = OpenWBTopicStats()
+        stats.messages += 1
+        # Retained messages only arrive after subscribing, so the delivery
+        # policy costs nothing for the live messages. A retained message
+        # that is no live sample is passed on like a replayed payload.
+        live = True
+        if message.retain and not self._async_retained_is_live(topic):
+            live = False
+            stats.retainedReplayed += 1
+        if self._lastPayloads.get(topic) == payload:
+            stats.unchanged += 1
+        else:
+            self._lastPayloads[topic] = payload
+            if self.snapshot is not None and topic in self._snapshotTopics:
+                self.snapshot.async_schedule_save()
+        if self._hooks:
+            self._async_run_hooks(topic, payload, live)
+        route = self._routes.get(topic)
+        if route is None:
+            return
+        stateWrites = self.stateWrites
+        self.message = message if live else None
+        self._untimedMessages -= 1
+        if self._untimedMessages:
+            for parser, handlers in route.items():
+                try:
+                    value = payload if parser is None else parser(payload)
+                except ValueError:
+                    _LOGGER.debug(
+                        "Unable to parse payload %s of topic %s", payload, topic
+                    )
+                    stats.parseErrors += 1
+                    continue
+                for handler in handlers:
+                    try:
+                        handler(value)
+                    except Exception:  # pylint: disable=broad-except
+                        _LOGGER.exception(
+                            "Error handling payload %s of topic %s", payload, topic
+                        )
+        else:
+            # Reading the clock costs more than the counters, so only
+            # every TRAFFIC_TIMING_INTERVAL-th message is timed.
+            self._untimedMessages = TRAFFIC_TIMING_INTERVAL
+            start = time.perf_counter_ns()
+            stats.parseErrors += self._async_route(topic, route, payload)
+            stats.handlerTime += (
+                time.perf_counter_ns() - start
+            ) * TRAFFIC_TIMING_INTERVAL
+        self.message = None
+        self._messageTime = None
+        if self.stateWrites != stateWrites:
+            stats.stateWrites += self.stateWrites - stateWrites
+
+    @callback
+    def _async_run_hooks(self, topic: str, payload: Any, live: bool) -> None:
+        """Pass a message to the hooks that wait for it.
+
+        A retained message that is no live sample does not feed the watchdog.
+        """
+        if self._restored:
+            self._restored.discard(topic)
+            if not self._restored:
+                self._async_update_hooks()
+        # Only topics published in every control cycle have an interval to
+        # learn, settings and states may not change for days.
+        if live and self._watchdog is not None and self._async_is_periodic(topic):
+            self._watchdog.async_seen(topic)
+        # An empty payload removes a retained topic, it does not publish it.
+        if self._latency is not None and topic in self._latency.pending:
+            self._latency.async_confirm(topic, payload)
+        if self._topicWatchers and payload:
+            actions = self._topicWatchers.pop(topic, ())
+            if actions:
+                self._async_update_hooks()
+                for action in actions:
+                    action()
+
+    @callback
+    def async_message_time(self) -> float:
+        """Return the receive time of the message passed to the handlers.
+
+        The clock is read by the first handler that asks for it, so all
+        handlers of a message get the same time. It does not depend on the
+        type of the timestamp of the MQTT client, which changed between
+        versions of Home Assistant.
+        """
+        if self._messageTime is None:
+            self._messageTime = self.clock()
+        return self._messageTime
+
+    @callback
+    def _async_policy(self, topic: str) -> openwbDeliveryPolicy | None:
+        """Return the delivery policy of a topic."""
+        if topic in self._policies:
+            return self._policies[topic]
+        policy = self._policies[topic] = delivery_policy(
+            topic[len(self.mqtt_root) + 1 :]
+        )
+        return policy
+
+    @callback
+    def _async_retained_is_live(self, topic: str) -> bool:
+        """Return True if the delivery policy of the topic takes retained messages as current values."""
+        policy = self._async_policy(topic)
+        return policy is None or policy.retainedLive
+
+    @callback
+    def _async_is_periodic(self, topic: str) -> bool:
+        """Return True if the delivery policy of the topic publishes it in every control cycle."""
+        policy = self._async_policy(topic)
+        return policy is not None and policy.periodic
+
+    @callback
+    def _async_route(
+        self,
+        topic: str,
+        route: dict[Callable | None, list[Callable]],
+        payload: Any,
+    ) -> int:
+        """Pass a payload to the handlers of a topic and return the parse errors.
+
+        The same as the handler calls of async_handle_message, which are
+        inlined for the untimed messages.
+        """
+        parseErrors = 0
+        for parser, handlers in route.items():
+            try:
+                value = payload if parser is None else parser(payload)
+            except ValueError:
+                _LOGGER.debug("Unable to parse payload %s of topic %s", payload, topic)
+                parseErrors += 1
+                continue
+            for handler in handlers:
+                try:
+                    handler(value)
+                except Exception:  # pylint: disable=broad-except
+                    _LOGGER.exception(
+                        "Error handling payload %s of topic %s", payload, topic
+                    )
+        return parseErrors
+
+    def traffic_totals(self) -> tuple[int, int]:
+        """Return the number of messages and the handler time in nanoseconds."""
+        messages = 0
+        handlerTime = 0
+        for stats in self.topicStats.values():
+            messages += stats.messages
+            handlerTime += stats.handlerTime
+        return messages, handlerTime
+
+    @callback
+    def _async_dispatch(
+        self,
+        topic: str,
+        parser: Callable[[Any], Any] | None,
+        handlers: list[Callable[[Any], None]],
+        payload: Any,
+    ) -> bool:
+        """Parse the payload once and pass the value to all handlers.
+
+        Return False if the payload could not be parsed.
+        """
+        try:
+            value = payload if parser is None else parser(payload)
+        except ValueError:
+            _LOGGER.debug("Unable to parse payload %s of topic %s", payload, topic)
+            return False
+        for handler in handlers:
+            try:
+                handler(value)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception(
+                    "Error handling payload %s of topic %s", payload, topic
+                )
+        return True
@@ -0,0 +1,62 @@
+"""The openwbmqtt component for controlling the openWB wallbox via home assistant / MQTT."""
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import Any
+
+from homeassistant.util import slugify
+
+from .const import SAMPLING_MAX, SAMPLING_MEAN, SAMPLING_OFF
+
+
+def sampling_option_key(key: str) -> str:
+    """Return the option key of the sampling mode of a sensor description."""
+    return f"sampling_{slugify(key)}"
+
+
+def sampling_mode(options: Mapping[str, Any], key: str, default: str | None) -> str:
+    """Return the configured sampling mode of a sensor description."""
+    if default is None:
+        return SAMPLING_OFF
+    return options.get(sampling_option_key(key), default)
+
+
+class OpenWBSampler:
+    """Aggregate the readings of one sensor over a time window."""
+
+    __slots__ = ("mode", "count", "total", "maximum", "last")
+
+    def __init__(self, mode: str) -> None:
+        """Initialize an empty window."""
+        self.mode = mode
+        self.count = 0
+        self.total = 0.0
+        self.maximum: float | None = None
+        self.last: float | None = None
+
+    def add(self, value: float) -> None:
+        """Add a reading to the current window."""
+        self.count += 1
+        self.last = value
+        if self.mode == SAMPLING_MEAN:
+            self.total += value
+        elif self.mode == SAMPLING_MAX and (
+            self.maximum is None or value > self.maximum
+        ):
+            self.maximum = value
+
+    def flush(self) -> tuple[float | None, int]:
+        """Return the aggregate and number of readings of the window and start a new one."""
+        count = self.count
+        if count == 0:
+            return None, 0
+        if self.mode == SAMPLING_MEAN:
+            value = round(self.total / count, 2)
+        elif self.mode == SAMPLING_MAX:
+            value = self.maximum
+        else:
+            value = self.last
+        self.count = 0
+        self.total = 0.0
+        self.maximum = None
+        return value, count
@@ -1,17 +1,19 @@
 """OpenWB Selector."""
 from __future__ import annotations
 
-import copy
 import logging
 
-from homeassistant.components import mqtt
 from homeassistant.components.select import DOMAIN, SelectEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.util import slugify
 
-from .common import OpenWBBaseEntity
+from .common import (
+    OpenWBBaseEntity,
+    OpenWBTopicBinding,
+    async_add_discovered_entities,
+)
 from .const import (
     CHARGE_POINTS,
     MQTT_ROOT_TOPIC,
@@ -35,36 +37,39 @@ async def async_setup_entry(
     nChargePoints = config_entry.data[CHARGE_POINTS]
 
     selectList = []
-    global_selects = copy.deepcopy(SELECTS_GLOBAL)
-    for description in global_selects:
-        description.mqttTopicCommand = f"{mqttRoot}/{description.mqttTopicCommand}"
-        description.mqttTopicCurrentValue = (
-            f"{mqttRoot}/{description.mqttTopicCurrentValue}"
+    for description in SELECTS_GLOBAL:
+        topics = OpenWBTopicBinding(
+            currentValue=f"{mqttRoot}/{description.mqttTopicCurrentValue}",
+            command=f"{mqttRoot}/{description.mqttTopicCommand}",
         )
         selectList.append(
             openwbSelect(
                 unique_id=integrationUniqueID,
                 description=description,
+                topics=topics,
                 device_friendly_name=integrationUniqueID,
                 mqtt_root=mqttRoot,
             )
         )
     for chargePoint in range(1, nChargePoints + 1):
-        local_selects_per_lp = copy.deepcopy(SELECTS_PER_LP)
-        for description in local_selects_per_lp:
-            description.mqttTopicCommand = f"{mqttRoot}/config/set/sofort/lp/{str(chargePoint)}/{description.mqttTopicCommand}"
-            description.mqttTopicCurrentValue = f"{mqttRoot}/config/get/sofort/lp/{str(chargePoint)}/{description.mqttTopicCurrentValue}"
+        for description in SELECTS_PER_LP:
+            topics = OpenWBTopicBinding(
+                currentValue=f"{mqttRoot}/config/get/sofort/lp/{str(chargePoint)}/{description.mqttTopicCurrentValue}",
+                command=f"{mqttRoot}/config/set/sofort/lp/{str(chargePoint)}/{description.mqttTopicCommand}",
+                chargePoint=chargePoint,
+            )
             selectList.append(
                 openwbSelect(
                     unique_id=integrationUniqueID,
                     description=description,
+                    topics=topics,
                     nChargePoints=int(nChargePoints),
                     currentChargePoint=chargePoint,
                     device_friendly_name=integrationUniqueID,
                     mqtt_root=mqttRoot,
                 )
             )
-    async_add_entities(selectList)
+    async_add_discovered_entities(hass, config_entry, async_add_entities, selectList)
 
 
 class openwbSelect(OpenWBBaseEntity, SelectEntity):
@@ -77,6 +82,7 @@ class openwbSelect(OpenWBBaseEntity, SelectEntity):
         unique_id: str,
         device_friendly_name: str,
         description: openwbSelectEntityDescription,
+        topics: OpenWBTopicBinding,
         mqtt_root: str,
         currentChargePoint: int | None = None,
         nChargePoints: int | None = None,
@@ -88,6 +94,7 @@ class openwbSelect(OpenWBBaseEntity, SelectEntity):
         )
         # Initialize the inverter operation mode setting entity
         self.entity_description = description
+        self.topics = topics
 
         if nChargePoints:
             self._attr_unique_id = slugify(
@@ -109,26 +116,22 @@ class openwbSelect(OpenWBBaseEntity, SelectEntity):
         """Subscribe to MQTT events."""
 
         @callback
-        def message_received(message):
+        def message_received(payload):
             """Handle new MQTT messages."""
             try:
                 self._attr_current_option = (
-                    self.entity_description.valueMapCurrentValue.get(
-                        int(message.payload)
-                    )
+                    self.entity_description.valueMapCurrentValue.get(int(payload))
                 )
             except ValueError:
                 self._attr_current_option = None
 
-            self.async_write_ha_state()
+            self.async_write_ha_state_if_changed(self._attr_current_option)
 
-        # Subscribe to MQTT topic and connect callack message
-        if self.entity_description.mqttTopicCurrentValue is not None:
-            await mqtt.async_subscribe(
-                self.hass,
-                self.entity_description.mqttTopicCurrentValue,
+        # Register the topic at the router and connect callback message
+        if self.topics.currentValue is not None:
+            self.async_subscribe_topic(
+                self.topics.currentValue,
                 message_received,
-                1,
             )
 
     async def async_select_option(self, option: str) -> None:
@@ -144,7 +147,7 @@ class openwbSelect(OpenWBBaseEntity, SelectEntity):
 
     def publishToMQTT(self, commandValueToPublish):
         """Publish data to MQTT."""
-        topic = f"{self.entity_description.mqttTopicCommand}"
+        topic = f"{self.topics.command}"
         _LOGGER.debug("MQTT topic: %s", topic)
         try:
             payload = self.entity_description.valueMapCommand.get(commandValueToPublish)
@@ -154,4 +157,11 @@ class openwbSelect(OpenWBBaseEntity, SelectEntity):
             publish_mqtt_message = False
 
         if publish_mqtt_message:
-            self.hass.components.mqtt.publish(self.hass, topic, payload)
+            # Nothing to do if openWB already confirmed the option.
+            self._router.commands.async_publish(
+                topic,
+                payload,
+                noop=self._reports_state(commandValueToPublish),
+                confirmTopic=self.topics.currentValue,
+                chargePoint=self.topics.chargePoint,
+            )
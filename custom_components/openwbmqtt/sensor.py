@@ -1,29 +1,74 @@
 """The openwbmqtt component for controlling the openWB wallbox via home assistant / MQTT."""
 from __future__ import annotations
 
-import copy
+import asyncio
+from collections.abc import Callable
 from datetime import timedelta
+from functools import partial
 import logging
-import re
+import time
+from typing import Any
 
-from homeassistant.components import mqtt
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.device_registry import async_get as async_get_dev_reg
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.util import dt as dt_util, slugify
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.util import slugify
 
-from .common import OpenWBBaseEntity
+from .common import (
+    OpenWBBaseEntity,
+    OpenWBTopicBinding,
+    async_add_discovered_entities,
+)
 
 # Import global values.
 from .const import (
     CHARGE_POINTS,
+    CONF_COMPACT_PHASES,
+    CONF_ENERGY_INTERVAL,
+    CONF_POWER_FLOW,
+    CONF_ROLLING_STATISTICS,
+    CONF_SAMPLING_WINDOW,
+    DEFAULT_COMPACT_PHASES,
+    DEFAULT_ENERGY_INTERVAL,
+    DEFAULT_POWER_FLOW,
+    DEFAULT_ROLLING_STATISTICS,
+    DEFAULT_SAMPLING_WINDOW,
+    DOMAIN,
     MQTT_ROOT_TOPIC,
+    PHASE_ATTRIBUTES,
+    PHASES_WRITE_DELAY,
+    ROLLING_TOPICS_GLOBAL,
+    ROLLING_TOPICS_PER_LP,
+    ROLLING_WINDOWS,
+    SAMPLING_OFF,
+    SENSORS_ENERGY_GLOBAL,
+    SENSORS_ENERGY_PER_LP,
     SENSORS_GLOBAL,
     SENSORS_PER_LP,
+    SENSORS_PHASES_PER_LP,
+    SENSORS_LATENCY,
+    SENSORS_POWER_FLOW,
+    SENSORS_POWER_FLOW_PER_LP,
+    SENSORS_ROLLING,
+    SENSORS_ROUTER,
+    SENSORS_TRAFFIC,
     openwbSensorEntityDescription,
 )
+from .hub import OpenWBHub
+from .integrator import OpenWBEnergyIntegrator
+from .parsers import (
+    KEY_COUNT_PHASES,
+    KEY_IP_ADDRESS,
+    KEY_VERSION,
+    PHASES_ICON_DEFAULT,
+    PHASES_ICONS,
+)
+from .powerflow import OpenWBPowerFlow
+from .rolling import OpenWBRollingStatistics
+from .sampling import OpenWBSampler, sampling_mode
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -36,48 +81,249 @@ async def async_setup_entry(
     integrationUniqueID = config.unique_id
     mqttRoot = config.data[MQTT_ROOT_TOPIC]
     nChargePoints = config.data[CHARGE_POINTS]
+    hub: OpenWBHub = hass.data[DOMAIN]
+    samplingWindow = config.options.get(CONF_SAMPLING_WINDOW, DEFAULT_SAMPLING_WINDOW)
+    compactPhases = config.options.get(CONF_COMPACT_PHASES, DEFAULT_COMPACT_PHASES)
+
+    def sampler_for(description: openwbSensorEntityDescription) -> OpenWBSampler | None:
+        """Return a sampler if the readings of the sensor shall be aggregated."""
+        if not samplingWindow:
+            return None
+        mode = sampling_mode(
+            config.options, description.key, description.samplingPolicy
+        )
+        if mode == SAMPLING_OFF:
+            return None
+        return OpenWBSampler(mode)
 
     sensorList = []
     # Create all global sensors.
-    global_sensors = copy.deepcopy(SENSORS_GLOBAL)
-    for description in global_sensors:
-        description.mqttTopicCurrentValue = f"{mqttRoot}/{description.key}"
-        _LOGGER.debug("mqttTopic: %s", description.mqttTopicCurrentValue)
+    for description in SENSORS_GLOBAL:
+        topics = OpenWBTopicBinding(f"{mqttRoot}/{description.key}")
+        _LOGGER.debug("mqttTopic: %s", topics.currentValue)
         sensorList.append(
             openwbSensor(
                 uniqueID=integrationUniqueID,
                 description=description,
+                topics=topics,
+                parser=hub.sensor_parser(description),
                 device_friendly_name=integrationUniqueID,
                 mqtt_root=mqttRoot,
+                sampler=sampler_for(description),
             )
         )
 
-    # Create all sensors for each charge point, respectively.
+    # Create all sensors for each charge point, respectively. The descriptions
+    # are shared by all charge points and config entries, so the parsers are
+    # compiled only once by the hub.
+    # In compact mode, the phase sensors are replaced by one entity.
+    descriptionsPerLP = [
+        description
+        for description in SENSORS_PER_LP
+        if not (compactPhases and description.key in PHASE_ATTRIBUTES)
+    ]
+    parsersPerLP = [hub.sensor_parser(d) for d in descriptionsPerLP]
     for chargePoint in range(1, nChargePoints + 1):
-        local_sensors_per_lp = copy.deepcopy(SENSORS_PER_LP)
-        for description in local_sensors_per_lp:
-            description.mqttTopicCurrentValue = (
+        if compactPhases:
+            for description in SENSORS_PHASES_PER_LP:
+                sensorList.append(
+                    openwbPhasesSensor(
+                        uniqueID=integrationUniqueID,
+                        description=description,
+                        topicPrefix=f"{mqttRoot}/lp/{str(chargePoint)}",
+                        currentChargePoint=chargePoint,
+                        device_friendly_name=integrationUniqueID,
+                        mqtt_root=mqttRoot,
+                    )
+                )
+        for description, parser in zip(descriptionsPerLP, parsersPerLP):
+            topics = OpenWBTopicBinding(
                 f"{mqttRoot}/lp/{str(chargePoint)}/{description.key}"
             )
-            _LOGGER.debug("mqttTopic: %s", description.mqttTopicCurrentValue)
+            _LOGGER.debug("mqttTopic: %s", topics.currentValue)
             sensorList.append(
                 openwbSensor(
                     uniqueID=integrationUniqueID,
                     description=description,
+                    topics=topics,
+                    parser=parser,
                     nChargePoints=int(nChargePoints),
                     currentChargePoint=chargePoint,
                     device_friendly_name=integrationUniqueID,
                     mqtt_root=mqttRoot,
+                    sampler=sampler_for(description),
                 )
             )
 
-    async_add_entities(sensorList)
+    # Create the diagnostic sensors of the topic router.
+    for description in SENSORS_ROUTER:
+        sensorList.append(
+            openwbRouterSensor(
+                uniqueID=integrationUniqueID,
+                description=description,
+                device_friendly_name=integrationUniqueID,
+                mqtt_root=mqttRoot,
+            )
+        )
+    for description in SENSORS_TRAFFIC:
+        sensorList.append(
+            openwbRateSensor(
+                uniqueID=integrationUniqueID,
+                description=description,
+                device_friendly_name=integrationUniqueID,
+                mqtt_root=mqttRoot,
+            )
+        )
+
+    # Create the diagnostic sensors of the command latency, for the commands
+    # of the openWB itself and of each charge point.
+    for chargePoint in [None, *range(1, nChargePoints + 1)]:
+        for description in SENSORS_LATENCY:
+            sensorList.append(
+                openwbLatencySensor(
+                    uniqueID=integrationUniqueID,
+                    description=description,
+                    currentChargePoint=chargePoint,
+                    device_friendly_name=integrationUniqueID,
+                    mqtt_root=mqttRoot,
+                )
+            )
+
+    # Create the sensors of the power flows. The engine keeps the power topics
+    # and computes all flows at once, so it is shared by the sensors.
+    if config.options.get(CONF_POWER_FLOW, DEFAULT_POWER_FLOW):
+        engine = OpenWBPowerFlow(hass, hub.routers[config.entry_id], nChargePoints)
+        config.async_on_unload(engine.async_stop)
+        for description in SENSORS_POWER_FLOW:
+            sensorList.append(
+                openwbPowerFlowSensor(
+                    uniqueID=integrationUniqueID,
+                    description=description,
+                    engine=engine,
+                    device_friendly_name=integrationUniqueID,
+                    mqtt_root=mqttRoot,
+                )
+            )
+        for chargePoint in range(1, nChargePoints + 1):
+            for description in SENSORS_POWER_FLOW_PER_LP:
+                sensorList.append(
+                    openwbPowerFlowSensor(
+                        uniqueID=integrationUniqueID,
+                        description=description,
+                        engine=engine,
+                        currentChargePoint=chargePoint,
+                        device_friendly_name=integrationUniqueID,
+                        mqtt_root=mqttRoot,
+                    )
+                )
+
+    # Create the sensors of the rolling statistics. The samples of a topic are
+    # kept once and shared by the sensors of all windows. They are parsed
+    # like the sensor of the topic, openWB publishes the PV power negative.
+    if config.options.get(CONF_ROLLING_STATISTICS, DEFAULT_ROLLING_STATISTICS):
+        router = hub.routers[config.entry_id]
+        parsersGlobal = {
+            description.key: hub.sensor_parser(description)
+            for description in SENSORS_GLOBAL
+        }
+        parsersPerLP = {
+            description.key: hub.sensor_parser(description)
+            for description in SENSORS_PER_LP
+        }
+        rollingTopics = [
+            (f"{mqttRoot}/{key}", name, None, parsersGlobal.get(key))
+            for key, name in ROLLING_TOPICS_GLOBAL.items()
+        ] + [
+            (
+                f"{mqttRoot}/lp/{chargePoint}/{key}",
+                name,
+                chargePoint,
+                parsersPerLP.get(key),
+            )
+            for chargePoint in range(1, nChargePoints + 1)
+            for key, name in ROLLING_TOPICS_PER_LP.items()
+        ]
+        for topic, topicName, chargePoint, parser in rollingTopics:
+            statistics = OpenWBRollingStatistics(
+                router=router, topic=topic, parser=parser or float
+            )
+            for window in range(len(ROLLING_WINDOWS)):
+                for description in SENSORS_ROLLING:
+                    sensorList.append(
+                        openwbRollingSensor(
+                            uniqueID=integrationUniqueID,
+                            description=description,
+                            statistics=statistics,
+                            window=window,
+                            topicName=topicName,
+                            currentChargePoint=chargePoint,
+                            device_friendly_name=integrationUniqueID,
+                            mqtt_root=mqttRoot,
+                        )
+                    )
+
+    # Create the sensors of the integrated power topics. The energies of the
+    # last run are loaded before the first message is integrated.
+    energyInterval = config.options.get(CONF_ENERGY_INTERVAL, DEFAULT_ENERGY_INTERVAL)
+    if energyInterval:
+        integrator = OpenWBEnergyIntegrator(
+            hass, hub.routers[config.entry_id], config.entry_id, energyInterval
+        )
+        await integrator.async_load()
+        energySensors = [
+            openwbEnergySensor(
+                uniqueID=integrationUniqueID,
+                description=description,
+                integrator=integrator,
+                device_friendly_name=integrationUniqueID,
+                mqtt_root=mqttRoot,
+            )
+            for description in SENSORS_ENERGY_GLOBAL
+        ] + [
+            openwbEnergySensor(
+                uniqueID=integrationUniqueID,
+                description=description,
+                integrator=integrator,
+                currentChargePoint=chargePoint,
+                device_friendly_name=integrationUniqueID,
+                mqtt_root=mqttRoot,
+            )
+            for chargePoint in range(1, nChargePoints + 1)
+            for description in SENSORS_ENERGY_PER_LP
+        ]
+        integrator.async_start()
+        config.async_on_unload(integrator.async_stop)
+        sensorList.extend(energySensors)
+
+    async_add_discovered_entities(hass, config, async_add_entities, sensorList)
+
+    # Write the aggregated readings of all sampled sensors once per window.
+    sampledSensors = [
+        sensor
+        for sensor in sensorList
+        if isinstance(sensor, openwbSensor) and sensor.sampler is not None
+    ]
+    if sampledSensors:
+
+        @callback
+        def flush_samples(now):
+            for sensor in sampledSensors:
+                sensor.async_flush_samples()
+
+        config.async_on_unload(
+            async_track_time_interval(
+                hass, flush_samples, timedelta(seconds=samplingWindow)
+            )
+        )
 
 
 class openwbSensor(OpenWBBaseEntity, SensorEntity):
     """Representation of an openWB sensor that is updated via MQTT."""
 
     entity_description: openwbSensorEntityDescription
+    # Device registry entry of the openWB and the last values written to it.
+    _deviceID: str | None = None
+    _lastDeviceChanges: dict[str, Any] | None = None
 
     def __init__(
         self,
@@ -85,8 +331,11 @@ class openwbSensor(OpenWBBaseEntity, SensorEntity):
         device_friendly_name: str,
         mqtt_root: str,
         description: openwbSensorEntityDescription,
+        topics: OpenWBTopicBinding,
+        parser: Callable[[str], Any] | None = None,
         nChargePoints: int | None = None,
         currentChargePoint: int | None = None,
+        sampler: OpenWBSampler | None = None,
     ) -> None:
         """Initialize the sensor and the openWB device."""
         super().__init__(
@@ -95,6 +344,9 @@ class openwbSensor(OpenWBBaseEntity, SensorEntity):
         )
 
         self.entity_description = description
+        self.topics = topics
+        self.sampler = sampler
+        self._parser = parser
 
         if nChargePoints:
             self._attr_unique_id = slugify(
@@ -112,96 +364,409 @@ class openwbSensor(OpenWBBaseEntity, SensorEntity):
     async def async_added_to_hass(self):
         """Subscribe to MQTT events."""
 
-        @callback
-        def message_received(message):
-            """Handle new MQTT messages."""
-            self._attr_native_value = message.payload
-
-            # Convert data if a conversion function is defined
-            if self.entity_description.value_fn is not None:
-                self._attr_native_value = self.entity_description.value_fn(
-                    self._attr_native_value
-                )
+        # Bind the special handlers only to the sensors that need them.
+        key = self.entity_description.key
+        if self.sampler is not None:
+            handler = self._async_sample_received
+        elif key == KEY_IP_ADDRESS:
+            handler = self._async_ip_address_received
+        elif key == KEY_VERSION:
+            handler = self._async_version_received
+        elif key == KEY_COUNT_PHASES:
+            handler = self._async_phases_received
+        else:
+            handler = self._async_value_received
 
-            # Map values as defined in the value map dict.
-            if self.entity_description.valueMap is not None:
-                try:
-                    self._attr_native_value = self.entity_description.valueMap.get(
-                        int(self._attr_native_value)
-                    )
-                except ValueError:
-                    self._attr_native_value = self._attr_native_value
-
-            # Reformat TimeRemaining --> timestamp.
-            if "TimeRemaining" in self.entity_description.key:
-                now = dt_util.utcnow()
-                if "H" in self._attr_native_value:
-                    tmp = self._attr_native_value.split()
-                    delta = timedelta(hours=int(tmp[0]), minutes=int(tmp[2]))
-                    self._attr_native_value = now + delta
-                elif "Min" in self._attr_native_value:
-                    tmp = self._attr_native_value.split()
-                    delta = timedelta(minutes=int(tmp[0]))
-                    self._attr_native_value = now + delta
-                else:
-                    self._attr_native_value = None
-
-            # Reformat uptime sensor
-            if "uptime" in self.entity_id:
-                reluptime = re.match(
-                    ".*\sup\s(.*),.*\d*user.*", self._attr_native_value
-                )[1]
-                days = 0
-                if re.match("(\d*)\sday.*", reluptime):
-                    days = re.match("(\d*)\sday", reluptime)[1]
-                    reluptime = re.match(".*,\s(.*)", reluptime)[1]
-                if re.match(".*min", reluptime):
-                    hours = 0
-                    mins = re.match("(\d*)\s*min", reluptime)[1]
-                else:
-                    hours, mins = re.match("\s?(\d*):0?(\d*)", reluptime).group(1, 2)
-                self._attr_native_value = f"{days} d {hours} h {mins} min"
-
-            # If MQTT message contains IP --> set up configuration_url to visit the device
-            elif "ip_adresse" in self.entity_id:
-                device_registry = async_get_dev_reg(self.hass)
-                device = device_registry.async_get_device(
-                    self.device_info.get("identifiers")
-                )
-                device_registry.async_update_device(
-                    device.id,
-                    configuration_url=f"http://{message.payload}/openWB/web/index.php",
-                )
-                # device_registry.async_update_device
-            # If MQTT message contains version --> set sw_version of the device
-            elif "version" in self.entity_id:
-                device_registry = async_get_dev_reg(self.hass)
-                device = device_registry.async_get_device(
-                    self.device_info.get("identifiers")
-                )
-                device_registry.async_update_device(
-                    device.id, sw_version=message.payload
-                )
-                # device_registry.async_update_device
-
-            # Update icon of countPhasesInUse
-            elif "countPhasesInUse" in self.entity_description.key:
-                if int(message.payload) == 0:
-                    self._attr_icon = "mdi:numeric-0-circle-outline"
-                elif int(message.payload) == 1:
-                    self._attr_icon = "mdi:numeric-1-circle-outline"
-                elif int(message.payload) == 3:
-                    self._attr_icon = "mdi:numeric-3-circle-outline"
-                else:
-                    self._attr_icon = "mdi:numeric"
-
-            # Update entity state with value published on MQTT.
-            self.async_write_ha_state()
-
-        # Subscribe to MQTT topic and connect callack message
-        await mqtt.async_subscribe(
-            self.hass,
-            self.entity_description.mqttTopicCurrentValue,
-            message_received,
-            1,
+        # Register the topic at the router and connect the handler
+        self.async_subscribe_topic(
+            self.topics.currentValue,
+            handler,
+            self._parser,
+        )
+
+    @callback
+    def _async_value_received(self, value):
+        """Handle new MQTT messages."""
+        self._attr_native_value = value
+        # Update entity state with value published on MQTT.
+        self.async_write_ha_state_if_changed(value)
+
+    @callback
+    def _async_sample_received(self, value):
+        """Aggregate the readings of sampled sensors until the window ends."""
+        self.sampler.add(float(value))
+
+    @callback
+    def _async_ip_address_received(self, value):
+        """If MQTT message contains IP --> set up configuration_url to visit the device."""
+        self._async_value_received(value)
+        self._async_update_device(
+            configuration_url=f"http://{value}/openWB/web/index.php"
+        )
+
+    @callback
+    def _async_version_received(self, value):
+        """If MQTT message contains version --> set sw_version of the device."""
+        self._async_value_received(value)
+        self._async_update_device(sw_version=value)
+
+    @callback
+    def _async_update_device(self, **changes: Any) -> None:
+        """Update the openWB device in the device registry if the values changed.
+
+        The device id is resolved once, afterwards the registry is only touched
+        when IP address or version of the openWB actually change.
+        """
+        if changes == self._lastDeviceChanges:
+            return
+        if self._deviceID is None:
+            device = async_get_dev_reg(self.hass).async_get_device(
+                identifiers=self.device_info["identifiers"]
+            )
+            if device is None:
+                return
+            self._deviceID = device.id
+        async_get_dev_reg(self.hass).async_update_device(self._deviceID, **changes)
+        self._lastDeviceChanges = changes
+
+    @callback
+    def _async_phases_received(self, value):
+        """Update value and icon of countPhasesInUse."""
+        self._attr_native_value = value
+        self._attr_icon = PHASES_ICONS.get(value, PHASES_ICON_DEFAULT)
+        self.async_write_ha_state_if_changed(value, self._attr_icon)
+
+    @callback
+    def async_flush_samples(self) -> None:
+        """Write the aggregate of the readings of the ended sampling window."""
+        value, count = self.sampler.flush()
+        if not count:
+            return
+        self._attr_native_value = value
+        self._attr_extra_state_attributes = {"samples": count}
+        # The number of readings is part of the written state.
+        self.async_write_ha_state_if_changed(value, count)
+
+
+class openwbPhasesSensor(OpenWBBaseEntity, SensorEntity):
+    """Representation of voltage, current and power factor of all phases of a charge point.
+
+    The state is the total current. The values of the phases are attributes
+    that are not recorded, and all of them are written in one state update.
+    """
+
+    entity_description: openwbSensorEntityDescription
+    _unrecorded_attributes = frozenset(PHASE_ATTRIBUTES.values())
+
+    def __init__(
+        self,
+        uniqueID: str | None,
+        device_friendly_name: str,
+        mqtt_root: str,
+        description: openwbSensorEntityDescription,
+        topicPrefix: str,
+        currentChargePoint: int,
+    ) -> None:
+        """Initialize the sensor and the openWB device."""
+        super().__init__(
+            device_friendly_name=device_friendly_name,
+            mqtt_root=mqtt_root,
+        )
+
+        self.entity_description = description
+        self.topicPrefix = topicPrefix
+        self._phaseValues: dict[str, float] = {}
+        self._scheduledWrite: asyncio.TimerHandle | None = None
+
+        self._attr_unique_id = slugify(
+            f"{uniqueID}-CP{currentChargePoint}-{description.name}"
+        )
+        self.entity_id = f"sensor.{uniqueID}-CP{currentChargePoint}-{description.name}"
+        self._attr_name = f"{description.name} (LP{currentChargePoint})"
+
+    @property
+    def discoveryTopic(self) -> str | None:
+        """Return the topic that creates the entity in discovery mode."""
+        return f"{self.topicPrefix}/APhase1"
+
+    async def async_added_to_hass(self):
+        """Subscribe to the MQTT topics of all phases."""
+        for key, attribute in PHASE_ATTRIBUTES.items():
+            self.async_subscribe_topic(
+                f"{self.topicPrefix}/{key}",
+                partial(self._async_phase_received, attribute),
+                float,
+            )
+        self.async_on_remove(self._async_cancel_write)
+
+    @callback
+    def _async_phase_received(self, attribute: str, value: float) -> None:
+        """Store the value of a phase and schedule the state update."""
+        self._phaseValues[attribute] = value
+        if self._scheduledWrite is None:
+            self._scheduledWrite = self.hass.loop.call_later(
+                PHASES_WRITE_DELAY, self._async_write_phases
+            )
+
+    @callback
+    def _async_write_phases(self) -> None:
+        """Write the values of all phases received in the burst."""
+        self._scheduledWrite = None
+        currents = [
+            self._phaseValues[attribute]
+            for key, attribute in PHASE_ATTRIBUTES.items()
+            if key.startswith("A") and attribute in self._phaseValues
+        ]
+        self._attr_native_value = round(sum(currents), 2) if currents else None
+        self._attr_extra_state_attributes = dict(self._phaseValues)
+        self.async_write_ha_state_if_changed(*self._phaseValues.items())
+
+    @callback
+    def _async_cancel_write(self) -> None:
+        """Cancel the scheduled state update."""
+        if self._scheduledWrite is not None:
+            self._scheduledWrite.cancel()
+            self._scheduledWrite = None
+
+
+class openwbRouterSensor(OpenWBBaseEntity, SensorEntity):
+    """Representation of a counter of the topic router that is polled periodically."""
+
+    entity_description: openwbSensorEntityDescription
+    _attr_should_poll = True
+
+    def __init__(
+        self,
+        uniqueID: str | None,
+        device_friendly_name: str,
+        mqtt_root: str,
+        description: openwbSensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor and the openWB device."""
+        super().__init__(
+            device_friendly_name=device_friendly_name,
+            mqtt_root=mqtt_root,
+        )
+
+        self.entity_description = description
+        self._attr_unique_id = slugify(f"{uniqueID}-{description.name}")
+        self.entity_id = f"sensor.{uniqueID}-{description.name}"
+        self._attr_name = description.name
+
+    async def async_update(self) -> None:
+        """Read the counter from the topic router."""
+        router = self.hass.data[DOMAIN].routers[self.platform.config_entry.entry_id]
+        self._attr_native_value = self.entity_description.value_fn(router)
+
+
+class openwbRateSensor(openwbRouterSensor):
+    """Representation of the rate per second of a total of the topic router."""
+
+    # Total and monotonic time of the last update.
+    _lastSample: tuple[float, float] | None = None
+
+    async def async_update(self) -> None:
+        """Read the total from the topic router and compute its rate since the last update."""
+        router = self.hass.data[DOMAIN].routers[self.platform.config_entry.entry_id]
+        total = self.entity_description.value_fn(router)
+        now = time.monotonic()
+        if self._lastSample is not None and now > self._lastSample[1]:
+            self._attr_native_value = round(
+                (total - self._lastSample[0]) / (now - self._lastSample[1]), 2
+            )
+        self._lastSample = (total, now)
+
+
+class openwbLatencySensor(openwbRouterSensor):
+    """Representation of the confirmation latency of the commands of a charge point."""
+
+    def __init__(
+        self,
+        uniqueID: str | None,
+        device_friendly_name: str,
+        mqtt_root: str,
+        description: openwbSensorEntityDescription,
+        currentChargePoint: int | None = None,
+    ) -> None:
+        """Initialize the sensor and the openWB device."""
+        super().__init__(
+            uniqueID=uniqueID,
+            device_friendly_name=device_friendly_name,
+            mqtt_root=mqtt_root,
+            description=description,
+        )
+
+        self.currentChargePoint = currentChargePoint
+        if currentChargePoint is not None:
+            self._attr_unique_id = slugify(
+                f"{uniqueID}-CP{currentChargePoint}-{description.name}"
+            )
+            self.entity_id = (
+                f"sensor.{uniqueID}-CP{currentChargePoint}-{description.name}"
+            )
+            self._attr_name = f"{description.name} (LP{currentChargePoint})"
+
+    async def async_update(self) -> None:
+        """Read the latency of the charge point from the topic router."""
+        router = self.hass.data[DOMAIN].routers[self.platform.config_entry.entry_id]
+        self._attr_native_value = self.entity_description.value_fn(
+            router, self.currentChargePoint
+        )
+
+
+class openwbPowerFlowSensor(OpenWBBaseEntity, SensorEntity):
+    """Representation of a power flow that is computed by the power flow engine."""
+
+    entity_description: openwbSensorEntityDescription
+
+    def __init__(
+        self,
+        uniqueID: str | None,
+        device_friendly_name: str,
+        mqtt_root: str,
+        description: openwbSensorEntityDescription,
+        engine: OpenWBPowerFlow,
+        currentChargePoint: int | None = None,
+    ) -> None:
+        """Initialize the sensor and the openWB device."""
+        super().__init__(
+            device_friendly_name=device_friendly_name,
+            mqtt_root=mqtt_root,
+        )
+
+        self.entity_description = description
+        self.engine = engine
+        self.currentChargePoint = currentChargePoint
+        if currentChargePoint is None:
+            self._attr_unique_id = slugify(f"{uniqueID}-{description.name}")
+            self.entity_id = f"sensor.{uniqueID}-{description.name}"
+            self._attr_name = description.name
+        else:
+            self._attr_unique_id = slugify(
+                f"{uniqueID}-CP{currentChargePoint}-{description.name}"
+            )
+            self.entity_id = (
+                f"sensor.{uniqueID}-CP{currentChargePoint}-{description.name}"
+            )
+            self._attr_name = f"{description.name} (LP{currentChargePoint})"
+
+    async def async_added_to_hass(self):
+        """Listen to the computations of the engine."""
+        self._router = self.engine.router
+        self._attr_native_value = self.entity_description.value_fn(
+            self.engine, self.currentChargePoint
+        )
+        self.async_on_remove(self.engine.async_listen(self._async_flows_computed))
+
+    @callback
+    def _async_flows_computed(self) -> None:
+        """Write the state if the flow changed."""
+        self._attr_native_value = self.entity_description.value_fn(
+            self.engine, self.currentChargePoint
+        )
+        self.async_write_ha_state_if_changed(self._attr_native_value)
+
+
+class openwbRollingSensor(OpenWBBaseEntity, SensorEntity):
+    """Representation of the minimum, maximum or mean of a topic over a rolling window."""
+
+    entity_description: openwbSensorEntityDescription
+
+    def __init__(
+        self,
+        uniqueID: str | None,
+        device_friendly_name: str,
+        mqtt_root: str,
+        description: openwbSensorEntityDescription,
+        statistics: OpenWBRollingStatistics,
+        window: int,
+        topicName: str,
+        currentChargePoint: int | None = None,
+    ) -> None:
+        """Initialize the sensor and the openWB device."""
+        super().__init__(
+            device_friendly_name=device_friendly_name,
+            mqtt_root=mqtt_root,
+        )
+
+        self.entity_description = description
+        self.statistics = statistics
+        self.window = window
+        name = f"{topicName} {description.name} {ROLLING_WINDOWS[window] // 60} min"
+        if currentChargePoint is None:
+            self._attr_unique_id = slugify(f"{uniqueID}-{name}")
+            self.entity_id = f"sensor.{uniqueID}-{name}"
+            self._attr_name = name
+        else:
+            self._attr_unique_id = slugify(f"{uniqueID}-CP{currentChargePoint}-{name}")
+            self.entity_id = f"sensor.{uniqueID}-CP{currentChargePoint}-{name}"
+            self._attr_name = f"{name} (LP{currentChargePoint})"
+
+    async def async_added_to_hass(self):
+        """Listen to the samples of the topic."""
+        self._router = self.hass.data[DOMAIN].routers[
+            self.platform.config_entry.entry_id
+        ]
+        self._async_sample_added()
+        self.async_on_remove(self.statistics.async_listen(self._async_sample_added))
+
+    @callback
+    def _async_sample_added(self) -> None:
+        """Write the state if the statistic of the window changed."""
+        value = self.entity_description.value_fn(self.statistics, self.window)
+        self._attr_native_value = None if value is None else round(value, 1)
+        self.async_write_ha_state_if_changed(self._attr_native_value)
+
+
+class openwbEnergySensor(OpenWBBaseEntity, SensorEntity):
+    """Representation of the energy of a power topic integrated by the integration."""
+
+    entity_description: openwbSensorEntityDescription
+
+    def __init__(
+        self,
+        uniqueID: str | None,
+        device_friendly_name: str,
+        mqtt_root: str,
+        description: openwbSensorEntityDescription,
+        integrator: OpenWBEnergyIntegrator,
+        currentChargePoint: int | None = None,
+    ) -> None:
+        """Initialize the sensor and the openWB device."""
+        super().__init__(
+            device_friendly_name=device_friendly_name,
+            mqtt_root=mqtt_root,
+        )
+
+        self.entity_description = description
+        self.integrator = integrator
+        if currentChargePoint is None:
+            self.topic = description.key
+            self._attr_unique_id = slugify(f"{uniqueID}-{description.name}")
+            self.entity_id = f"sensor.{uniqueID}-{description.name}"
+            self._attr_name = description.name
+        else:
+            self.topic = f"lp/{currentChargePoint}/{description.key}"
+            self._attr_unique_id = slugify(
+                f"{uniqueID}-CP{currentChargePoint}-{description.name}"
+            )
+            self.entity_id = (
+                f"sensor.{uniqueID}-CP{currentChargePoint}-{description.name}"
+            )
+            self._attr_name = f"{description.name} (LP{currentChargePoint})"
+
+    async def async_added_to_hass(self):
+        """Write the energy once per write interval of the integrator."""
+        self._router = self.integrator.router
+        self.async_on_remove(
+            self.integrator.async_listen(self.topic, self._async_write_energy)
+        )
+        self._async_write_energy()
+
+    @callback
+    def _async_write_energy(self) -> None:
+        """Write the state if the energy changed."""
+        self._attr_native_value = round(
+            self.entity_description.value_fn(self.integrator.energies[self.topic]), 4
         )
+        self.async_write_ha_state_if_changed(self._attr_native_value)
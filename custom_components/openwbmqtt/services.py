@@ -0,0 +1,207 @@
+"""The openwbmqtt component for controlling the openWB wallbox via home assistant / MQTT."""
+from __future__ import annotations
+
+import logging
+
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.util import dt as dt_util
+
+from .const import CHARGE_LIMITATIONS, DOMAIN, GLOBAL_CHARGE_MODES
+from .hub import OpenWBHub
+from .profiles import async_apply_charge_profile, async_publish_setting, status_payload
+from .router import OpenWBTopicRouter
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICES = (
+    "enable_disable_cp",
+    "change_global_charge_mode",
+    "change_charge_limitation_per_cp",
+    "change_charge_current_per_cp",
+    "enable_disable_price_based_charging",
+    "change_pricebased_price",
+    "apply_charge_profile",
+    "get_charge_sessions",
+)
+
+
+@callback
+def async_register_services(hass: HomeAssistant, hub: OpenWBHub) -> None:
+    """Register the services, once for all openWB devices.
+
+    The services publish data to MQTT. The published data is subscribed by
+    openWB and the respective settings are changed. The handlers run in the
+    event loop and look the topics up in the topic table of the addressed
+    openWB devices.
+    """
+
+    def routers(call: ServiceCall) -> list[OpenWBTopicRouter]:
+        """Return the topic routers of the openWB devices addressed by the call."""
+        routers = hub.routers_for_service(call.data)
+        if not routers:
+            raise ServiceValidationError(
+                "The service call addresses no configured openWB device"
+            )
+        return routers
+
+    @callback
+    def fun_enable_disable_cp(call: ServiceCall) -> None:
+        """Enable or disable charge point # --> set/lp#/ChargePointEnabled [0,1]."""
+        chargePoint = int(call.data["charge_point_id"])
+        payload = status_payload(call.data.get("selected_status"))
+        for router in routers(call):
+            async_publish_setting(router, "charge_point_enabled", chargePoint, payload)
+
+    @callback
+    def fun_change_global_charge_mode(call: ServiceCall) -> None:
+        """Change the wallbox global charge mode --> set/ChargeMode [0, .., 4]."""
+        payload = str(GLOBAL_CHARGE_MODES.get(call.data.get("global_charge_mode"), 4))
+        for router in routers(call):
+            async_publish_setting(router, "global_charge_mode", None, payload)
+
+    @callback
+    def fun_change_charge_limitation_per_cp(call: ServiceCall) -> None:
+        """If box is in state 'Sofortladen', the charge limitation can be finetuned.
+
+        --> config/set/sofort/lp/#/chargeLimitation [0, 1, 2].
+        If the wallbox shall charge only a limited amount of energy [1] or to a certain SOC [2]
+        --> config/set/sofort/lp/#/energyToCharge [value in kWh]
+        --> config/set/sofort/lp/#/socToChargeTo [value in %].
+        """
+        limitation = call.data.get("charge_limitation")
+        if limitation not in CHARGE_LIMITATIONS:
+            return
+        chargePoint = int(call.data["charge_point_id"])
+        payload = str(CHARGE_LIMITATIONS[limitation])
+        for router in routers(call):
+            async_publish_setting(router, "charge_limitation", chargePoint, payload)
+            if limitation == "kWh":
+                async_publish_setting(
+                    router,
+                    "energy_to_charge",
+                    chargePoint,
+                    str(call.data.get("energy_to_charge")),
+                )
+            elif limitation == "SOC":
+                async_publish_setting(
+                    router,
+                    "required_soc",
+                    chargePoint,
+                    str(call.data.get("required_soc")),
+                )
+
+    @callback
+    def fun_change_charge_current_per_cp(call: ServiceCall) -> None:
+        """Set the charge current per loading point --> config/set/sofort/lp/#/current [value in A]."""
+        chargePoint = int(call.data["charge_point_id"])
+        payload = str(call.data.get("target_current"))
+        for router in routers(call):
+            async_publish_setting(router, "target_current", chargePoint, payload)
+
+    @callback
+    def fun_enable_disable_price_based_charging(call: ServiceCall) -> None:
+        """Enable or disable price-based charging for charge point # --> set/lp#/etBasedCharging [0,1]."""
+        chargePoint = int(call.data["charge_point_id"])
+        payload = status_payload(call.data.get("selected_status"))
+        for router in routers(call):
+            async_publish_setting(router, "price_based_charging", chargePoint, payload)
+
+    @callback
+    def fun_change_pricebased_price(call: ServiceCall) -> None:
+        """Change the price for price-based charging --> set/awattar/MaxPriceForCharging."""
+        payload = str(call.data.get("target_price"))
+        _LOGGER.debug("set price to: %s", payload)
+        for router in routers(call):
+            async_publish_setting(router, "target_price", None, payload)
+
+    async def fun_apply_charge_profile(call: ServiceCall) -> ServiceResponse:
+        """Apply several settings of the wallbox and its charge points at once.
+
+        Only the settings that differ from the values reported by openWB are published.
+        """
+        addressed = routers(call)
+        if len(addressed) > 1:
+            raise ServiceValidationError(
+                "apply_charge_profile addresses one openWB device per call"
+            )
+        result = await async_apply_charge_profile(hass, addressed[0], call.data)
+        return result if call.return_response else None
+
+    async def fun_get_charge_sessions(call: ServiceCall) -> ServiceResponse:
+        """Return the completed charge sessions that overlap a time range.
+
+        Times without a time zone are local times. Without a start, the range
+        starts with the first session, without an end, it ends now.
+        """
+        start = _timestamp(call.data.get("start"), 0.0)
+        end = _timestamp(call.data.get("end"), dt_util.utcnow().timestamp())
+        chargePoint = call.data.get("charge_point_id")
+        sessions = []
+        for router in routers(call):
+            if router.sessions is None:
+                raise ServiceValidationError(
+                    f"Charge sessions are not tracked for {router.mqtt_root}, "
+                    "enable the option charge_sessions"
+                )
+            for session in await router.sessions.async_query(
+                start, end, None if chargePoint is None else int(chargePoint)
+            ):
+                sessions.append({"mqtt_prefix": router.mqtt_root, **session})
+        return {"sessions": sessions}
+
+    # Register our services with Home Assistant.
+    hass.services.async_register(DOMAIN, "enable_disable_cp", fun_enable_disable_cp)
+    hass.services.async_register(
+        DOMAIN, "change_global_charge_mode", fun_change_global_charge_mode
+    )
+    hass.services.async_register(
+        DOMAIN, "change_charge_limitation_per_cp", fun_change_charge_limitation_per_cp
+    )
+    hass.services.async_register(
+        DOMAIN, "change_charge_current_per_cp", fun_change_charge_current_per_cp
+    )
+    hass.services.async_register(
+        DOMAIN,
+        "enable_disable_price_based_charging",
+        fun_enable_disable_price_based_charging,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        "change_pricebased_price",
+        fun_change_pricebased_price,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        "apply_charge_profile",
+        fun_apply_charge_profile,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        "get_charge_sessions",
+        fun_get_charge_sessions,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+
+def _timestamp(value: str | None, default: float) -> float:
+    """Return the time of a service field in seconds since the epoch."""
+    if not value:
+        return default
+    if (time := dt_util.parse_datetime(str(value))) is None:
+        raise ServiceValidationError(f"{value} is no valid date and time")
+    return dt_util.as_utc(time).timestamp()
+
+
+@callback
+def async_remove_services(hass: HomeAssistant) -> None:
+    """Remove the services once the last openWB device is unloaded."""
+    for service in SERVICES:
+        hass.services.async_remove(DOMAIN, service)
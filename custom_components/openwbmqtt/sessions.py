@@ -0,0 +1,356 @@
+"""The openwbmqtt component for controlling the openWB wallbox via home assistant / MQTT."""
+from __future__ import annotations
+
+from array import array
+import asyncio
+from bisect import bisect_left
+from dataclasses import asdict, dataclass
+from functools import partial
+import logging
+import os
+import struct
+import threading
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.storage import STORAGE_DIR, Store
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    SESSION_LOG_VERSION,
+    SESSION_MAX_GAP,
+    SESSION_SAVE_DELAY,
+    SESSION_STORAGE_VERSION,
+    SESSION_TOPIC_ENERGY,
+    SESSION_TOPIC_PLUGGED,
+    SESSION_TOPIC_POWER,
+    SESSION_TOPIC_TAG,
+)
+from .router import OpenWBTopicRouter
+
+_LOGGER = logging.getLogger(__name__)
+
+# Magic and version at the start of the log file.
+SESSION_HEADER = struct.Struct("<4sH")
+SESSION_MAGIC = b"OWBS"
+# Time logged, start, end, energy in kWh, peak power in W, charge point and
+# RFID tag of a completed session. Times are seconds since the epoch.
+SESSION_RECORD = struct.Struct("<dddffH16s")
+
+
+def session_log_path(hass: HomeAssistant, entryID: str) -> str:
+    """Return the path of the session log of a config entry."""
+    return hass.config.path(STORAGE_DIR, f"{DOMAIN}.{entryID}.sessions")
+
+
+def session_store(hass: HomeAssistant, entryID: str) -> Store:
+    """Return the store of the open sessions of a config entry."""
+    return Store(hass, SESSION_STORAGE_VERSION, f"{DOMAIN}.{entryID}.open_sessions")
+
+
+@dataclass(slots=True)
+class OpenWBChargeSession:
+    """Charge session of one charge point, from plug-in to plug-out.
+
+    While the session is open, end is the time of its last message.
+    """
+
+    chargePoint: int
+    start: float
+    end: float
+    energy: float = 0.0
+    peakPower: float = 0.0
+    tag: str = ""
+
+    def as_response(self) -> dict:
+        """Return the session for the response of a service call."""
+        return {
+            "charge_point_id": self.chargePoint,
+            "start": dt_util.utc_from_timestamp(self.start).isoformat(),
+            "end": dt_util.utc_from_timestamp(self.end).isoformat(),
+            "energy": round(self.energy, 3),
+            "peak_power": round(self.peakPower),
+            "rfid_tag": self.tag,
+        }
+
+
+class OpenWBSessionLog:
+    """Append-only log of the completed charge sessions of one openWB device.
+
+    The file holds a header and fixed-size records in the order in which the
+    sessions were completed. Each record carries the time it was logged,
+    which never decreases, so the file itself is the time index: the first
+    session of a range is found by binary search, and the scan stops once the
+    sessions were logged too late to start within the range. The record
+    numbers of each charge point are indexed in memory when the log is
+    opened. The methods do blocking file I/O and run in the executor.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Initialize the log of the file."""
+        self.path = path
+        self.count = 0
+        # Largest time between the start of a session and its record.
+        self.maxSpan = 0.0
+        self._lastLogged = 0.0
+        self._chargePoints: dict[int, array] = {}
+        self._lock = threading.Lock()
+
+    def open(self) -> None:
+        """Create the file or read its index.
+
+        An incomplete record at the end, left by an interrupted write, is
+        cut off. A file that is no session log is moved aside and a new log
+        is started.
+        """
+        with self._lock:
+            if os.path.exists(self.path):
+                with open(self.path, "rb") as file:
+                    magic = file.read(len(SESSION_MAGIC))
+                if magic != SESSION_MAGIC:
+                    invalid = f"{self.path}.invalid"
+                    _LOGGER.warning(
+                        "%s is no session log, it is moved to %s and a new log is started",
+                        self.path,
+                        invalid,
+                    )
+                    os.replace(self.path, invalid)
+            if not os.path.exists(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(self.path, "wb") as file:
+                    file.write(SESSION_HEADER.pack(SESSION_MAGIC, SESSION_LOG_VERSION))
+                return
+            with open(self.path, "r+b") as file:
+                file.seek(SESSION_HEADER.size)
+                data = file.read()
+                complete = len(data) - len(data) % SESSION_RECORD.size
+                if complete != len(data):
+                    file.truncate(SESSION_HEADER.size + complete)
+            for number, record in enumerate(
+                SESSION_RECORD.iter_unpack(memoryview(data)[:complete])
+            ):
+                self._index(number, record[0], record[1], record[5])
+            self.count = complete // SESSION_RECORD.size
+
+    def append(self, sessions: list[OpenWBChargeSession]) -> None:
+        """Append completed sessions to the file."""
+        with self._lock:
+            records = []
+            for session in sessions:
+                logged = max(self._lastLogged, session.end)
+                self._index(self.count, logged, session.start, session.chargePoint)
+                self.count += 1
+                records.append(
+                    SESSION_RECORD.pack(
+                        logged,
+                        session.start,
+                        session.end,
+                        session.energy,
+                        session.peakPower,
+                        session.chargePoint,
+                        session.tag.encode()[:16],
+                    )
+                )
+            with open(self.path, "ab") as file:
+                file.write(b"".join(records))
+
+    def query(
+        self, start: float, end: float, chargePoint: int | None = None
+    ) -> list[OpenWBChargeSession]:
+        """Return the sessions that overlap the time range, optionally of one charge point."""
+        with self._lock, open(self.path, "rb") as file:
+            if chargePoint is None:
+                numbers = range(self.count)
+            else:
+                numbers = self._chargePoints.get(chargePoint, array("I"))
+            read = partial(self._read, file)
+            # A session that ends within or after the range was logged after
+            # its start.
+            first = bisect_left(numbers, start, key=lambda number: read(number)[0])
+            sessions = []
+            for number in numbers[first:]:
+                logged, sessionStart, sessionEnd, *values = read(number)
+                if logged - self.maxSpan > end:
+                    break
+                if sessionStart <= end and sessionEnd >= start:
+                    energy, peakPower, sessionChargePoint, tag = values
+                    sessions.append(
+                        OpenWBChargeSession(
+                            sessionChargePoint,
+                            sessionStart,
+                            sessionEnd,
+                            energy,
+                            peakPower,
+                            tag.rstrip(b"\0").decode(errors="replace"),
+                        )
+                    )
+            return sessions
+
+    def _index(self, number: int, logged: float, start: float, chargePoint: int):
+        """Add a record to the index of its charge point."""
+        self._lastLogged = logged
+        self.maxSpan = max(self.maxSpan, logged - start)
+        if chargePoint not in self._chargePoints:
+            self._chargePoints[chargePoint] = array("I")
+        self._chargePoints[chargePoint].append(number)
+
+    @staticmethod
+    def _read(file, number: int) -> tuple:
+        """Return the fields of a record."""
+        file.seek(SESSION_HEADER.size + number * SESSION_RECORD.size)
+        return SESSION_RECORD.unpack(file.read(SESSION_RECORD.size))
+
+
+class OpenWBSessionTracker:
+    """Detect the charge sessions of one openWB device from its MQTT messages.
+
+    A session starts when a vehicle is plugged in and ends when it is
+    unplugged. In between, the energy charged since plug-in, the peak power
+    and the last scanned RFID tag are kept. The times are the times at which
+    the topic router received the messages. Completed sessions are
+    appended to the session log, open sessions are stored so that they
+    continue after a restart.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        router: OpenWBTopicRouter,
+        entryID: str,
+        nChargePoints: int,
+    ) -> None:
+        """Initialize the tracker of a config entry."""
+        self.hass = hass
+        self.router = router
+        self.nChargePoints = nChargePoints
+        self.log = OpenWBSessionLog(session_log_path(hass, entryID))
+        self._store = session_store(hass, entryID)
+        # Open sessions by charge point.
+        self.sessions: dict[int, OpenWBChargeSession] = {}
+        # Last scanned RFID tag by charge point.
+        self._tags: dict[int, str] = {}
+        self._remove: list[CALLBACK_TYPE] = []
+        # Pending appends of completed sessions to the log.
+        self._appends: set[asyncio.Task] = set()
+        self._dirty = False
+
+    async def async_load(self) -> None:
+        """Open the session log and load the open sessions."""
+        await self.hass.async_add_executor_job(self.log.open)
+        data = await self._store.async_load()
+        if data is not None:
+            for session in data["sessions"]:
+                self.sessions[session["chargePoint"]] = OpenWBChargeSession(**session)
+
+    @callback
+    def async_start(self) -> None:
+        """Register the topics of the charge points at the topic router."""
+        for chargePoint in range(1, self.nChargePoints + 1):
+            prefix = f"{self.router.mqtt_root}/lp/{chargePoint}"
+            for topic, handler, parser in (
+                (SESSION_TOPIC_PLUGGED, self._async_plugged, int),
+                (SESSION_TOPIC_ENERGY, self._async_energy, float),
+                (SESSION_TOPIC_POWER, self._async_power, float),
+                (SESSION_TOPIC_TAG, self._async_tag, None),
+            ):
+                self._remove.append(
+                    self.router.async_register(
+                        f"{prefix}/{topic}", partial(handler, chargePoint), parser
+                    )
+                )
+
+    async def async_stop(self) -> None:
+        """Remove the topics, finish the pending appends and save the open sessions."""
+        for remove in self._remove:
+            remove()
+        self._remove.clear()
+        if self._appends:
+            await asyncio.gather(*self._appends)
+        if self._dirty:
+            await self._store.async_save(self._data())
+
+    async def async_query(
+        self, start: float, end: float, chargePoint: int | None = None
+    ) -> list[dict]:
+        """Return the completed sessions that overlap the time range."""
+        sessions = await self.hass.async_add_executor_job(
+            self.log.query, start, end, chargePoint
+        )
+        return [session.as_response() for session in sessions]
+
+    @callback
+    def _async_session(self, chargePoint: int) -> OpenWBChargeSession | None:
+        """Return the open session of a charge point, updated to the current message.
+
+        Replayed payloads of the snapshot have no time and are skipped.
+        """
+        session = self.sessions.get(chargePoint)
+        if session is None or self.router.message is None:
+            return None
+        session.end = self.router.async_message_time()
+        self._async_changed()
+        return session
+
+    @callback
+    def _async_plugged(self, chargePoint: int, plugged: int) -> None:
+        """Start or end the session of a charge point."""
+        if self.router.message is None:
+            return
+        now = self.router.async_message_time()
+        session = self.sessions.get(chargePoint)
+        if plugged and session is None:
+            self.sessions[chargePoint] = OpenWBChargeSession(
+                chargePoint, now, now, tag=self._tags.get(chargePoint, "")
+            )
+            self._async_changed()
+        elif plugged:
+            session.end = now
+        elif session is not None:
+            del self.sessions[chargePoint]
+            if now - session.end <= SESSION_MAX_GAP:
+                session.end = now
+            self._async_changed()
+            task = self.hass.async_create_task(self._async_append(session))
+            self._appends.add(task)
+            task.add_done_callback(self._appends.discard)
+
+    async def _async_append(self, session: OpenWBChargeSession) -> None:
+        """Append a completed session to the log."""
+        try:
+            await self.hass.async_add_executor_job(self.log.append, [session])
+        except OSError:
+            _LOGGER.exception(
+                "Unable to append the charge session %s to %s", session, self.log.path
+            )
+
+    @callback
+    def _async_energy(self, chargePoint: int, energy: float) -> None:
+        """Keep the energy charged since plug-in."""
+        if (session := self._async_session(chargePoint)) is not None:
+            session.energy = energy
+
+    @callback
+    def _async_power(self, chargePoint: int, power: float) -> None:
+        """Keep the peak power of the session."""
+        if (session := self._async_session(chargePoint)) is not None:
+            session.peakPower = max(session.peakPower, power)
+
+    @callback
+    def _async_tag(self, chargePoint: int, tag: str) -> None:
+        """Keep the last scanned RFID tag."""
+        self._tags[chargePoint] = tag
+        if (session := self._async_session(chargePoint)) is not None:
+            session.tag = tag
+
+    @callback
+    def _async_changed(self) -> None:
+        """Save the open sessions with a delay."""
+        if not self._dirty:
+            self._dirty = True
+            self._store.async_delay_save(self._data, SESSION_SAVE_DELAY)
+
+    @callback
+    def _data(self) -> dict[str, list[dict]]:
+        """Return the data to store."""
+        self._dirty = False
+        return {"sessions": [asdict(session) for session in self.sessions.values()]}
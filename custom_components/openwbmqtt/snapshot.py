@@ -0,0 +1,76 @@
+"""The openwbmqtt component for controlling the openWB wallbox via home assistant / MQTT."""
+from __future__ import annotations
+
+from collections.abc import Callable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    DOMAIN,
+    SNAPSHOT_EXCLUDED_TOPICS,
+    SNAPSHOT_SAVE_DELAY,
+    SNAPSHOT_STORAGE_VERSION,
+)
+from .delivery import topic_matches
+
+
+def snapshot_topic(topic: str) -> bool:
+    """Return True if the payload of a topic relative to the MQTT root is kept in the snapshot."""
+    return not any(
+        topic_matches(topicFilter, topic) for topicFilter in SNAPSHOT_EXCLUDED_TOPICS
+    )
+
+
+class OpenWBSnapshot:
+    """Persist the last payloads of the topics of one openWB device.
+
+    After a restart, the payloads are replayed to the entities before live
+    data arrives, so that they start with their previous values. The raw
+    payloads are stored instead of the parsed values: they are JSON as they
+    are and the parsers of the entities are applied on replay.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entryID: str,
+        payloads_func: Callable[[], dict[str, str]],
+    ) -> None:
+        """Initialize the snapshot of a config entry."""
+        self._store: Store = Store(
+            hass, SNAPSHOT_STORAGE_VERSION, f"{DOMAIN}.{entryID}.snapshot"
+        )
+        self._payloads_func = payloads_func
+        self._dirty = False
+
+    async def async_load(self) -> dict[str, str]:
+        """Return the stored payloads by topic relative to the MQTT root."""
+        data = await self._store.async_load()
+        return {} if data is None else data["payloads"]
+
+    @callback
+    def async_schedule_save(self) -> None:
+        """Save the payloads in the background.
+
+        The first change after a save schedules the next one, so the file is
+        written at most once per save delay, however many topics change.
+        """
+        if not self._dirty:
+            self._dirty = True
+            self._store.async_delay_save(self._data, SNAPSHOT_SAVE_DELAY)
+
+    async def async_save(self) -> None:
+        """Save pending changes right away."""
+        if self._dirty:
+            await self._store.async_save(self._data())
+
+    async def async_remove(self) -> None:
+        """Remove the stored snapshot."""
+        await self._store.async_remove()
+
+    @callback
+    def _data(self) -> dict[str, dict[str, str]]:
+        """Return the data to store."""
+        self._dirty = False
+        return {"payloads": self._payloads_func()}
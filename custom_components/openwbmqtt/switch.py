@@ -1,17 +1,19 @@
 """The openwbmqtt component for controlling the openWB wallbox via home assistant / MQTT."""
 from __future__ import annotations
 
-import copy
 import logging
 
-from homeassistant.components import mqtt
 from homeassistant.components.switch import DOMAIN, SwitchEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.util import slugify
 
-from .common import OpenWBBaseEntity
+from .common import (
+    OpenWBBaseEntity,
+    OpenWBTopicBinding,
+    async_add_discovered_entities,
+)
 from .const import (
     CHARGE_POINTS,
     MQTT_ROOT_TOPIC,
@@ -37,18 +39,24 @@ async def async_setup_entry(
     # todo: global switches
 
     for chargePoint in range(1, nChargePoints + 1):
-        localSwitchesPerLP = copy.deepcopy(SWITCHES_PER_LP)
-        for description in localSwitchesPerLP:
+        for description in SWITCHES_PER_LP:
             if description.mqttTopicChargeMode:
-                description.mqttTopicCommand = f"{mqttRoot}/config/set/{str(description.mqttTopicChargeMode)}/lp/{str(chargePoint)}/{description.mqttTopicCommand}"
-                description.mqttTopicCurrentValue = f"{mqttRoot}/config/get/{str(description.mqttTopicChargeMode)}/lp/{str(chargePoint)}/{description.mqttTopicCurrentValue}"
+                topics = OpenWBTopicBinding(
+                    currentValue=f"{mqttRoot}/config/get/{str(description.mqttTopicChargeMode)}/lp/{str(chargePoint)}/{description.mqttTopicCurrentValue}",
+                    command=f"{mqttRoot}/config/set/{str(description.mqttTopicChargeMode)}/lp/{str(chargePoint)}/{description.mqttTopicCommand}",
+                    chargePoint=chargePoint,
+                )
             else:  # for manual SoC module
-                description.mqttTopicCommand = f"{mqttRoot}/set/lp/{str(chargePoint)}/{description.mqttTopicCommand}"
-                description.mqttTopicCurrentValue = f"{mqttRoot}/lp/{str(chargePoint)}/{description.mqttTopicCurrentValue}"
+                topics = OpenWBTopicBinding(
+                    currentValue=f"{mqttRoot}/lp/{str(chargePoint)}/{description.mqttTopicCurrentValue}",
+                    command=f"{mqttRoot}/set/lp/{str(chargePoint)}/{description.mqttTopicCommand}",
+                    chargePoint=chargePoint,
+                )
             switchList.append(
                 openwbSwitch(
                     unique_id=integrationUniqueID,
                     description=description,
+                    topics=topics,
                     nChargePoints=int(nChargePoints),
                     currentChargePoint=chargePoint,
                     device_friendly_name=integrationUniqueID,
@@ -56,7 +64,7 @@ async def async_setup_entry(
                 )
             )
 
-    async_add_entities(switchList)
+    async_add_discovered_entities(hass, config_entry, async_add_entities, switchList)
 
 
 class openwbSwitch(OpenWBBaseEntity, SwitchEntity):
@@ -69,6 +77,7 @@ class openwbSwitch(OpenWBBaseEntity, SwitchEntity):
         unique_id: str,
         device_friendly_name: str,
         description: openwbSwitchEntityDescription,
+        topics: OpenWBTopicBinding,
         mqtt_root: str,
         currentChargePoint: int | None = None,
         nChargePoints: int | None = None,
@@ -80,6 +89,7 @@ class openwbSwitch(OpenWBBaseEntity, SwitchEntity):
         )
         # Initialize the inverter operation mode setting entity
         self.entity_description = description
+        self.topics = topics
 
         if nChargePoints:
             self._attr_unique_id = slugify(
@@ -98,25 +108,25 @@ class openwbSwitch(OpenWBBaseEntity, SwitchEntity):
         """Subscribe to MQTT events."""
 
         @callback
-        def message_received(message):
-            if int(message.payload) == 1:
+        def message_received(value):
+            """Handle new MQTT messages."""
+            if value == 1:
                 self._attr_is_on = True
-            elif int(message.payload) == 0:
+            elif value == 0:
                 self._attr_is_on = False
             else:
                 self._attr_is_on = None
 
-            self.async_write_ha_state()
+            self.async_write_ha_state_if_changed(self._attr_is_on)
 
-        # Subscribe to MQTT topic and connect callack message
-        await mqtt.async_subscribe(
-            self.hass,
-            self.entity_description.mqttTopicCurrentValue,
+        # Register the topic at the router and connect callback message
+        self.async_subscribe_topic(
+            self.topics.currentValue,
             message_received,
-            1,
+            int,
         )
 
-    def turn_on(self, **kwargs):
+    async def async_turn_on(self, **kwargs):
         """Turn the switch on.
 
         After turn_on --> the result is published to MQTT.
@@ -127,7 +137,7 @@ class openwbSwitch(OpenWBBaseEntity, SwitchEntity):
         self.publishToMQTT()
         # self.schedule_update_ha_state()
 
-    def turn_off(self, **kwargs):
+    async def async_turn_off(self, **kwargs):
         """Turn the device off.
 
         After turn_off --> the result is published to MQTT.
@@ -140,5 +150,12 @@ class openwbSwitch(OpenWBBaseEntity, SwitchEntity):
 
     def publishToMQTT(self):
         """Publish data to MQTT."""
-        topic = f"{self.entity_description.mqttTopicCommand}"
-        self.hass.components.mqtt.publish(self.hass, topic, str(int(self._attr_is_on)))
+        topic = f"{self.topics.command}"
+        # Nothing to do if openWB already confirmed the state.
+        self._router.commands.async_publish(
+            topic,
+            str(int(self._attr_is_on)),
+            noop=self._reports_state(self._attr_is_on),
+            confirmTopic=self.topics.currentValue,
+            chargePoint=self.topics.chargePoint,
+        )
@@ -0,0 +1,146 @@
+"""The openwbmqtt component for controlling the openWB wallbox via home assistant / MQTT."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+import logging
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+from .const import WATCHDOG_SLOTS, WATCHDOG_TICK
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class OpenWBTopicWatchdog:
+    """Mark the topics of one openWB device stale that stopped being published.
+
+    The time is counted in ticks of one timer. For each topic, the tick it
+    was last seen and the smoothed interval between its messages are kept,
+    so a message costs a dict lookup and no clock read. A topic is stale if
+    it has been silent for more than factor times its interval.
+
+    The deadlines are kept in a timer wheel with one slot per tick. A slot
+    holds the topics whose deadline might be due at its tick. Messages do
+    not move a topic in the wheel, instead a due topic is checked when its
+    slot comes up and put back into the slot of its current deadline if it
+    has been seen in the meantime. Deadlines beyond the wheel are put into
+    the last slot and checked again when they come up.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        factor: float,
+        tick: float = WATCHDOG_TICK,
+        slots: int = WATCHDOG_SLOTS,
+    ) -> None:
+        """Initialize the watchdog, the tick is given in seconds."""
+        self.hass = hass
+        self.factor = factor
+        self.tick = tick
+        self.ticks = 0
+        # topic -> [tick last seen, interval in ticks or 0 if not known yet,
+        # 1 if the topic is in the wheel else 0]
+        self._seen: dict[str, list] = {}
+        self._wheel: list[set[str]] = [set() for _ in range(slots)]
+        self._listeners: dict[str, list[Callable[[str, bool], None]]] = {}
+        self.stale: set[str] = set()
+        self._timer: asyncio.TimerHandle | None = None
+
+    @callback
+    def async_start(self) -> None:
+        """Start the timer of the wheel."""
+        self._timer = self.hass.loop.call_later(self.tick, self._async_tick)
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop the timer of the wheel."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    @callback
+    def async_listen(
+        self, topic: str, listener: Callable[[str, bool], None]
+    ) -> CALLBACK_TYPE:
+        """Call the listener with the topic and True or False when it becomes stale or fresh.
+
+        Returns a callback to remove the listener.
+        """
+        listeners = self._listeners.setdefault(topic, [])
+        listeners.append(listener)
+
+        @callback
+        def async_remove() -> None:
+            listeners.remove(listener)
+            if not listeners:
+                del self._listeners[topic]
+
+        return async_remove
+
+    @callback
+    def async_seen(self, topic: str) -> None:
+        """Record a message of the topic."""
+        seen = self._seen.get(topic)
+        if seen is None:
+            self._seen[topic] = [self.ticks, 0, 0]
+            return
+        gap = self.ticks - seen[0]
+        if not gap:
+            return
+        seen[0] = self.ticks
+        if topic in self.stale:
+            # The silence of a stale topic is not taken as its interval.
+            self.stale.discard(topic)
+            self._async_notify(topic, False)
+        elif seen[1]:
+            # Exponential smoothing of the interval.
+            seen[1] += (gap - seen[1]) / 4
+        else:
+            seen[1] = gap
+        if not seen[2]:
+            seen[2] = 1
+            self._async_insert(topic, seen)
+
+    def _deadline(self, seen: list) -> int:
+        """Return the tick after which the topic is stale.
+
+        A topic is silent for at least two ticks before it is stale, so that
+        a message arriving late within a tick does not count.
+        """
+        return seen[0] + max(2, int(self.factor * seen[1] + 0.5))
+
+    @callback
+    def _async_insert(self, topic: str, seen: list) -> None:
+        """Put the topic into the slot of its deadline."""
+        delay = min(max(self._deadline(seen) - self.ticks, 1), len(self._wheel) - 1)
+        self._wheel[(self.ticks + delay) % len(self._wheel)].add(topic)
+
+    @callback
+    def _async_tick(self) -> None:
+        """Advance the wheel by one tick and check the topics of the slot."""
+        self.ticks += 1
+        self._timer = self.hass.loop.call_later(self.tick, self._async_tick)
+        slot = self._wheel[self.ticks % len(self._wheel)]
+        if not slot:
+            return
+        due = list(slot)
+        slot.clear()
+        for topic in due:
+            seen = self._seen[topic]
+            if self._deadline(seen) > self.ticks:
+                self._async_insert(topic, seen)
+                continue
+            # Silent for too long, the topic enters the wheel again with
+            # its next message.
+            seen[2] = 0
+            self.stale.add(topic)
+            _LOGGER.debug("Topic %s is stale", topic)
+            self._async_notify(topic, True)
+
+    @callback
+    def _async_notify(self, topic: str, stale: bool) -> None:
+        """Call the listeners of a topic."""
+        for listener in self._listeners.get(topic, ()):
+            listener(topic, stale)
@@ -0,0 +1,70 @@
+"""Fixtures of the openwbmqtt tests."""
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+
+
+class ManualTimer:
+    """Timer of the manual loop."""
+
+    def __init__(self, when: float, callback, args: tuple) -> None:
+        """Initialize the timer."""
+        self.when = when
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        """Cancel the timer."""
+        self.cancelled = True
+
+
+class ManualLoop:
+    """Event loop whose time only moves when it is advanced."""
+
+    def __init__(self) -> None:
+        """Initialize the loop at time zero."""
+        self.now = 0.0
+        self.timers: list[ManualTimer] = []
+
+    def time(self) -> float:
+        """Return the time of the loop."""
+        return self.now
+
+    def call_at(self, when: float, callback, *args) -> ManualTimer:
+        """Call the callback at the given time."""
+        timer = ManualTimer(when, callback, args)
+        self.timers.append(timer)
+        return timer
+
+    def call_later(self, delay: float, callback, *args) -> ManualTimer:
+        """Call the callback after the delay."""
+        return self.call_at(self.now + delay, callback, *args)
+
+    def advance(self, seconds: float) -> None:
+        """Move the time and run the timers that are due."""
+        end = self.now + seconds
+        while True:
+            due = [
+                timer
+                for timer in self.timers
+                if not timer.cancelled and timer.when <= end
+            ]
+            if not due:
+                break
+            timer = min(due, key=lambda timer: timer.when)
+            self.timers.remove(timer)
+            self.now = timer.when
+            timer.callback(*timer.args)
+        self.now = end
+
+
+@pytest.fixture
+def manual_hass() -> SimpleNamespace:
+    """Return the parts of Home Assistant used by the timers of the component."""
+    tasks: list = []
+    return SimpleNamespace(
+        loop=ManualLoop(), tasks=tasks, async_create_task=tasks.append
+    )
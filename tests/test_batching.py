@@ -0,0 +1,71 @@
+"""Tests of the batched state writes."""
+from custom_components.openwbmqtt.batching import OpenWBStateBatcher
+
+
+class FakeEntity:
+    """Entity that records its state writes."""
+
+    def __init__(self, entity_id: str, written: list) -> None:
+        """Initialize the entity."""
+        self.entity_id = entity_id
+        self.written = written
+
+    def async_write_ha_state(self) -> None:
+        """Record the state write."""
+        self.written.append(self.entity_id)
+
+
+def test_quiet_gap(manual_hass) -> None:
+    """Test that a burst is written once no state changed for the quiet gap."""
+    written = []
+    batcher = OpenWBStateBatcher(manual_hass, 1.0, quietGap=0.25)
+    first = FakeEntity("sensor.a", written)
+    second = FakeEntity("sensor.b", written)
+    batcher.async_schedule_write(first)
+    manual_hass.loop.advance(0.125)
+    batcher.async_schedule_write(second)
+    batcher.async_schedule_write(first)
+    manual_hass.loop.advance(0.125)
+    assert not written
+    manual_hass.loop.advance(0.125)
+    assert written == ["sensor.a", "sensor.b"]
+    assert (batcher.flushes, batcher.lastFlushSize) == (1, 2)
+    assert batcher.lastBurstDuration == 0.125
+
+
+def test_max_latency(manual_hass) -> None:
+    """Test that a burst without a quiet gap is written after the maximum latency."""
+    written = []
+    batcher = OpenWBStateBatcher(manual_hass, 0.5, quietGap=0.25)
+    entity = FakeEntity("sensor.a", written)
+    for _ in range(3):
+        batcher.async_schedule_write(entity)
+        manual_hass.loop.advance(0.125)
+    batcher.async_schedule_write(entity)
+    manual_hass.loop.advance(0.125)
+    assert written == ["sensor.a"]
+    assert batcher.lastBurstDuration == 0.375
+
+
+def test_discard(manual_hass) -> None:
+    """Test that the pending write of a removed entity is dropped."""
+    written = []
+    batcher = OpenWBStateBatcher(manual_hass, 1.0)
+    removed = FakeEntity("sensor.a", written)
+    batcher.async_schedule_write(removed)
+    batcher.async_schedule_write(FakeEntity("sensor.b", written))
+    batcher.async_discard(removed)
+    manual_hass.loop.advance(1)
+    assert written == ["sensor.b"]
+
+
+def test_flush(manual_hass) -> None:
+    """Test that a flush writes the pending states and cancels the timers."""
+    written = []
+    batcher = OpenWBStateBatcher(manual_hass, 1.0)
+    batcher.async_schedule_write(FakeEntity("sensor.a", written))
+    batcher.async_flush()
+    assert written == ["sensor.a"]
+    assert all(timer.cancelled for timer in manual_hass.loop.timers)
+    batcher.async_flush()
+    assert batcher.flushes == 1
@@ -0,0 +1,83 @@
+"""Tests of the command coalescing."""
+import pytest
+
+from custom_components.openwbmqtt import commands
+from custom_components.openwbmqtt.commands import OpenWBCommandCoalescer
+
+
+@pytest.fixture
+def published(monkeypatch) -> list:
+    """Record the published commands."""
+    messages = []
+    monkeypatch.setattr(
+        commands.mqtt,
+        "async_publish",
+        lambda hass, topic, payload: messages.append((topic, payload)),
+    )
+    return messages
+
+
+def test_merge(manual_hass, published) -> None:
+    """Test that only the last command within the settle window is published."""
+    coalescer = OpenWBCommandCoalescer(manual_hass, 1.0)
+    coalescer.async_publish("set/a", "1")
+    manual_hass.loop.advance(0.5)
+    coalescer.async_publish("set/a", "2")
+    coalescer.async_publish("set/b", "3")
+    manual_hass.loop.advance(0.9)
+    assert not published
+    manual_hass.loop.advance(0.1)
+    assert published == [("set/a", "2"), ("set/b", "3")]
+    assert (coalescer.sent, coalescer.merged, coalescer.dropped) == (2, 1, 0)
+
+
+def test_noop(manual_hass, published) -> None:
+    """Test that a no-op is dropped together with the pending command."""
+    coalescer = OpenWBCommandCoalescer(manual_hass, 1.0)
+    coalescer.async_publish("set/a", "1")
+    coalescer.async_publish("set/a", "0", noop=True)
+    coalescer.async_publish("set/b", "0", noop=True)
+    manual_hass.loop.advance(5)
+    assert not published
+    assert (coalescer.sent, coalescer.merged, coalescer.dropped) == (0, 0, 2)
+
+
+def test_noop_counts(manual_hass, published) -> None:
+    """Test that a no-op replacing a pending command is counted as dropped only."""
+    coalescer = OpenWBCommandCoalescer(manual_hass, 1.0)
+    coalescer.async_publish("set/a", "1")
+    coalescer.async_publish("set/a", "2")
+    coalescer.async_publish("set/a", "0", noop=True)
+    coalescer.async_publish("set/a", "3")
+    manual_hass.loop.advance(1)
+    assert published == [("set/a", "3")]
+    assert (coalescer.sent, coalescer.merged, coalescer.dropped) == (1, 1, 1)
+
+
+def test_immediate(manual_hass, published) -> None:
+    """Test that immediate commands skip the settle window."""
+    coalescer = OpenWBCommandCoalescer(manual_hass, 1.0)
+    coalescer.async_publish("set/a", "1")
+    coalescer.async_publish("set/a", "2", immediate=True)
+    assert published == [("set/a", "2")]
+    manual_hass.loop.advance(5)
+    assert published == [("set/a", "2")]
+
+
+def test_no_settle_window(manual_hass, published) -> None:
+    """Test that commands are published right away without a settle window."""
+    coalescer = OpenWBCommandCoalescer(manual_hass, 0)
+    coalescer.async_publish("set/a", "1")
+    coalescer.async_publish("set/a", "1")
+    assert published == [("set/a", "1"), ("set/a", "1")]
+
+
+def test_flush(manual_hass, published) -> None:
+    """Test that a flush publishes the pending commands."""
+    coalescer = OpenWBCommandCoalescer(manual_hass, 1.0)
+    coalescer.async_publish("set/a", "1")
+    coalescer.async_publish("set/b", "2")
+    coalescer.async_flush()
+    assert published == [("set/a", "1"), ("set/b", "2")]
+    manual_hass.loop.advance(5)
+    assert coalescer.sent == 2
@@ -0,0 +1,149 @@
+"""Tests of the openWB entity base class."""
+from types import SimpleNamespace
+
+from custom_components.openwbmqtt import common
+from custom_components.openwbmqtt.common import OpenWBBaseEntity
+from custom_components.openwbmqtt.const import DOMAIN
+
+
+class FakeEntity(OpenWBBaseEntity):
+    """Entity that records its state writes."""
+
+    def __init__(self) -> None:
+        """Initialize the entity with a fake topic router."""
+        super().__init__("openWB", "openWB")
+        self._router = SimpleNamespace(suppressedWrites=0, stateWrites=0, batcher=None)
+        self.written: list[tuple] = []
+
+    def async_write_ha_state(self) -> None:
+        """Record the state write."""
+        self.written.append(self._lastWrittenState)
+
+
+def test_write_suppression() -> None:
+    """Test that a state is only written when it changed."""
+    entity = FakeEntity()
+    entity.async_write_ha_state_if_changed(16)
+    entity.async_write_ha_state_if_changed(16)
+    entity.async_write_ha_state_if_changed(16.5)
+    entity.async_write_ha_state_if_changed(16.5)
+    entity.async_write_ha_state_if_changed(16)
+    assert entity.written == [(16,), (16.5,), (16,)]
+    assert entity._router.suppressedWrites == 2
+
+
+def test_write_icon_change() -> None:
+    """Test that a changed icon is written even if the value did not change."""
+    entity = FakeEntity()
+    entity.async_write_ha_state_if_changed(1, "mdi:numeric-1-circle-outline")
+    entity.async_write_ha_state_if_changed(1, "mdi:numeric-3-circle-outline")
+    assert len(entity.written) == 2
+    assert entity._router.suppressedWrites == 0
+
+
+class FakeRegistry:
+    """Entity registry with entries of openWB entities."""
+
+    def __init__(self) -> None:
+        """Initialize the registry."""
+        self.entries: dict[str, SimpleNamespace] = {}
+
+    def add(self, entityID: str, uniqueID: str, disabled: bool) -> None:
+        """Add an entry of the config entry of the tests."""
+        self.entries[entityID] = SimpleNamespace(
+            entity_id=entityID,
+            domain=entityID.split(".", 1)[0],
+            unique_id=uniqueID,
+            platform=DOMAIN,
+            config_entry_id="entry",
+            disabled=disabled,
+        )
+
+    def async_get_entity_id(self, domain: str, platform: str, uniqueID: str):
+        """Return the entity id of an entry."""
+        for entry in self.entries.values():
+            if entry.domain == domain and entry.unique_id == uniqueID:
+                return entry.entity_id
+        return None
+
+    def async_get(self, entityID: str):
+        """Return an entry."""
+        return self.entries.get(entityID)
+
+
+class FakeRegisteredEntity:
+    """Entity that HA adds and removes."""
+
+    discoveryTopic = None
+
+    def __init__(self, entityID: str, uniqueID: str) -> None:
+        """Initialize the entity."""
+        self.entity_id = entityID
+        self.unique_id = uniqueID
+        self.added = False
+        self.prepared = 0
+
+    def async_is_added(self) -> bool:
+        """Return True if HA added the entity."""
+        return self.added
+
+    def async_prepare_add(self) -> None:
+        """Count the preparations to be added again."""
+        self.prepared += 1
+
+
+def test_registry_gating(monkeypatch) -> None:
+    """Test that disabled entities are skipped and added once they are enabled."""
+    registry = FakeRegistry()
+    registry.add("sensor.enabled", "enabled", False)
+    registry.add("sensor.disabled", "disabled", True)
+    monkeypatch.setattr(common.er, "async_get", lambda hass: registry)
+    listeners = []
+    hass = SimpleNamespace(
+        data={DOMAIN: SimpleNamespace(routers={})},
+        bus=SimpleNamespace(
+            async_listen=lambda event, listener: listeners.append(listener)
+        ),
+    )
+    config = SimpleNamespace(options={}, entry_id="entry", async_on_unload=id)
+    added = []
+
+    def async_add_entities(entities) -> None:
+        for entity in entities:
+            entity.added = True
+        added.append([entity.entity_id for entity in entities])
+
+    enabled = FakeRegisteredEntity("sensor.enabled", "enabled")
+    disabled = FakeRegisteredEntity("sensor.disabled", "disabled")
+    # Created disabled by default, HA rejects it.
+    default = FakeRegisteredEntity("sensor.default", "default")
+    common.async_add_discovered_entities(
+        hass, config, async_add_entities, [enabled, disabled, default]
+    )
+    assert added == [["sensor.enabled", "sensor.default"]]
+    default.added = False
+    registry.add("sensor.default", "default", True)
+
+    def update(entityID: str, disabled: bool) -> None:
+        registry.entries[entityID].disabled = disabled
+        listeners[0](
+            SimpleNamespace(
+                data={
+                    "action": "update",
+                    "entity_id": entityID,
+                    "changes": {"disabled_by": None},
+                }
+            )
+        )
+
+    update("sensor.disabled", False)
+    update("sensor.default", False)
+    assert added[1:] == [["sensor.disabled"], ["sensor.default"]]
+    assert (disabled.prepared, default.prepared) == (1, 1)
+    # Entities that HA added already are left alone.
+    update("sensor.enabled", False)
+    # Entities of another config entry are left alone.
+    registry.entries["sensor.disabled"].config_entry_id = "other"
+    disabled.added = False
+    update("sensor.disabled", False)
+    assert len(added) == 3
@@ -0,0 +1,82 @@
+"""Tests of the delivery policies of the openWB topics."""
+from types import SimpleNamespace
+
+from custom_components.openwbmqtt.const import (
+    DELIVERY_CONFIG_ECHO,
+    DELIVERY_COUNTER,
+    DELIVERY_DIAGNOSTIC,
+    DELIVERY_STATE,
+    DELIVERY_TELEMETRY,
+)
+from custom_components.openwbmqtt.delivery import (
+    delivery_class,
+    delivery_policy,
+    retained_is_live,
+    topic_matches,
+)
+from custom_components.openwbmqtt.router import OpenWBTopicRouter
+
+
+def test_topic_matches() -> None:
+    """Test the MQTT wildcards of the topic filters."""
+    assert topic_matches("lp/#", "lp/1/W")
+    assert topic_matches("lp/+/W", "lp/1/W")
+    assert not topic_matches("lp/+/W", "lp/1/W/x")
+    assert not topic_matches("lp/+/W", "lp/1")
+    assert not topic_matches("evu/W", "pv/W")
+
+
+def test_delivery_class() -> None:
+    """Test that topics get the class of their topic or of their subscription."""
+    assert delivery_class("lp/1/W") == DELIVERY_TELEMETRY
+    assert delivery_class("lp/1/kWhCounter") == DELIVERY_COUNTER
+    assert delivery_class("lp/1/boolPlugStat") == DELIVERY_STATE
+    assert delivery_class("config/get/sofort/lp/1/current") == DELIVERY_CONFIG_ECHO
+    assert delivery_class("system/Version") == DELIVERY_DIAGNOSTIC
+    assert delivery_class("unknown/topic") is None
+    assert delivery_policy("unknown/topic") is None
+    assert delivery_policy("config/get/sofort/lp/1/current").qos == 1
+
+
+def test_retained_is_live() -> None:
+    """Test which retained messages are current values."""
+    assert not retained_is_live("lp/1/W")
+    assert not retained_is_live("evu/W")
+    assert retained_is_live("lp/1/kWhCounter")
+    assert retained_is_live("lp/1/boolPlugStat")
+    assert retained_is_live("unknown/topic")
+
+
+def test_retained_messages(manual_hass) -> None:
+    """Test that retained telemetry is passed on as a replay and states as live."""
+    router = OpenWBTopicRouter(manual_hass, "openWB")
+    seen = []
+    router.watchdog = SimpleNamespace(async_seen=seen.append, async_stop=lambda: None)
+    received = []
+
+    def handler(value) -> None:
+        received.append((value, router.message is not None))
+
+    router.async_register("openWB/lp/1/W", handler, int)
+    router.async_register("openWB/lp/1/kWhCounter", handler, float)
+    router.async_register("openWB/lp/1/boolPlugStat", handler, int)
+    for topic, payload in (
+        ("openWB/lp/1/W", b"3680"),
+        ("openWB/lp/1/kWhCounter", b"12.5"),
+        ("openWB/lp/1/boolPlugStat", b"1"),
+    ):
+        router.async_handle_message(
+            SimpleNamespace(topic=topic, payload=payload, retain=True)
+        )
+    assert received == [(3680, False), (12.5, True), (1, True)]
+    assert router.topicStats["openWB/lp/1/W"].retainedReplayed == 1
+    assert router.topicStats["openWB/lp/1/kWhCounter"].retainedReplayed == 0
+    # The retained telemetry replaces an older payload of the snapshot.
+    assert router.last_payload("openWB/lp/1/W") == b"3680"
+    # Only live messages of periodic topics feed the watchdog.
+    assert seen == ["openWB/lp/1/kWhCounter"]
+    router.async_handle_message(
+        SimpleNamespace(topic="openWB/lp/1/W", payload=b"3680", retain=False)
+    )
+    assert received[-1] == (3680, True)
+    assert seen[-1] == "openWB/lp/1/W"
@@ -0,0 +1,45 @@
+"""Tests of the diagnostics."""
+import asyncio
+import json
+from types import SimpleNamespace
+
+from custom_components.openwbmqtt.const import CHARGE_POINTS, DOMAIN, MQTT_ROOT_TOPIC
+from custom_components.openwbmqtt.diagnostics import (
+    async_get_config_entry_diagnostics,
+)
+from custom_components.openwbmqtt.router import OpenWBTopicRouter
+
+
+def test_diagnostics() -> None:
+    """Test the traffic counters and that the MQTT root is redacted."""
+    router = OpenWBTopicRouter(None, "garage/openWB")
+    router.commands = SimpleNamespace(sent=1, merged=2, dropped=3)
+    router.latency = SimpleNamespace(pending={}, timeouts={1: 2})
+    router.async_register("garage/openWB/lp/1/W", lambda value: None, int, "sensor")
+    for payload in (b"3680", b"3680", b"x"):
+        router.async_handle_message(
+            SimpleNamespace(topic="garage/openWB/lp/1/W", payload=payload, retain=False)
+        )
+    router.async_handle_message(
+        SimpleNamespace(topic="garage/openWB/evu/W", payload=b"1", retain=False)
+    )
+    hass = SimpleNamespace(data={DOMAIN: SimpleNamespace(routers={"entry": router})})
+    entry = SimpleNamespace(
+        entry_id="entry",
+        title="garage/openWB",
+        unique_id="garage/openWB",
+        data={MQTT_ROOT_TOPIC: "garage/openWB", CHARGE_POINTS: 1},
+        options={},
+    )
+    diagnostics = asyncio.run(async_get_config_entry_diagnostics(hass, entry))
+    assert "garage" not in json.dumps(diagnostics)
+    assert diagnostics["entry"]["data"][CHARGE_POINTS] == 1
+    counters = diagnostics["topics"]["lp/1/W"]
+    assert (counters["messages"], counters["unchanged"], counters["parseErrors"]) == (
+        3,
+        1,
+        1,
+    )
+    assert diagnostics["platforms"]["sensor"]["messages"] == 3
+    assert diagnostics["platforms"]["unrouted"]["messages"] == 1
+    assert diagnostics["router"]["commandTimeouts"] == {"1": 2}
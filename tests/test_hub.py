@@ -0,0 +1,90 @@
+"""Tests of the integration hub."""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from custom_components.openwbmqtt import hub as hub_module
+from custom_components.openwbmqtt.hub import OpenWBHub, subscription_filters
+
+
+class FakeRouter:
+    """Topic router that records its messages."""
+
+    def __init__(self, mqtt_root: str) -> None:
+        """Initialize the router."""
+        self.mqtt_root = mqtt_root
+        self.topics: list[str] = []
+
+    def async_handle_message(self, message) -> None:
+        """Record the topic of the message."""
+        self.topics.append(message.topic)
+
+
+@pytest.fixture
+def subscriptions(monkeypatch) -> set:
+    """Record the current MQTT subscriptions."""
+    current = set()
+
+    async def async_subscribe(hass, topicFilter, msg_callback, *args, **kwargs):
+        current.add(topicFilter)
+        return lambda: current.discard(topicFilter)
+
+    monkeypatch.setattr(hub_module.mqtt, "async_subscribe", async_subscribe)
+    return current
+
+
+def add_router(hub: OpenWBHub, entryID: str, mqtt_root: str) -> FakeRouter:
+    """Add and subscribe a router."""
+    router = FakeRouter(mqtt_root)
+    hub.async_add_router(entryID, router)
+    asyncio.run(hub.async_subscribe_router(router))
+    return router
+
+
+def send(hub: OpenWBHub, topic: str) -> None:
+    """Pass a message to the hub."""
+    hub.async_handle_message(SimpleNamespace(topic=topic, payload=b"1", retain=False))
+
+
+def test_subscription_filters() -> None:
+    """Test that roots below a common parent share one set of subscriptions."""
+    assert subscription_filters([]) == {}
+    filters = subscription_filters(["bridge/garage/openWB", "bridge/yard/openWB"])
+    assert filters["bridge/+/openWB/config/get/#"] == 1
+    assert filters["bridge/+/openWB/lp/#"] == 0
+    assert all(topicFilter.startswith("bridge/+/openWB/") for topicFilter in filters)
+    filters = subscription_filters(["openWB", "wallbox"])
+    assert "openWB/lp/#" in filters
+    assert "wallbox/lp/#" in filters
+
+
+def test_routing(subscriptions) -> None:
+    """Test that messages are passed to the router of their MQTT root."""
+    hub = OpenWBHub(None)
+    garage = add_router(hub, "1", "bridge/garage/openWB")
+    yard = add_router(hub, "2", "bridge/yard/openWB")
+    assert "bridge/+/openWB/lp/#" in subscriptions
+    send(hub, "bridge/garage/openWB/lp/1/W")
+    send(hub, "bridge/garage/openWB/lp/1/W")
+    send(hub, "bridge/yard/openWB/evu/W")
+    send(hub, "bridge/other/openWB/evu/W")
+    assert garage.topics == ["bridge/garage/openWB/lp/1/W"] * 2
+    assert yard.topics == ["bridge/yard/openWB/evu/W"]
+
+
+def test_remove_router(subscriptions) -> None:
+    """Test that a removed router gets no messages and its subscriptions are removed."""
+    hub = OpenWBHub(None)
+    first = add_router(hub, "1", "openWB")
+    second = add_router(hub, "2", "wallbox")
+    send(hub, "openWB/lp/1/W")
+    asyncio.run(hub.async_remove_router("1"))
+    send(hub, "openWB/lp/1/W")
+    assert first.topics == ["openWB/lp/1/W"]
+    assert not any(topicFilter.startswith("openWB/") for topicFilter in subscriptions)
+    # A router added later gets the topics that went nowhere before.
+    third = add_router(hub, "3", "openWB")
+    send(hub, "openWB/lp/1/W")
+    assert third.topics == ["openWB/lp/1/W"]
+    assert not second.topics
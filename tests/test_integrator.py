@@ -0,0 +1,27 @@
+"""Tests of the energy integration."""
+import pytest
+
+from custom_components.openwbmqtt.integrator import trapezoid
+
+
+def test_trapezoid_positive() -> None:
+    """Test the energy of a positive power."""
+    assert trapezoid(1000, 3000, 3600) == pytest.approx((2.0, 0.0))
+
+
+def test_trapezoid_negative() -> None:
+    """Test that a negative power counts as negative energy."""
+    assert trapezoid(-2000, -2000, 1800) == pytest.approx((0.0, 1.0))
+
+
+def test_trapezoid_zero_crossing() -> None:
+    """Test that each part is integrated up to the zero crossing."""
+    # Crossing after 900 s: 1000 W * 900 s / 2 and 3000 W * 2700 s / 2.
+    assert trapezoid(1000, -3000, 3600) == pytest.approx((0.125, 1.125))
+    assert trapezoid(-3000, 1000, 3600) == pytest.approx((0.125, 1.125))
+
+
+def test_trapezoid_zero() -> None:
+    """Test the energy of a power of zero and of no time."""
+    assert trapezoid(0, 0, 60) == (0.0, 0.0)
+    assert trapezoid(1000, -1000, 0) == pytest.approx((0.0, 0.0))
@@ -0,0 +1,59 @@
+"""Tests of the confirmation latency of commands."""
+from custom_components.openwbmqtt.latency import (
+    OpenWBCommandLatency,
+    OpenWBHistogram,
+    same_payload,
+)
+
+
+def test_same_payload() -> None:
+    """Test that payloads are compared by their value."""
+    assert same_payload("16", b"16.0")
+    assert same_payload(b"1", 1)
+    assert not same_payload("16", b"10")
+    assert same_payload("Sofortladen", b"Sofortladen")
+
+
+def test_confirmation(manual_hass) -> None:
+    """Test that the latency is recorded once openWB reports the commanded value."""
+    latency = OpenWBCommandLatency(manual_hass, timeout=10)
+    latency.async_track("get/current", "16", 1)
+    manual_hass.loop.advance(0.5)
+    latency.async_confirm("get/current", b"10")
+    assert "get/current" in latency.pending
+    manual_hass.loop.advance(0.5)
+    latency.async_confirm("get/current", b"16")
+    assert not latency.pending
+    assert latency.histograms[1].total == 1
+    assert latency.percentile(1, 50) == 1.0
+    assert latency.percentile(None, 50) is None
+    manual_hass.loop.advance(20)
+    assert not latency.timeouts
+
+
+def test_timeout(manual_hass) -> None:
+    """Test that commands without confirmation time out per charge point."""
+    latency = OpenWBCommandLatency(manual_hass, timeout=10)
+    latency.async_track("get/current", "16", 1)
+    latency.async_track("get/mode", "2", None)
+    manual_hass.loop.advance(9.5)
+    # A later command to the same topic restarts the timeout.
+    latency.async_track("get/current", "12", 1)
+    manual_hass.loop.advance(0.5)
+    assert latency.timeouts == {None: 1}
+    assert list(latency.pending) == ["get/current"]
+    manual_hass.loop.advance(10)
+    assert latency.timeouts == {None: 1, 1: 1}
+    assert not latency.pending
+    assert not latency.histograms
+
+
+def test_histogram() -> None:
+    """Test the percentiles of the latency histogram."""
+    histogram = OpenWBHistogram((0.5, 1.0, 2.0))
+    assert histogram.percentile(50) is None
+    for value in (0.2, 0.4, 0.8, 1.5, 30.0):
+        histogram.add(value)
+    assert histogram.counts == [2, 1, 1, 1]
+    assert histogram.percentile(50) == 1.0
+    assert histogram.percentile(95) == 2.0
@@ -0,0 +1,112 @@
+"""Tests of the compiled payload parsers."""
+from custom_components.openwbmqtt.const import openwbSensorEntityDescription
+from custom_components.openwbmqtt.parsers import (
+    accepts_bytes,
+    compile_numeric_parser,
+    compile_sensor_parser,
+    parse_time_remaining,
+    parse_uptime,
+    text_parser,
+)
+
+CHARGE_STATUS = {0: "Bereit", 1: "Lädt", 2: "Fehler"}
+
+
+def test_value_map() -> None:
+    """Test that mapped payloads are looked up by their raw text."""
+    parser = compile_sensor_parser(
+        openwbSensorEntityDescription(key="lp/1/chargeStatus", valueMap=CHARGE_STATUS)
+    )
+    assert parser("1") == "Lädt"
+    # Other spellings of the keys fall back to the conversion to int.
+    assert parser("01") == "Lädt"
+    assert parser("7") is None
+    assert parser("unbekannt") == "unbekannt"
+
+
+def test_value_map_with_value_fn() -> None:
+    """Test that the value function is applied before the lookup."""
+    parser = compile_sensor_parser(
+        openwbSensorEntityDescription(
+            key="lp/1/chargeStatus",
+            valueMap=CHARGE_STATUS,
+            value_fn=lambda payload: payload.strip('"'),
+        )
+    )
+    assert parser('"2"') == "Fehler"
+
+
+def test_value_fn() -> None:
+    """Test that descriptions without a map use their value function or no parser."""
+    value_fn = str.upper
+    assert (
+        compile_sensor_parser(
+            openwbSensorEntityDescription(key="system/Version", value_fn=value_fn)
+        )
+        is value_fn
+    )
+    assert compile_sensor_parser(openwbSensorEntityDescription(key="lp/1/W")) is None
+
+
+def test_special_parsers() -> None:
+    """Test the parsers of the uptime and the remaining charge time."""
+    assert (
+        compile_sensor_parser(openwbSensorEntityDescription(key="system/Uptime"))
+        is parse_uptime
+    )
+    assert (
+        parse_uptime(
+            " 12:33:01 up 3 days, 19:02,  0 users,  load average: 0.61, 0.61, 0.62"
+        )
+        == "3 d 19 h 2 min"
+    )
+    assert parse_uptime(" 12:33:01 up 42 min,  0 users,  load average: 0.61") == (
+        "0 d 0 h 42 min"
+    )
+    assert (
+        compile_sensor_parser(openwbSensorEntityDescription(key="TimeRemaining"))
+        is parse_time_remaining
+    )
+    assert parse_time_remaining("Kein Ladevorgang") is None
+
+
+def test_numeric_parser() -> None:
+    """Test that numeric payloads are parsed from the raw bytes, scaled and rounded."""
+    parser = compile_numeric_parser(None, None)
+    assert parser(b"3680") == 3680
+    assert isinstance(parser(b"3680"), int)
+    assert parser(b"230.5") == 230.5
+    assert compile_numeric_parser(-1, None)(b"-1500") == 1500
+    assert compile_numeric_parser(None, 1)(b"12.345") == 12.3
+    assert compile_numeric_parser(0.001, 0)(b"12345") == 12
+    # Snapshots replay the payloads as text.
+    assert parser("16") == 16
+
+
+def test_numeric_description() -> None:
+    """Test that numeric descriptions get a parser of the raw bytes."""
+    parser = compile_sensor_parser(
+        openwbSensorEntityDescription(key="pv/W", numeric=True, scale=-1)
+    )
+    assert accepts_bytes(parser)
+    assert parser(b"-2000") == 2000
+
+
+def test_accepts_bytes() -> None:
+    """Test which parsers are called with the raw bytes."""
+    assert accepts_bytes(int)
+    assert accepts_bytes(float)
+    assert accepts_bytes(compile_numeric_parser(None, 2))
+    assert not accepts_bytes(None)
+    assert not accepts_bytes(parse_uptime)
+    parser = compile_sensor_parser(
+        openwbSensorEntityDescription(key="lp/1/chargeStatus", valueMap=CHARGE_STATUS)
+    )
+    assert not accepts_bytes(parser)
+
+
+def test_text_parser() -> None:
+    """Test that parsers of text get the decoded payload."""
+    assert text_parser(None)(b"openWB") == "openWB"
+    assert text_parser(str.upper)(b"lp1") == "LP1"
+    assert text_parser(str.upper)("lp1") == "LP1"
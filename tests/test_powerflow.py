@@ -0,0 +1,73 @@
+"""Tests of the power flow engine."""
+from types import SimpleNamespace
+
+import pytest
+
+from custom_components.openwbmqtt.powerflow import OpenWBPowerFlow, power_flow
+from custom_components.openwbmqtt.router import OpenWBTopicRouter
+
+
+def send(router: OpenWBTopicRouter, topic: str, payload: bytes) -> None:
+    """Pass a live message to the router."""
+    router.async_handle_message(
+        SimpleNamespace(topic=f"openWB/{topic}", payload=payload, retain=False)
+    )
+
+
+def test_pv_surplus() -> None:
+    """Test that export and battery charging are supplied by PV first."""
+    flows = power_flow(pv=-5000, grid=-1000, battery=1500, chargePoints=2000)
+    assert flows["house"] == 500
+    assert flows["pvToGrid"] == 1000
+    assert flows["pvToBattery"] == 1500
+    assert flows["pvToChargePoints"] == 2000
+    assert flows["pvToHouse"] == 500
+    assert flows["gridToHouse"] == flows["gridToChargePoints"] == 0
+    assert flows["selfSufficiency"] == 100
+
+
+def test_shared_sources() -> None:
+    """Test that house and charge points share grid and battery in proportion."""
+    flows = power_flow(pv=-1000, grid=2000, battery=-1000, chargePoints=3000)
+    assert flows["house"] == 1000
+    assert flows["pvToChargePoints"] == pytest.approx(750)
+    assert flows["gridToChargePoints"] == pytest.approx(1500)
+    assert flows["batteryToChargePoints"] == pytest.approx(750)
+    assert flows["gridToHouse"] == pytest.approx(500)
+    assert flows["selfSufficiency"] == pytest.approx(50)
+
+
+def test_no_consumption() -> None:
+    """Test that the self-sufficiency is unknown without consumption."""
+    flows = power_flow(pv=0, grid=0, battery=0, chargePoints=0)
+    assert flows["house"] == 0
+    assert flows["selfSufficiency"] is None
+
+
+def test_engine(manual_hass) -> None:
+    """Test that the inputs of a control cycle are combined into one computation."""
+    router = OpenWBTopicRouter(manual_hass, "openWB")
+    engine = OpenWBPowerFlow(manual_hass, router, 1, delay=0.5)
+    computed = []
+    remove = engine.async_listen(lambda: computed.append(dict(engine.flows)))
+    send(router, "pv/W", b"-3000")
+    send(router, "global/WAllChargePoints", b"2000")
+    send(router, "lp/1/W", b"2000")
+    manual_hass.loop.advance(1)
+    # The flows are unknown until the grid power is received.
+    assert not computed
+    # A first input of zero is new and schedules the computation.
+    send(router, "evu/W", b"0")
+    manual_hass.loop.advance(1)
+    assert len(computed) == 1
+    assert computed[0]["pvToHouse"] == 1000
+    assert engine.chargePointsPV == {1: 2000}
+    # Unchanged inputs are not computed again.
+    send(router, "evu/W", b"0")
+    send(router, "pv/W", b"-3000")
+    manual_hass.loop.advance(1)
+    assert engine.computations == 1
+    remove()
+    send(router, "pv/W", b"-4000")
+    manual_hass.loop.advance(1)
+    assert engine.computations == 1
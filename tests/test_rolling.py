@@ -0,0 +1,80 @@
+"""Tests of the rolling statistics."""
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from custom_components.openwbmqtt.rolling import OpenWBRollingStatistics
+from custom_components.openwbmqtt.router import OpenWBTopicRouter
+
+
+def test_empty() -> None:
+    """Test that empty windows have no statistics."""
+    statistics = OpenWBRollingStatistics((60,), 8)
+    assert statistics.minimum(0) is None
+    assert statistics.maximum(0) is None
+    assert statistics.mean(0) is None
+
+
+def test_windows() -> None:
+    """Test that samples leave each window after its length."""
+    statistics = OpenWBRollingStatistics((10, 30), 64)
+    for now, value in ((0, 5.0), (10, 1.0), (20, 9.0), (30, 3.0)):
+        statistics.add(now, value)
+    assert (statistics.minimum(0), statistics.maximum(0)) == (3.0, 3.0)
+    assert statistics.mean(0) == 3.0
+    assert (statistics.minimum(1), statistics.maximum(1)) == (1.0, 9.0)
+    assert statistics.mean(1) == pytest.approx(13 / 3)
+
+
+def test_capacity() -> None:
+    """Test that the windows are limited to the last capacity samples."""
+    statistics = OpenWBRollingStatistics((60,), 4)
+    for now, value in enumerate((100.0, 1.0, 2.0, 3.0, 4.0)):
+        statistics.add(now, value)
+    assert statistics.maximum(0) == 4.0
+    assert statistics.minimum(0) == 1.0
+    assert statistics.mean(0) == 2.5
+
+
+def test_random() -> None:
+    """Test the statistics against a recomputation of each window."""
+    windows = (5, 20, 60)
+    capacity = 32
+    statistics = OpenWBRollingStatistics(windows, capacity)
+    rnd = random.Random(0)
+    samples = []
+    now = 0.0
+    for _ in range(500):
+        now += rnd.uniform(0.1, 3)
+        value = float(rnd.randint(-50, 50))
+        statistics.add(now, value)
+        samples.append((now, value))
+        for index, length in enumerate(windows):
+            window = [
+                sampleValue
+                for sampleTime, sampleValue in samples[-capacity:]
+                if sampleTime > now - length
+            ]
+            assert statistics.minimum(index) == min(window)
+            assert statistics.maximum(index) == max(window)
+            assert statistics.mean(index) == pytest.approx(sum(window) / len(window))
+
+
+def test_router_samples(manual_hass) -> None:
+    """Test that live messages are parsed and replayed payloads are skipped."""
+    router = OpenWBTopicRouter(manual_hass, "openWB")
+    router.async_restore_payloads({"pv/W": "-1500"})
+    statistics = OpenWBRollingStatistics(
+        (60,), 8, router, "openWB/pv/W", lambda payload: -float(payload)
+    )
+    notified = []
+    statistics.async_listen(lambda: notified.append(statistics.maximum(0)))
+    assert not notified
+    assert statistics.maximum(0) is None
+    for payload in (b"-2000", b"-500"):
+        router.async_handle_message(
+            SimpleNamespace(topic="openWB/pv/W", payload=payload, retain=False)
+        )
+    assert notified == [2000.0, 2000.0]
+    assert statistics.minimum(0) == 500.0
@@ -0,0 +1,40 @@
+"""Tests of the downsampling of measurement sensors."""
+import pytest
+
+from custom_components.openwbmqtt.const import (
+    SAMPLING_LAST,
+    SAMPLING_MAX,
+    SAMPLING_MEAN,
+    SAMPLING_OFF,
+)
+from custom_components.openwbmqtt.sampling import OpenWBSampler, sampling_mode
+
+
+@pytest.mark.parametrize(
+    ("mode", "expected"),
+    [(SAMPLING_MEAN, 2000.33), (SAMPLING_MAX, 3680.0), (SAMPLING_LAST, 1000.0)],
+)
+def test_flush(mode: str, expected: float) -> None:
+    """Test the aggregate and the number of readings of a window."""
+    sampler = OpenWBSampler(mode)
+    for value in (1321.0, 3680.0, 1000.0):
+        sampler.add(value)
+    assert sampler.flush() == (expected, 3)
+
+
+def test_flush_starts_new_window() -> None:
+    """Test that a flush starts a new window and an empty window has no value."""
+    sampler = OpenWBSampler(SAMPLING_MAX)
+    sampler.add(3680.0)
+    sampler.flush()
+    assert sampler.flush() == (None, 0)
+    sampler.add(10.0)
+    assert sampler.flush() == (10.0, 1)
+
+
+def test_sampling_mode() -> None:
+    """Test the configured sampling mode of a sensor description."""
+    options = {"sampling_lp_1_w": SAMPLING_MAX}
+    assert sampling_mode(options, "lp/1/W", SAMPLING_MEAN) == SAMPLING_MAX
+    assert sampling_mode(options, "lp/2/W", SAMPLING_MEAN) == SAMPLING_MEAN
+    assert sampling_mode(options, "lp/1/W", None) == SAMPLING_OFF
@@ -0,0 +1,130 @@
+"""Tests of the services."""
+import asyncio
+from types import SimpleNamespace
+
+from homeassistant.exceptions import ServiceValidationError
+import pytest
+
+from custom_components.openwbmqtt import hub as hub_module
+from custom_components.openwbmqtt.hub import OpenWBHub
+from custom_components.openwbmqtt.profiles import (
+    async_publish_setting,
+    command_topics,
+)
+from custom_components.openwbmqtt.router import OpenWBTopicRouter
+from custom_components.openwbmqtt.services import async_register_services
+
+
+class FakeCoalescer:
+    """Command coalescer that records the commands."""
+
+    def __init__(self) -> None:
+        """Initialize the coalescer."""
+        self.commands: list[tuple] = []
+
+    def async_publish(self, topic: str, payload: str, **kwargs) -> None:
+        """Record the command."""
+        self.commands.append((topic, payload, kwargs["noop"], kwargs["immediate"]))
+
+
+def fake_router(mqtt_root: str, nChargePoints: int = 1) -> OpenWBTopicRouter:
+    """Return a topic router with the topic table of the services."""
+    router = OpenWBTopicRouter(None, mqtt_root)
+    router.commands = FakeCoalescer()
+    router.commandTopics = command_topics(mqtt_root, nChargePoints)
+    return router
+
+
+@pytest.fixture
+def hub(monkeypatch) -> OpenWBHub:
+    """Return a hub with two openWB devices."""
+
+    async def async_subscribe(*args, **kwargs):
+        return lambda: None
+
+    monkeypatch.setattr(hub_module.mqtt, "async_subscribe", async_subscribe)
+    hub = OpenWBHub(None)
+    for entryID, mqtt_root in (("1", "garage/openWB"), ("2", "yard/openWB")):
+        router = fake_router(mqtt_root, 2)
+        hub.async_add_router(entryID, router)
+        asyncio.run(hub.async_subscribe_router(router))
+    return hub
+
+
+def test_command_topics() -> None:
+    """Test the topic table of the settings of the services."""
+    topics = command_topics("openWB", 2)
+    assert topics["global_charge_mode", None].command == "openWB/set/ChargeMode"
+    assert topics["global_charge_mode", None].currentValue == "openWB/global/ChargeMode"
+    binding = topics["charge_point_enabled", 2]
+    assert binding.command == "openWB/set/lp2/ChargePointEnabled"
+    assert binding.currentValue == "openWB/lp/2/ChargePointEnabled"
+    assert binding.chargePoint == 2
+    assert ("charge_point_enabled", 3) not in topics
+
+
+def test_publish_setting() -> None:
+    """Test that settings are published right away, unless openWB reports them."""
+    router = fake_router("openWB")
+    router.async_handle_message(
+        SimpleNamespace(topic="openWB/global/ChargeMode", payload=b"2", retain=False)
+    )
+    async_publish_setting(router, "global_charge_mode", None, "2")
+    async_publish_setting(router, "global_charge_mode", None, "2", onlyChanged=True)
+    async_publish_setting(router, "global_charge_mode", None, "0", onlyChanged=True)
+    assert router.commands.commands == [
+        ("openWB/set/ChargeMode", "2", False, True),
+        ("openWB/set/ChargeMode", "2", True, True),
+        ("openWB/set/ChargeMode", "0", False, True),
+    ]
+    with pytest.raises(ServiceValidationError):
+        async_publish_setting(router, "charge_point_enabled", 2, "1")
+
+
+def test_routers_for_service(hub) -> None:
+    """Test which openWB devices a service call addresses."""
+    garage = hub.routers["1"]
+    assert hub.routers_for_service({"config_entry_id": "1"}) == [garage]
+    assert hub.routers_for_service({"mqtt_prefix": "garage/openWB"}) == [garage]
+    assert hub.routers_for_service({"mqtt_prefix": "openWB"}) == []
+    # Without a target, only a single openWB device is addressed.
+    assert hub.routers_for_service({}) == []
+    asyncio.run(hub.async_remove_router("2"))
+    assert hub.routers_for_service({}) == [garage]
+
+
+def test_service_handlers(hub) -> None:
+    """Test that the service handlers publish to the addressed openWB device."""
+    handlers = {}
+    hass = SimpleNamespace(
+        services=SimpleNamespace(
+            async_register=lambda domain, service, handler, **kwargs: handlers.update(
+                {service: handler}
+            )
+        )
+    )
+    async_register_services(hass, hub)
+    handlers["enable_disable_cp"](
+        SimpleNamespace(
+            data={
+                "charge_point_id": 2,
+                "selected_status": "On",
+                "mqtt_prefix": "yard/openWB",
+            }
+        )
+    )
+    handlers["change_charge_current_per_cp"](
+        SimpleNamespace(
+            data={"charge_point_id": 1, "target_current": 16, "config_entry_id": "1"}
+        )
+    )
+    assert hub.routers["2"].commands.commands == [
+        ("yard/openWB/set/lp2/ChargePointEnabled", "1", False, True)
+    ]
+    assert hub.routers["1"].commands.commands == [
+        ("garage/openWB/config/set/sofort/lp/1/current", "16", False, True)
+    ]
+    with pytest.raises(ServiceValidationError):
+        handlers["change_global_charge_mode"](
+            SimpleNamespace(data={"global_charge_mode": "Stop"})
+        )
@@ -0,0 +1,85 @@
+"""Tests of the charge session log."""
+import os
+
+from custom_components.openwbmqtt.sessions import (
+    SESSION_HEADER,
+    SESSION_RECORD,
+    OpenWBChargeSession,
+    OpenWBSessionLog,
+)
+
+
+def _log(path) -> OpenWBSessionLog:
+    """Return a log with sessions of two charge points."""
+    log = OpenWBSessionLog(str(path / "sessions"))
+    log.open()
+    log.append(
+        [
+            OpenWBChargeSession(1, 0, 100, 5.0, 3700, "tag1"),
+            OpenWBChargeSession(2, 50, 200, 10.0, 11000, "tag2"),
+        ]
+    )
+    log.append([OpenWBChargeSession(1, 300, 400, 2.0, 2300)])
+    # A long session logged after a short one that started later.
+    log.append(
+        [
+            OpenWBChargeSession(2, 1000, 1100, 1.0, 1000),
+            OpenWBChargeSession(1, 500, 1200, 7.0, 7400),
+        ]
+    )
+    return log
+
+
+def _starts(sessions: list[OpenWBChargeSession]) -> list[float]:
+    """Return the starts of the sessions."""
+    return [session.start for session in sessions]
+
+
+def test_query(tmp_path) -> None:
+    """Test the sessions that overlap a range."""
+    log = _log(tmp_path)
+    assert _starts(log.query(0, 2000)) == [0, 50, 300, 1000, 500]
+    assert _starts(log.query(150, 350)) == [50, 300]
+    assert _starts(log.query(401, 499)) == []
+    assert _starts(log.query(600, 700)) == [500]
+    assert _starts(log.query(100, 100)) == [0, 50]
+
+
+def test_query_charge_point(tmp_path) -> None:
+    """Test the sessions of one charge point."""
+    log = _log(tmp_path)
+    assert _starts(log.query(0, 2000, 1)) == [0, 300, 500]
+    assert _starts(log.query(150, 1050, 2)) == [50, 1000]
+    assert log.query(0, 2000, 3) == []
+
+
+def test_fields(tmp_path) -> None:
+    """Test that a session is read back as it was appended."""
+    log = _log(tmp_path)
+    session = log.query(0, 10, 1)[0]
+    assert session == OpenWBChargeSession(1, 0, 100, 5.0, 3700, "tag1")
+
+
+def test_reopen(tmp_path) -> None:
+    """Test that an incomplete record is cut off when the log is opened."""
+    log = _log(tmp_path)
+    with open(log.path, "ab") as file:
+        file.write(b"\0" * (SESSION_RECORD.size // 2))
+    log = OpenWBSessionLog(log.path)
+    log.open()
+    assert log.count == 5
+    assert os.path.getsize(log.path) == SESSION_HEADER.size + 5 * SESSION_RECORD.size
+    assert _starts(log.query(0, 2000, 2)) == [50, 1000]
+    assert _starts(log.query(600, 700)) == [500]
+
+
+def test_invalid_file(tmp_path) -> None:
+    """Test that a file that is no session log is moved aside."""
+    path = tmp_path / "sessions"
+    path.write_bytes(b"{}")
+    log = OpenWBSessionLog(str(path))
+    log.open()
+    assert log.count == 0
+    assert (tmp_path / "sessions.invalid").read_bytes() == b"{}"
+    log.append([OpenWBChargeSession(1, 0, 100, 5.0, 3700)])
+    assert _starts(log.query(0, 2000)) == [0]
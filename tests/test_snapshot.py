@@ -0,0 +1,62 @@
+"""Tests of the snapshot of the last payloads."""
+from types import SimpleNamespace
+
+from custom_components.openwbmqtt.router import OpenWBTopicRouter
+from custom_components.openwbmqtt.snapshot import snapshot_topic
+
+
+def message(topic: str, payload: bytes) -> SimpleNamespace:
+    """Return a live MQTT message."""
+    return SimpleNamespace(topic=topic, payload=payload, retain=False)
+
+
+def test_snapshot_topic() -> None:
+    """Test that time-relative topics are kept out of the snapshot."""
+    assert snapshot_topic("lp/1/W")
+    assert snapshot_topic("config/get/sofort/lp/1/current")
+    assert not snapshot_topic("system/Uptime")
+    assert not snapshot_topic("lp/2/TimeRemaining")
+
+
+def test_snapshot_payloads(manual_hass) -> None:
+    """Test that the payloads of the registered topics are saved once they change."""
+    router = OpenWBTopicRouter(manual_hass, "openWB")
+    saves = []
+    router.snapshot = SimpleNamespace(async_schedule_save=lambda: saves.append(1))
+    router.async_register("openWB/lp/1/W", lambda value: None, int)
+    router.async_register("openWB/lp/1/TimeRemaining", lambda value: None)
+    router.async_handle_message(message("openWB/lp/1/W", b"3680"))
+    router.async_handle_message(message("openWB/lp/1/W", b"3680"))
+    router.async_handle_message(message("openWB/lp/1/TimeRemaining", b"1 H 20 Min"))
+    router.async_handle_message(message("openWB/evu/W", b"-200"))
+    assert len(saves) == 1
+    assert router.snapshot_payloads() == {"lp/1/W": "3680"}
+
+
+def test_restore_payloads(manual_hass) -> None:
+    """Test that restored payloads are replayed but not taken as reported by openWB."""
+    router = OpenWBTopicRouter(manual_hass, "openWB")
+    router.async_restore_payloads(
+        {"lp/1/W": "3680", "system/Uptime": " 12:33:01 up 42 min,  0 users"}
+    )
+    values = []
+    router.async_register("openWB/lp/1/W", values.append, int)
+    router.async_register("openWB/system/Uptime", values.append)
+    assert values == [3680]
+    assert router.is_restored("openWB/lp/1/W")
+    assert router.reported_payload("openWB/lp/1/W") is None
+    router.async_handle_message(message("openWB/lp/1/W", b"3680"))
+    assert values == [3680, 3680]
+    assert not router.is_restored("openWB/lp/1/W")
+    assert router.reported_payload("openWB/lp/1/W") == b"3680"
+
+
+def test_restore_keeps_received_payloads(manual_hass) -> None:
+    """Test that a snapshot does not replace payloads received before it was loaded."""
+    router = OpenWBTopicRouter(manual_hass, "openWB")
+    router.async_handle_message(message("openWB/lp/1/W", b"0"))
+    router.async_restore_payloads({"lp/1/W": "3680"})
+    values = []
+    router.async_register("openWB/lp/1/W", values.append, int)
+    assert values == [0]
+    assert not router.is_restored("openWB/lp/1/W")
@@ -0,0 +1,65 @@
+"""Tests of the staleness watchdog."""
+from custom_components.openwbmqtt.watchdog import OpenWBTopicWatchdog
+
+
+def _watchdog(hass, events: list) -> OpenWBTopicWatchdog:
+    """Return a started watchdog that records the changes of its topic."""
+    watchdog = OpenWBTopicWatchdog(hass, 3, tick=1, slots=16)
+    watchdog.async_listen("W", lambda topic, stale: events.append((topic, stale)))
+    watchdog.async_start()
+    return watchdog
+
+
+def test_stale(manual_hass) -> None:
+    """Test that a topic is stale after factor times its interval."""
+    events = []
+    watchdog = _watchdog(manual_hass, events)
+    for _ in range(5):
+        watchdog.async_seen("W")
+        manual_hass.loop.advance(2)
+    # Last seen at tick 8 with an interval of 2 ticks, stale at tick 14.
+    manual_hass.loop.advance(3)
+    assert not events
+    manual_hass.loop.advance(1)
+    assert events == [("W", True)]
+    assert watchdog.stale == {"W"}
+
+
+def test_fresh(manual_hass) -> None:
+    """Test that a stale topic is fresh with its next message."""
+    events = []
+    watchdog = _watchdog(manual_hass, events)
+    for _ in range(3):
+        watchdog.async_seen("W")
+        manual_hass.loop.advance(1)
+    manual_hass.loop.advance(30)
+    watchdog.async_seen("W")
+    assert events == [("W", True), ("W", False)]
+    assert not watchdog.stale
+    # The silence is not taken as the interval.
+    assert watchdog._seen["W"][1] == 1
+    manual_hass.loop.advance(3)
+    assert events[-1] == ("W", True)
+
+
+def test_single_message(manual_hass) -> None:
+    """Test that a topic without an interval is never stale."""
+    events = []
+    watchdog = _watchdog(manual_hass, events)
+    watchdog.async_seen("W")
+    manual_hass.loop.advance(100)
+    assert not events
+
+
+def test_long_interval(manual_hass) -> None:
+    """Test a deadline beyond the wheel."""
+    events = []
+    watchdog = _watchdog(manual_hass, events)
+    watchdog.async_seen("W")
+    manual_hass.loop.advance(10)
+    watchdog.async_seen("W")
+    # The deadline at tick 40 is put into the last slot and checked again.
+    manual_hass.loop.advance(29)
+    assert not events
+    manual_hass.loop.advance(1)
+    assert events == [("W", True)]